@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix, tmp_path_factory):
+    """
+    Run tests against a file-backed SQLite database.
+
+    The default in-memory test database uses SQLite's shared cache, whose
+    table locks fail immediately instead of waiting, so the concurrency
+    tests (one connection per thread) need a real file and a busy timeout.
+    """
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('TEST', {})['NAME'] = str(tmp_path_factory.mktemp('db') / 'test.sqlite3')
+        database.setdefault('OPTIONS', {})['timeout'] = 60
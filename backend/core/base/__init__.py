@@ -1,12 +1,14 @@
 from .models import TimestampedModel
 from .views import BaseViewSet
 from .services import BaseService
+from .sequences import SequenceService
 from .exceptions import DomainException, ValidationException, NotFoundException
 
 __all__ = [
     'TimestampedModel',
     'BaseViewSet',
     'BaseService',
+    'SequenceService',
     'DomainException',
     'ValidationException',
     'NotFoundException',
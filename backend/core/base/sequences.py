@@ -0,0 +1,94 @@
+"""
+Sequence numbers for documents (NCRs, orders, deliveries, ...).
+
+Each series is one counter row. Values are taken with a single
+`UPDATE ... SET last_value = last_value + n`, which locks the row until
+the caller's transaction ends, so concurrent writers never receive the
+same value and allocation costs the same however many documents exist.
+
+With block_size > 1 a process reserves a block of values at once and
+hands them out from memory. Numbers stay unique but may have gaps and
+interleave between processes, so use it for high-rate series only.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from core.models import Sequence
+from .services import BaseService
+
+# Pre-allocated values per key: [next_value, last_value]
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+class SequenceService(BaseService):
+    """Race-free counters keyed by series name."""
+    model = Sequence
+
+    @classmethod
+    @transaction.atomic
+    def allocate(cls, key: str, count: int = 1, start_after=None) -> range:
+        """
+        Reserve `count` consecutive values of a series.
+
+        start_after: optional callable giving the last value already used
+        when the series has no counter yet (e.g. numbers issued before
+        the counter existed).
+        """
+        updated = cls.model.objects.filter(key=key).update(last_value=F('last_value') + count)
+        if not updated:
+            initial = start_after() if start_after else 0
+            try:
+                with transaction.atomic():
+                    cls.model.objects.create(key=key, last_value=initial + count)
+            except IntegrityError:
+                # Created concurrently; take the values from the existing row
+                cls.model.objects.filter(key=key).update(last_value=F('last_value') + count)
+        last = cls.model.objects.filter(key=key).values_list('last_value', flat=True).get()
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def next_value(cls, key: str, block_size: int = None, start_after=None) -> int:
+        """Next value of a series, served from a pre-allocated block when block_size > 1."""
+        block_size = block_size or settings.SEQUENCE_BLOCK_SIZE
+        if block_size <= 1:
+            return cls.allocate(key, 1, start_after)[0]
+
+        with _blocks_lock:
+            block = _blocks.get(key)
+            if block and block[0] <= block[1]:
+                value = block[0]
+                block[0] += 1
+                return value
+
+        values = cls.allocate(key, block_size, start_after)
+
+        def keep_rest():
+            with _blocks_lock:
+                _blocks[key] = [values[1], values[-1]]
+
+        # Only keep the block once the reservation is committed
+        transaction.on_commit(keep_rest)
+        return values[0]
+
+    @classmethod
+    def next_number(
+        cls,
+        prefix: str,
+        width: int = 4,
+        separator: str = '-',
+        block_size: int = None,
+        start_after=None
+    ) -> str:
+        """Formatted document number, e.g. next_number('DEL-2024') -> 'DEL-2024-0001'."""
+        value = cls.next_value(prefix, block_size, start_after)
+        return f"{prefix}{separator}{value:0{width}d}"
+
+    @classmethod
+    def reset_cache(cls) -> None:
+        """Drop pre-allocated blocks of this process."""
+        with _blocks_lock:
+            _blocks.clear()
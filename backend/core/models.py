@@ -0,0 +1,13 @@
+"""
+Concrete models shared by all plugins.
+"""
+from django.db import models
+
+
+class Sequence(models.Model):
+    """Counter behind one series of document numbers (e.g. 'NCR-20240101')."""
+    key = models.CharField(max_length=100, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.last_value}"
@@ -0,0 +1,66 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.base.sequences import SequenceService
+
+WRITERS = 50
+NUMBERS_PER_WRITER = 20
+
+
+def run_parallel(target, count=WRITERS):
+    """Run target(i) in `count` threads at once; returns the exceptions raised."""
+    errors = []
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        try:
+            barrier.wait()
+            target(i)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class SequenceConcurrencyTests(TransactionTestCase):
+    """Parallel writers never receive the same document number."""
+
+    def setUp(self):
+        SequenceService.reset_cache()
+
+    def tearDown(self):
+        SequenceService.reset_cache()
+
+    def collect_numbers(self, prefix, block_size):
+        numbers = []
+        lock = threading.Lock()
+
+        def write(i):
+            for _ in range(NUMBERS_PER_WRITER):
+                number = SequenceService.next_number(prefix, block_size=block_size)
+                with lock:
+                    numbers.append(number)
+
+        self.assertEqual(run_parallel(write), [])
+        return numbers
+
+    def test_gap_free_numbers_without_duplicates(self):
+        numbers = self.collect_numbers('DEL', block_size=1)
+
+        expected = [f'DEL-{value:04d}' for value in range(1, WRITERS * NUMBERS_PER_WRITER + 1)]
+        self.assertEqual(sorted(numbers), expected)
+
+    def test_block_allocated_numbers_without_duplicates(self):
+        numbers = self.collect_numbers('ORD', block_size=10)
+
+        self.assertEqual(len(numbers), WRITERS * NUMBERS_PER_WRITER)
+        self.assertEqual(len(set(numbers)), len(numbers))
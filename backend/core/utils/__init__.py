@@ -1,4 +1,5 @@
 from .validators import validate_positive, validate_not_empty
 from .query_utils import get_stats_aggregation
+from .cache import LRUCache
 
-__all__ = ['validate_positive', 'validate_not_empty', 'get_stats_aggregation']
+__all__ = ['validate_positive', 'validate_not_empty', 'get_stats_aggregation', 'LRUCache']
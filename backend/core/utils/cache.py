@@ -0,0 +1,97 @@
+"""
+In-process caching utilities.
+
+Provides a small thread-safe LRU cache for hot read paths that are
+backed by the database and invalidated explicitly by services. Explicit
+invalidation only reaches the current process, so caches whose entries
+other workers can make stale should be given a timeout.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with a fixed capacity.
+
+    Entries expire `timeout` seconds after they were stored (never when
+    timeout is None).
+
+    Usage:
+        _cache = LRUCache(maxsize=10000, timeout=60)
+        _cache.set(key, value)
+        _cache.get(key)
+    """
+
+    def __init__(self, maxsize: int = 1024, timeout: float = None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, now):
+        """(found, value) for key; drops the entry if it has expired. Lock must be held."""
+        if key not in self._data:
+            return False, None
+        expires, value = self._data[key]
+        if expires is not None and expires <= now:
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def get(self, key, default=None):
+        """Return cached value for key and mark it as recently used."""
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            return value if found else default
+
+    def get_many(self, keys) -> dict:
+        """Return a dict of cached values for the keys that are present."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                present, value = self._lookup(key, now)
+                if present:
+                    found[key] = value
+        return found
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entry."""
+        expires = time.monotonic() + self.timeout if self.timeout is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def set_many(self, items: dict):
+        """Store several key/value pairs."""
+        for key, value in items.items():
+            self.set(key, value)
+
+    def delete(self, key):
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        """Remove several keys from the cache."""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key, time.monotonic())[0]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..domain.models import MaterialStock, Container, TraceabilityRecord, KanbanCard
+from ..domain.models import MaterialStock, MaterialReservation, Container, TraceabilityRecord, KanbanCard
 
 
 class MaterialStockSerializer(serializers.ModelSerializer):
@@ -13,6 +13,16 @@ class MaterialStockSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MaterialReservationSerializer(serializers.ModelSerializer):
+    order_number = serializers.CharField(source='order.number', read_only=True)
+    material_name = serializers.CharField(
+        source='material.name', read_only=True)
+
+    class Meta:
+        model = MaterialReservation
+        fields = '__all__'
+
+
 class ContainerSerializer(serializers.ModelSerializer):
     content_material_name = serializers.CharField(
         source='content_material.name', read_only=True)
@@ -40,3 +50,140 @@ class KanbanCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = KanbanCard
         fields = '__all__'
+
+
+class StockTransferLineSerializer(serializers.Serializer):
+    """Serializer for a single line of a batch stock transfer"""
+    material = serializers.IntegerField()
+    batch_number = serializers.CharField(
+        max_length=100, required=False, allow_null=True, default=None)
+    from_location = serializers.CharField(max_length=255)
+    to_location = serializers.CharField(max_length=255)
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    location_type = serializers.ChoiceField(
+        choices=MaterialStock.LOCATION_CHOICES, required=False)
+
+
+class BatchStockTransferSerializer(serializers.Serializer):
+    """Serializer for kitting/picking many stock lines in one request"""
+    lines = StockTransferLineSerializer(many=True, allow_empty=False)
+    all_or_nothing = serializers.BooleanField(default=True)
+
+
+class MaterialAvailabilitySerializer(serializers.Serializer):
+    """Read-only representation of a per-material availability summary"""
+    material_id = serializers.IntegerField()
+    on_hand_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    warehouse_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    shop_floor_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    buffer_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    reserved_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    available_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    expiring_quantity = serializers.DecimalField(
+        max_digits=15, decimal_places=4, required=False)
+
+
+class AvailabilityLookupSerializer(serializers.Serializer):
+    """Serializer for bulk availability lookups"""
+    materials = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=5000
+    )
+    expiring_days = serializers.IntegerField(required=False, min_value=0)
+
+
+class ShortageCheckSerializer(serializers.Serializer):
+    """Serializer for selecting orders for a shortage check"""
+    orders = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=True)
+    states = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_empty=False)
+
+
+class ReserveOrdersSerializer(serializers.Serializer):
+    """Serializer for reserving or releasing material for orders"""
+    orders = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False)
+    allow_partial = serializers.BooleanField(default=False)
+
+
+class ConsumptionLineSerializer(serializers.Serializer):
+    """Serializer for one consumed raw material batch"""
+    raw_material = serializers.IntegerField()
+    raw_material_batch = serializers.CharField(max_length=100)
+    quantity_used = serializers.DecimalField(
+        max_digits=15, decimal_places=4, min_value=0)
+
+
+class BulkConsumptionSerializer(serializers.Serializer):
+    """Serializer for recording many consumed batches for one finished good batch"""
+    finished_good = serializers.IntegerField()
+    finished_good_batch = serializers.CharField(max_length=100)
+    lines = ConsumptionLineSerializer(many=True, allow_empty=False)
+
+
+class ExpiryReportQuerySerializer(serializers.Serializer):
+    """Query parameters of the expiry report"""
+    as_of = serializers.DateField(required=False)
+    bucket = serializers.CharField(required=False)
+    refresh = serializers.BooleanField(default=False)
+
+
+class ExpiringMaterialSerializer(serializers.Serializer):
+    """Per-material totals inside an expiry bucket"""
+    material_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    batch_count = serializers.IntegerField()
+    earliest_expiry = serializers.DateField()
+
+
+class ExpiryBucketSerializer(serializers.Serializer):
+    """One days-to-expiry bucket of the expiry report"""
+    bucket = serializers.CharField()
+    min_days = serializers.IntegerField(allow_null=True)
+    max_days = serializers.IntegerField(allow_null=True)
+    quantity = serializers.DecimalField(max_digits=18, decimal_places=4)
+    batch_count = serializers.IntegerField()
+    material_count = serializers.IntegerField()
+    materials = ExpiringMaterialSerializer(many=True)
+
+
+class FefoPickQuerySerializer(serializers.Serializer):
+    """Query parameters of a FEFO batch selection"""
+    material = serializers.IntegerField()
+    quantity = serializers.DecimalField(
+        max_digits=15, decimal_places=4, min_value=0, required=False)
+    location_type = serializers.ChoiceField(
+        choices=MaterialStock.LOCATION_CHOICES, required=False)
+    include_expired = serializers.BooleanField(default=False)
+
+
+class FefoPickLineSerializer(serializers.Serializer):
+    """One batch in FEFO pick order"""
+    id = serializers.IntegerField()
+    batch_number = serializers.CharField(allow_null=True)
+    location_type = serializers.CharField()
+    location_name = serializers.CharField()
+    expiry_date = serializers.DateField(allow_null=True)
+    available_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+    pick_quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+
+
+class ContainerFillLineSerializer(serializers.Serializer):
+    """Serializer for filling one container"""
+    container_id = serializers.CharField(max_length=100)
+    material_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=4)
+
+
+class BulkContainerFillSerializer(serializers.Serializer):
+    """Serializer for filling many containers in one call"""
+    lines = ContainerFillLineSerializer(many=True, allow_empty=False)
+
+
+class BulkContainerSerializer(serializers.Serializer):
+    """Serializer for emptying, moving or nesting many containers in one call"""
+    containers = serializers.ListField(
+        child=serializers.CharField(max_length=100), allow_empty=False, max_length=5000)
+    location = serializers.CharField(max_length=255, required=False)
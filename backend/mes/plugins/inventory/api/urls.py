@@ -1,8 +1,12 @@
 from rest_framework.routers import DefaultRouter
-from .views import MaterialStockViewSet, ContainerViewSet, TraceabilityRecordViewSet, KanbanCardViewSet
+from .views import (
+    MaterialStockViewSet, MaterialReservationViewSet, ContainerViewSet,
+    TraceabilityRecordViewSet, KanbanCardViewSet
+)
 
 router = DefaultRouter()
 router.register(r'stock', MaterialStockViewSet)
+router.register(r'reservations', MaterialReservationViewSet)
 router.register(r'containers', ContainerViewSet)
 router.register(r'traceability', TraceabilityRecordViewSet)
 router.register(r'kanban', KanbanCardViewSet)
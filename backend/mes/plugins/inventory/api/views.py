@@ -1,43 +1,426 @@
-from rest_framework import viewsets, status
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..domain.models import MaterialStock, Container, TraceabilityRecord, KanbanCard
-from .serializers import MaterialStockSerializer, ContainerSerializer, TraceabilityRecordSerializer, KanbanCardSerializer
-from django.utils import timezone
+from django.db import transaction
+from core.base.exceptions import ValidationException
+from core.base.views import BaseViewSet, ReadOnlyBaseViewSet
+from ..application.services import (
+    StockService, ExpiryService, StockAvailabilityService, ReservationService, TraceabilityService,
+    ContainerService, KanbanService
+)
+from ..domain.models import MaterialStock, MaterialReservation, Container, TraceabilityRecord, KanbanCard
+from .serializers import (
+    MaterialStockSerializer, ContainerSerializer, TraceabilityRecordSerializer, KanbanCardSerializer,
+    BatchStockTransferSerializer, MaterialAvailabilitySerializer, AvailabilityLookupSerializer,
+    MaterialReservationSerializer, ShortageCheckSerializer, ReserveOrdersSerializer,
+    BulkConsumptionSerializer, ExpiryReportQuerySerializer, ExpiryBucketSerializer,
+    FefoPickQuerySerializer, FefoPickLineSerializer, BulkContainerFillSerializer,
+    BulkContainerSerializer
+)
 
 
-class MaterialStockViewSet(viewsets.ModelViewSet):
+class MaterialStockViewSet(BaseViewSet):
     queryset = MaterialStock.objects.all()
     serializer_class = MaterialStockSerializer
     filterset_fields = ['location_type', 'material']
 
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        StockAvailabilityService.refresh([instance.material_id])
+        KanbanService.stock_changed([(instance.material_id, instance.location_name)])
 
-class ContainerViewSet(viewsets.ModelViewSet):
-    queryset = Container.objects.all()
+    def perform_update(self, serializer):
+        previous = (serializer.instance.material_id, serializer.instance.location_name)
+        instance = serializer.save()
+        StockAvailabilityService.refresh({previous[0], instance.material_id})
+        KanbanService.stock_changed({previous, (instance.material_id, instance.location_name)})
+
+    def perform_destroy(self, instance):
+        key = (instance.material_id, instance.location_name)
+        instance.delete()
+        StockAvailabilityService.refresh([key[0]])
+        KanbanService.stock_changed([key])
+
+    @action(detail=False, methods=['get', 'post'])
+    def availability(self, request):
+        """Bulk availability lookup from the maintained per-material summary.
+        GET ?materials=1,2,3&expiring_days=30 or
+        POST {"materials": [<id>, ...], "expiring_days": 30}
+        """
+        if request.method == 'GET':
+            data = {
+                'materials': [
+                    m.strip() for m in request.query_params.get('materials', '').split(',')
+                    if m.strip()
+                ]
+            }
+            if request.query_params.get('expiring_days') is not None:
+                data['expiring_days'] = request.query_params.get('expiring_days')
+        else:
+            data = request.data
+
+        serializer = AvailabilityLookupSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        availability = StockAvailabilityService.get_availability(
+            serializer.validated_data['materials'],
+            expiring_days=serializer.validated_data.get('expiring_days')
+        )
+        ser = MaterialAvailabilitySerializer(list(availability.values()), many=True)
+        return Response({'items': ser.data, 'count': len(availability)})
+
+    @action(detail=False, methods=['get'])
+    def expiry(self, request):
+        """Stock bucketed by days-to-expiry from the cached expiry scan.
+        Query: ?as_of=YYYY-MM-DD&refresh=true
+        With ?bucket=<key> (e.g. "0-7") returns the stock rows of that bucket instead.
+        """
+        serializer = ExpiryReportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        if params.get('bucket'):
+            queryset = ExpiryService.get_bucket_stock(params['bucket'], params.get('as_of'))
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        report = ExpiryService.get_report(params.get('as_of'), refresh=params['refresh'])
+        return Response({
+            'as_of': report['as_of'],
+            'scanned_at': report['scanned_at'],
+            'buckets': ExpiryBucketSerializer(report['buckets'], many=True).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def fefo(self, request):
+        """FEFO pick order for a material across locations.
+        Query: ?material=<id>&quantity=10&location_type=warehouse&include_expired=false
+        """
+        serializer = FefoPickQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        result = ExpiryService.fefo_pick(
+            params['material'],
+            quantity=params.get('quantity'),
+            location_type=params.get('location_type'),
+            include_expired=params['include_expired']
+        )
+        return Response({
+            'material_id': result['material_id'],
+            'requested_quantity': (
+                str(result['requested_quantity'])
+                if result['requested_quantity'] is not None else None
+            ),
+            'shortage': str(result['shortage']),
+            'picks': FefoPickLineSerializer(result['picks'], many=True).data,
+        })
+
+    @action(detail=False, methods=['post'])
+    def batch_transfer(self, request):
+        """Move many stock lines (kitting/picking) in one transaction.
+        Body: {"lines": [{"material": <id>, "batch_number": "...", "from_location": "...",
+               "to_location": "...", "quantity": "..."}, ...], "all_or_nothing": true}
+        """
+        serializer = BatchStockTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        lines = [
+            {
+                'material_id': line['material'],
+                'batch_number': line.get('batch_number'),
+                'from_location': line['from_location'],
+                'to_location': line['to_location'],
+                'quantity': line['quantity'],
+                'location_type': line.get('location_type'),
+            }
+            for line in serializer.validated_data['lines']
+        ]
+        outcome = StockService.transfer_batch(
+            lines, all_or_nothing=serializer.validated_data['all_or_nothing']
+        )
+        for result in outcome['results']:
+            result['quantity'] = str(result['quantity'])
+            for field in ('from_quantity', 'to_quantity'):
+                if field in result:
+                    result[field] = str(result[field])
+
+        response_status = status.HTTP_200_OK if outcome['applied'] else status.HTTP_400_BAD_REQUEST
+        return Response(outcome, status=response_status)
+
+
+class MaterialReservationViewSet(ReadOnlyBaseViewSet):
+    queryset = MaterialReservation.objects.select_related('order', 'material')
+    serializer_class = MaterialReservationSerializer
+    filterset_fields = ['order', 'material', 'status']
+
+    @action(detail=False, methods=['get', 'post'])
+    def shortages(self, request):
+        """Check BOM material shortages for orders.
+        Body: {"orders": [<order_id>, ...]} or {"states": ["accepted"]};
+        defaults to all accepted orders.
+        """
+        serializer = ShortageCheckSerializer(data=request.data if request.method == 'POST' else {})
+        serializer.is_valid(raise_exception=True)
+        result = ReservationService.check_shortages(
+            order_ids=serializer.validated_data.get('orders'),
+            states=serializer.validated_data.get('states')
+        )
+
+        for order in result['orders']:
+            for line in order['shortages']:
+                for field in ('required', 'outstanding', 'shortage'):
+                    line[field] = str(line[field])
+        for line in result['materials']:
+            for field in ('required', 'outstanding', 'on_hand', 'reserved', 'available', 'shortage'):
+                line[field] = str(line[field])
+        return Response(result)
+
+    @action(detail=False, methods=['post'])
+    def reserve(self, request):
+        """Reserve outstanding BOM requirements for orders.
+        Body: {"orders": [<order_id>, ...], "allow_partial": false}
+        """
+        serializer = ReserveOrdersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = ReservationService.reserve_for_orders(
+            serializer.validated_data['orders'],
+            allow_partial=serializer.validated_data['allow_partial']
+        )
+        return Response(result)
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """Release all active reservations of orders.
+        Body: {"orders": [<order_id>, ...]}
+        """
+        serializer = ReserveOrdersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = ReservationService.release_for_orders(serializer.validated_data['orders'])
+        return Response({'status': 'success', 'released_count': released})
+
+
+class ContainerViewSet(BaseViewSet):
+    queryset = Container.objects.select_related('content_material')
     serializer_class = ContainerSerializer
+    filterset_fields = ['location', 'type', 'parent']
+
+    @action(detail=True, methods=['post'])
+    def fill(self, request, pk=None):
+        """Body: {"material_id": <id>, "quantity": "..."}"""
+        serializer = BulkContainerFillSerializer(data={
+            'lines': [{
+                'container_id': self.get_object().container_id,
+                'material_id': request.data.get('material_id'),
+                'quantity': request.data.get('quantity'),
+            }]
+        })
+        serializer.is_valid(raise_exception=True)
+        container = ContainerService.fill_containers(serializer.validated_data['lines'])[0]
+        return Response(self.get_serializer(container).data)
 
+    @action(detail=True, methods=['post'])
+    def empty(self, request, pk=None):
+        container = ContainerService.empty_container(self.get_object().container_id)
+        return Response(self.get_serializer(container).data)
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Move a container and everything nested in it. Body: {"location": "..."}"""
+        moved = ContainerService.move_containers(
+            [self.get_object().container_id], request.data.get('location')
+        )
+        return Response(self.get_serializer(moved[0]).data)
 
-class TraceabilityRecordViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'])
+    def nest(self, request, pk=None):
+        """Put containers into this one. Body: {"containers": ["TOTE-1", ...]}"""
+        serializer = BulkContainerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        nested = ContainerService.nest_containers(
+            self.get_object().container_id, serializer.validated_data['containers']
+        )
+        return Response({'nested': len(nested)})
+
+    @action(detail=False, methods=['post'])
+    def bulk_fill(self, request):
+        """Body: {"lines": [{"container_id": "...", "material_id": <id>, "quantity": "..."}, ...]}"""
+        serializer = BulkContainerFillSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filled = ContainerService.fill_containers(serializer.validated_data['lines'])
+        return Response({'filled': len(filled)})
+
+    @action(detail=False, methods=['post'])
+    def bulk_empty(self, request):
+        """Body: {"containers": ["TOTE-1", ...]}"""
+        serializer = BulkContainerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        emptied = ContainerService.empty_containers(serializer.validated_data['containers'])
+        return Response({'emptied': len(emptied)})
+
+    @action(detail=False, methods=['post'])
+    def bulk_move(self, request):
+        """Move containers and everything nested in them.
+        Body: {"containers": ["PAL-1", ...], "location": "..."}
+        """
+        serializer = BulkContainerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        moved = ContainerService.move_containers(
+            serializer.validated_data['containers'],
+            serializer.validated_data.get('location')
+        )
+        return Response({'moved': len(moved)})
+
+    @action(detail=False, methods=['get'])
+    def at_location(self, request):
+        """Containers at a location. Query: ?location=...&top_level_only=true"""
+        location = request.query_params.get('location')
+        if not location:
+            raise ValidationException('location query param required', field='location')
+        top_level_only = request.query_params.get('top_level_only', '').lower() in ('true', '1')
+        containers = ContainerService.get_by_location(location, top_level_only=top_level_only)
+        return Response(self.get_serializer(containers, many=True).data)
+
+
+class TraceabilityRecordViewSet(BaseViewSet):
     queryset = TraceabilityRecord.objects.all()
     serializer_class = TraceabilityRecordSerializer
     filterset_fields = ['finished_good_batch', 'raw_material_batch']
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            record = serializer.save()
+            TraceabilityService.extend_closure([(record.raw_material_batch, record.finished_good_batch)])
+
+    def perform_update(self, serializer):
+        old_edge = (serializer.instance.raw_material_batch, serializer.instance.finished_good_batch)
+        with transaction.atomic():
+            record = serializer.save()
+            new_edge = (record.raw_material_batch, record.finished_good_batch)
+            if new_edge != old_edge:
+                TraceabilityService.retract_closure([old_edge])
+                TraceabilityService.extend_closure([new_edge])
+
+    def perform_destroy(self, instance):
+        edge = (instance.raw_material_batch, instance.finished_good_batch)
+        with transaction.atomic():
+            instance.delete()
+            TraceabilityService.retract_closure([edge])
+
+    def _trace_params(self, request):
+        batch = request.query_params.get('batch')
+        if not batch:
+            raise ValidationException('batch query param required', field='batch')
+        max_depth = request.query_params.get('max_depth')
+        if max_depth is not None and (not max_depth.isdigit() or int(max_depth) < 1):
+            raise ValidationException('max_depth must be a positive integer', field='max_depth')
+        return batch, int(max_depth) if max_depth else None
+
+    @action(detail=False, methods=['get'])
+    def forward(self, request):
+        """Records downstream of a raw material batch. Query: ?batch=...&max_depth=N"""
+        batch, max_depth = self._trace_params(request)
+        records = TraceabilityService.trace_forward(batch, max_depth=max_depth)
+        return Response(self.get_serializer(records, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def backward(self, request):
+        """Records upstream of a finished good batch. Query: ?batch=...&max_depth=N"""
+        batch, max_depth = self._trace_params(request)
+        records = TraceabilityService.trace_backward(batch, max_depth=max_depth)
+        return Response(self.get_serializer(records, many=True).data)
 
-class KanbanCardViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def affected(self, request):
+        """All batches affected by a raw material batch (recall). Query: ?batch=..."""
+        batch, max_depth = self._trace_params(request)
+        batches = TraceabilityService.get_affected_batches(batch, max_depth=max_depth)
+        return Response({'batch': batch, 'affected_batches': batches, 'count': len(batches)})
+
+    @action(detail=False, methods=['get'])
+    def genealogy(self, request):
+        """Full multi-level genealogy tree of a finished good batch. Query: ?batch=..."""
+        batch, max_depth = self._trace_params(request)
+        return Response(TraceabilityService.get_genealogy(batch, max_depth=max_depth))
+
+    @action(detail=False, methods=['post'])
+    def bulk_consume(self, request):
+        """Record many consumed raw material batches for one finished good batch.
+        Body: {"finished_good": <id>, "finished_good_batch": "...",
+               "lines": [{"raw_material": <id>, "raw_material_batch": "...", "quantity_used": "..."}, ...]}
+        """
+        serializer = BulkConsumptionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        records = TraceabilityService.record_consumption_bulk(
+            data['finished_good'],
+            data['finished_good_batch'],
+            [
+                {
+                    'raw_material_id': line['raw_material'],
+                    'raw_material_batch': line['raw_material_batch'],
+                    'quantity_used': line['quantity_used'],
+                }
+                for line in data['lines']
+            ]
+        )
+        return Response(
+            self.get_serializer(records, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['post'])
+    def rebuild_closure(self, request):
+        """Rebuild the batch genealogy closure table from all records."""
+        count = TraceabilityService.rebuild_closure()
+        return Response({'status': 'success', 'closure_rows': count})
+
+
+class KanbanCardViewSet(BaseViewSet):
     queryset = KanbanCard.objects.all()
     serializer_class = KanbanCardSerializer
 
+    def perform_create(self, serializer):
+        card = serializer.save()
+        KanbanService.stock_changed([(card.material_id, card.location)])
+
+    def perform_update(self, serializer):
+        card = serializer.save()
+        KanbanService.stock_changed([(card.material_id, card.location)])
+
     @action(detail=True, methods=['post'])
     def trigger_replenishment(self, request, pk=None):
-        card = self.get_object()
-        card.status = 'replenishing'
-        card.save()
-        return Response({'status': 'replenishing'})
+        card = KanbanService.trigger_replenishment(self.get_object())
+        return Response({'status': card.status})
 
     @action(detail=True, methods=['post'])
     def complete_replenishment(self, request, pk=None):
-        card = self.get_object()
-        card.status = 'full'
-        card.last_replenished = timezone.now()
-        card.save()
-        return Response({'status': 'full'})
+        card = KanbanService.complete_replenishment(self.get_object())
+        return Response({'status': card.status})
+
+    @action(detail=True, methods=['post'])
+    def mark_empty(self, request, pk=None):
+        """Body: {"auto_trigger": true}"""
+        auto_trigger = request.data.get('auto_trigger', True)
+        if isinstance(auto_trigger, str):
+            auto_trigger = auto_trigger.lower() in ('true', '1', 'yes')
+        card = KanbanService.mark_empty(self.get_object(), auto_trigger=bool(auto_trigger))
+        return Response({'status': card.status})
+
+    @action(detail=False, methods=['post'])
+    def replenish(self, request):
+        """Run a replenishment cycle over all kanban cards.
+        Returns counts and the consolidated replenishment requests.
+        """
+        result = KanbanService.run_cycle()
+        for replenishment in result['requests']:
+            for line in replenishment['lines']:
+                line['quantity'] = str(line['quantity'])
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        return Response(KanbanService.stats())
@@ -1,5 +1,8 @@
 from .services import (
     StockService,
+    ExpiryService,
+    StockAvailabilityService,
+    ReservationService,
     ContainerService,
     TraceabilityService,
     KanbanService,
@@ -7,6 +10,9 @@ from .services import (
 
 __all__ = [
     'StockService',
+    'ExpiryService',
+    'StockAvailabilityService',
+    'ReservationService',
     'ContainerService',
     'TraceabilityService',
     'KanbanService',
@@ -4,14 +4,29 @@ Inventory Management Services.
 Business logic for stock management, container tracking, traceability,
 and kanban replenishment.
 """
-from decimal import Decimal
-from django.db import transaction
-from django.db.models import Sum, F, Q
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, ROUND_UP
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum, Count, Min, F, Q, Case, When, Value, CharField
 from django.utils import timezone
 
 from core.base.services import BaseService, StatefulService
 from core.base.exceptions import ValidationException, BusinessRuleException
-from ..domain.models import MaterialStock, Container, TraceabilityRecord, KanbanCard
+from core.utils.cache import LRUCache
+from ..domain.models import (
+    MaterialStock, MaterialAvailability, MaterialReservation,
+    Container, TraceabilityRecord, TraceabilityClosure, KanbanCard
+)
+from ..signals import replenishment_requested
+
+# MaterialStock quantity precision
+STOCK_QUANTUM = Decimal('0.0001')
+
+# Per-material availability summaries keyed by material id
+_availability_cache = LRUCache(maxsize=10000, timeout=settings.INVENTORY_AVAILABILITY_CACHE_TIMEOUT)
 
 
 class StockService(BaseService):
@@ -26,10 +41,8 @@ class StockService(BaseService):
     @classmethod
     def get_total_quantity(cls, material_id: int) -> Decimal:
         """Get total quantity of a material across all locations."""
-        result = cls.get_by_material(material_id).aggregate(
-            total=Sum('quantity')
-        )
-        return result['total'] or Decimal('0')
+        availability = StockAvailabilityService.get_availability([material_id])
+        return availability[material_id]['on_hand_quantity']
 
     @classmethod
     def get_by_location(cls, location_type: str = None, location_name: str = None):
@@ -73,6 +86,10 @@ class StockService(BaseService):
 
         stock.quantity = new_quantity
         stock.save(update_fields=['quantity', 'updated_at'])
+        StockAvailabilityService.apply_deltas({
+            (stock.material_id, stock.location_type): quantity_change
+        })
+        KanbanService.stock_changed([(stock.material_id, stock.location_name)])
         return stock
 
     @classmethod
@@ -104,6 +121,212 @@ class StockService(BaseService):
 
         return from_stock, to_stock
 
+    @classmethod
+    @transaction.atomic
+    def transfer_batch(cls, lines: list, all_or_nothing: bool = True) -> dict:
+        """
+        Transfer many stock lines (kitting/picking) in one transaction.
+
+        lines: list of {'material_id', 'batch_number', 'from_location',
+        'to_location', 'quantity', 'location_type' (optional)}
+
+        All affected stock rows are loaded with a single query and
+        validated in memory; missing destination rows are created with
+        bulk_create and changed rows are written with bulk_update.
+        When all_or_nothing is True, any failing line aborts the whole
+        batch and nothing is written.
+        """
+        keys = set()
+        for line in lines:
+            keys.add((line['material_id'], line['from_location'], line.get('batch_number')))
+            keys.add((line['material_id'], line['to_location'], line.get('batch_number')))
+
+        stocks = {}
+        if keys:
+            candidates = cls.model.objects.select_for_update().filter(
+                material_id__in={k[0] for k in keys},
+                location_name__in={k[1] for k in keys},
+            )
+            for stock in candidates:
+                key = (stock.material_id, stock.location_name, stock.batch_number)
+                if key in keys:
+                    stocks[key] = stock
+
+        results = []
+        created = {}
+        changed = {}
+        deltas = {}
+
+        for index, line in enumerate(lines):
+            material_id = line['material_id']
+            batch_number = line.get('batch_number')
+            quantity = Decimal(str(line['quantity']))
+            from_key = (material_id, line['from_location'], batch_number)
+            to_key = (material_id, line['to_location'], batch_number)
+
+            result = {
+                'index': index,
+                'material_id': material_id,
+                'batch_number': batch_number,
+                'from_location': line['from_location'],
+                'to_location': line['to_location'],
+                'quantity': quantity,
+            }
+
+            source = stocks.get(from_key)
+            error = None
+            if quantity <= 0:
+                error = 'Transfer quantity must be positive'
+            elif from_key == to_key:
+                error = 'Source and destination locations are the same'
+            elif source is None:
+                error = f"No stock at {line['from_location']}"
+            elif source.quantity < quantity:
+                error = (
+                    f'Insufficient stock at {line["from_location"]}. '
+                    f'Available: {source.quantity}, Requested: {quantity}'
+                )
+
+            if error:
+                result.update({'status': 'error', 'error': error})
+                results.append(result)
+                continue
+
+            destination = stocks.get(to_key)
+            if destination is None:
+                destination = cls.model(
+                    material_id=material_id,
+                    location_name=line['to_location'],
+                    location_type=line.get('location_type') or 'warehouse',
+                    batch_number=batch_number,
+                    expiry_date=source.expiry_date,
+                    quantity=Decimal('0'),
+                )
+                stocks[to_key] = destination
+                created[to_key] = destination
+
+            source.quantity -= quantity
+            destination.quantity += quantity
+            if from_key not in created:
+                changed[from_key] = source
+            if to_key not in created:
+                changed[to_key] = destination
+
+            for stock, change in ((source, -quantity), (destination, quantity)):
+                delta_key = (material_id, stock.location_type)
+                deltas[delta_key] = deltas.get(delta_key, Decimal('0')) + change
+
+            result.update({
+                'status': 'ok',
+                'from_quantity': source.quantity,
+                'to_quantity': destination.quantity,
+            })
+            results.append(result)
+
+        failed = sum(1 for r in results if r['status'] == 'error')
+        if failed and all_or_nothing:
+            return {'applied': False, 'failed': failed, 'results': results}
+
+        now = timezone.now()
+        if created:
+            cls.model.objects.bulk_create(list(created.values()))
+        if changed:
+            for stock in changed.values():
+                stock.updated_at = now
+            cls.model.objects.bulk_update(
+                list(changed.values()), ['quantity', 'updated_at']
+            )
+        if deltas:
+            StockAvailabilityService.apply_deltas(deltas)
+        KanbanService.stock_changed(
+            (material_id, location_name) for material_id, location_name, _ in changed.keys() | created.keys()
+        )
+
+        return {'applied': True, 'failed': failed, 'results': results}
+
+    @classmethod
+    def _pick_ordering(cls, strategy: str) -> list:
+        """Ordering that yields batches in pick sequence for a strategy."""
+        if strategy == 'fefo':
+            return [F('expiry_date').asc(nulls_last=True), 'created_at', 'id']
+        if strategy == 'fifo':
+            return ['created_at', 'id']
+        raise ValidationException(
+            "Strategy must be 'fefo' or 'fifo'",
+            field='strategy'
+        )
+
+    @classmethod
+    @transaction.atomic
+    def consume(
+        cls,
+        requirements: dict,
+        strategy: str = 'fefo',
+        location_type: str = None
+    ) -> list:
+        """
+        Consume materials from stock, picking batches FEFO or FIFO.
+
+        requirements: {material_id: quantity}
+
+        Loads all candidate stock rows in one query, allocates in memory
+        and writes the decremented rows with a single bulk_update.
+        Raises INSUFFICIENT_STOCK without writing anything if any
+        material cannot be fully covered.
+
+        Returns list of {'material_id', 'batch_number', 'location_name', 'quantity'}.
+        """
+        requirements = {m: q for m, q in requirements.items() if q > 0}
+        if not requirements:
+            return []
+
+        queryset = cls.model.objects.select_for_update().filter(
+            material_id__in=requirements.keys(), quantity__gt=0
+        )
+        if location_type:
+            queryset = queryset.filter(location_type=location_type)
+
+        candidates = defaultdict(list)
+        for stock in queryset.order_by(*cls._pick_ordering(strategy)):
+            candidates[stock.material_id].append(stock)
+
+        allocations = []
+        changed = []
+        deltas = defaultdict(Decimal)
+        shortages = []
+        for material_id, required in requirements.items():
+            remaining = required
+            for stock in candidates[material_id]:
+                if remaining <= 0:
+                    break
+                take = min(stock.quantity, remaining)
+                stock.quantity -= take
+                remaining -= take
+                changed.append(stock)
+                deltas[(material_id, stock.location_type)] -= take
+                allocations.append({
+                    'material_id': material_id,
+                    'batch_number': stock.batch_number,
+                    'location_name': stock.location_name,
+                    'quantity': take,
+                })
+            if remaining > 0:
+                shortages.append(f'material {material_id}: missing {remaining}')
+
+        if shortages:
+            raise BusinessRuleException(
+                'INSUFFICIENT_STOCK',
+                f"Cannot consume required materials ({'; '.join(shortages)})"
+            )
+
+        now = timezone.now()
+        for stock in changed:
+            stock.updated_at = now
+        cls.model.objects.bulk_update(changed, ['quantity', 'updated_at'])
+        StockAvailabilityService.apply_deltas(dict(deltas))
+        KanbanService.stock_changed((stock.material_id, stock.location_name) for stock in changed)
+        return allocations
+
     @classmethod
     def get_low_stock_items(cls, threshold_percentage: int = 20):
         """
@@ -126,8 +349,708 @@ class StockService(BaseService):
         ).order_by('expiry_date')
 
 
+class ExpiryService(BaseService):
+    """
+    Service for stock expiry reporting and FEFO batch selection.
+
+    The scanner buckets all stock with an expiry date by days-to-expiry in
+    one grouped query over the (expiry_date, material) index and caches the
+    result per day. Run it from the scan_expiring_stock management command
+    to keep the cache warm; a miss rescans in-process.
+    """
+    model = MaterialStock
+    CACHE_KEY = 'inventory:expiry_scan:{as_of}'
+
+    @classmethod
+    def get_buckets(cls, bucket_days=None) -> list:
+        """
+        Bucket definitions as (key, min_days, max_days), max_days inclusive.
+
+        Boundaries come from settings.EXPIRY_BUCKET_DAYS, e.g. [7, 30, 90]
+        gives expired, 0-7, 8-30, 31-90 and 91+.
+        """
+        bucket_days = sorted(bucket_days or settings.EXPIRY_BUCKET_DAYS)
+        buckets = [('expired', None, -1)]
+        lower = 0
+        for upper in bucket_days:
+            buckets.append((f'{lower}-{upper}', lower, upper))
+            lower = upper + 1
+        buckets.append((f'{lower}+', lower, None))
+        return buckets
+
+    @classmethod
+    def _bucket_expression(cls, as_of, buckets):
+        whens = [
+            When(expiry_date__lte=as_of + timedelta(days=max_days), then=Value(key))
+            for key, _, max_days in buckets
+            if max_days is not None
+        ]
+        return Case(*whens, default=Value(buckets[-1][0]), output_field=CharField())
+
+    @classmethod
+    def scan(cls, as_of=None) -> dict:
+        """
+        Bucket stock with an expiry date by days-to-expiry and cache the result.
+
+        Returns {'as_of', 'scanned_at', 'buckets': [{'bucket', 'min_days',
+        'max_days', 'quantity', 'batch_count', 'material_count', 'materials'}]}
+        where materials lists {material_id, quantity, batch_count,
+        earliest_expiry} per material in the bucket.
+        """
+        as_of = as_of or timezone.now().date()
+        buckets = cls.get_buckets()
+
+        rows = cls.get_queryset().filter(
+            expiry_date__isnull=False,
+            quantity__gt=0
+        ).annotate(
+            bucket=cls._bucket_expression(as_of, buckets)
+        ).values('bucket', 'material_id').annotate(
+            quantity=Sum('quantity'),
+            batch_count=Count('id'),
+            earliest_expiry=Min('expiry_date')
+        ).order_by()
+
+        by_bucket = {
+            key: {
+                'bucket': key,
+                'min_days': min_days,
+                'max_days': max_days,
+                'quantity': Decimal('0'),
+                'batch_count': 0,
+                'material_count': 0,
+                'materials': [],
+            }
+            for key, min_days, max_days in buckets
+        }
+        for row in rows:
+            entry = by_bucket[row['bucket']]
+            entry['quantity'] += row['quantity']
+            entry['batch_count'] += row['batch_count']
+            entry['material_count'] += 1
+            entry['materials'].append({
+                'material_id': row['material_id'],
+                'quantity': row['quantity'],
+                'batch_count': row['batch_count'],
+                'earliest_expiry': row['earliest_expiry'],
+            })
+        for entry in by_bucket.values():
+            entry['materials'].sort(key=lambda m: (m['earliest_expiry'], m['material_id']))
+
+        report = {
+            'as_of': as_of,
+            'scanned_at': timezone.now(),
+            'buckets': [by_bucket[key] for key, _, _ in buckets],
+        }
+        cache.set(
+            cls.CACHE_KEY.format(as_of=as_of.isoformat()),
+            report,
+            settings.EXPIRY_SCAN_CACHE_TIMEOUT
+        )
+        return report
+
+    @classmethod
+    def get_report(cls, as_of=None, refresh: bool = False) -> dict:
+        """Cached expiry buckets for a day, scanning on a miss or when refresh is set."""
+        as_of = as_of or timezone.now().date()
+        if not refresh:
+            report = cache.get(cls.CACHE_KEY.format(as_of=as_of.isoformat()))
+            if report is not None:
+                return report
+        return cls.scan(as_of)
+
+    @classmethod
+    def get_bucket_stock(cls, bucket: str, as_of=None):
+        """Stock rows of one bucket in expiry order, as an indexed range query."""
+        as_of = as_of or timezone.now().date()
+        for key, min_days, max_days in cls.get_buckets():
+            if key == bucket:
+                break
+        else:
+            raise ValidationException(f"Unknown expiry bucket '{bucket}'", field='bucket')
+
+        queryset = cls.get_queryset().filter(expiry_date__isnull=False, quantity__gt=0)
+        if min_days is not None:
+            queryset = queryset.filter(expiry_date__gte=as_of + timedelta(days=min_days))
+        if max_days is not None:
+            queryset = queryset.filter(expiry_date__lte=as_of + timedelta(days=max_days))
+        return queryset.select_related('material').order_by('expiry_date', 'material_id')
+
+    @classmethod
+    def fefo_pick(
+        cls,
+        material_id: int,
+        quantity: Decimal = None,
+        location_type: str = None,
+        include_expired: bool = False
+    ) -> dict:
+        """
+        FEFO pick order for a material across all locations.
+
+        Batches come back earliest expiry first (undated stock last) from one
+        query over the (material, expiry_date) index. With quantity, the list
+        stops once the requested quantity is covered and each line carries
+        the quantity to pick from it.
+        """
+        queryset = cls.get_queryset().filter(material_id=material_id, quantity__gt=0)
+        if location_type:
+            queryset = queryset.filter(location_type=location_type)
+        if not include_expired:
+            queryset = queryset.filter(
+                Q(expiry_date__isnull=True) | Q(expiry_date__gte=timezone.now().date())
+            )
+
+        picks = []
+        remaining = quantity
+        for stock in queryset.order_by(*StockService._pick_ordering('fefo')):
+            if remaining is not None and remaining <= 0:
+                break
+            pick_quantity = stock.quantity if remaining is None else min(stock.quantity, remaining)
+            picks.append({
+                'id': stock.id,
+                'batch_number': stock.batch_number,
+                'location_type': stock.location_type,
+                'location_name': stock.location_name,
+                'expiry_date': stock.expiry_date,
+                'available_quantity': stock.quantity,
+                'pick_quantity': pick_quantity,
+            })
+            if remaining is not None:
+                remaining -= pick_quantity
+
+        shortage = remaining if remaining is not None and remaining > 0 else Decimal('0')
+        return {
+            'material_id': material_id,
+            'requested_quantity': quantity,
+            'shortage': shortage,
+            'picks': picks,
+        }
+
+
+class StockAvailabilityService(BaseService):
+    """
+    Service for the maintained per-material availability summary.
+
+    Summaries are updated incrementally by stock movements, materialized
+    lazily for materials that have none yet, and served from an in-process
+    LRU cache that is invalidated whenever a summary is written and expires
+    after INVENTORY_AVAILABILITY_CACHE_TIMEOUT for writes of other workers.
+    """
+    model = MaterialAvailability
+
+    @classmethod
+    def _to_dict(cls, summary: MaterialAvailability) -> dict:
+        return {
+            'material_id': summary.material_id,
+            'on_hand_quantity': summary.on_hand_quantity,
+            'warehouse_quantity': summary.warehouse_quantity,
+            'shop_floor_quantity': summary.shop_floor_quantity,
+            'buffer_quantity': summary.buffer_quantity,
+            'reserved_quantity': summary.reserved_quantity,
+            'available_quantity': summary.available_quantity,
+        }
+
+    @classmethod
+    def _invalidate(cls, material_ids):
+        """Drop cached summaries now and again once the write commits."""
+        material_ids = list(material_ids)
+        _availability_cache.delete_many(material_ids)
+        transaction.on_commit(lambda: _availability_cache.delete_many(material_ids))
+
+    @classmethod
+    def _compute(cls, material_ids) -> dict:
+        """Aggregate MaterialStock into unsaved summaries in one query."""
+        summaries = {
+            material_id: cls.model(material_id=material_id)
+            for material_id in material_ids
+        }
+        rows = MaterialStock.objects.filter(
+            material_id__in=summaries.keys()
+        ).values('material_id', 'location_type').annotate(total=Sum('quantity'))
+
+        for row in rows:
+            summary = summaries[row['material_id']]
+            total = row['total'] or Decimal('0')
+            summary.on_hand_quantity += total
+            field = cls.model.LOCATION_TYPE_FIELDS.get(row['location_type'])
+            if field:
+                setattr(summary, field, getattr(summary, field) + total)
+
+        reserved = MaterialReservation.objects.filter(
+            material_id__in=summaries.keys(), status='active'
+        ).values('material_id').annotate(total=Sum('quantity'))
+        for row in reserved:
+            summaries[row['material_id']].reserved_quantity = row['total'] or Decimal('0')
+
+        return summaries
+
+    @classmethod
+    @transaction.atomic
+    def apply_deltas(cls, deltas: dict) -> None:
+        """
+        Apply stock movements to the summaries.
+
+        deltas: {(material_id, location_type): quantity_change}
+
+        Must be called after the MaterialStock rows have been written:
+        materials without a summary are materialized from current stock,
+        which already includes the movement.
+        """
+        material_ids = {material_id for material_id, _ in deltas}
+        summaries = {
+            summary.material_id: summary
+            for summary in cls.model.objects.select_for_update().filter(
+                material_id__in=material_ids
+            )
+        }
+
+        missing = material_ids - summaries.keys()
+        if missing:
+            cls.refresh(missing)
+
+        now = timezone.now()
+        for (material_id, location_type), change in deltas.items():
+            summary = summaries.get(material_id)
+            if summary is None:
+                continue
+            summary.on_hand_quantity += change
+            field = cls.model.LOCATION_TYPE_FIELDS.get(location_type)
+            if field:
+                setattr(summary, field, getattr(summary, field) + change)
+            summary.updated_at = now
+
+        if summaries:
+            cls.model.objects.bulk_update(
+                list(summaries.values()),
+                ['on_hand_quantity', *cls.model.LOCATION_TYPE_FIELDS.values(), 'updated_at']
+            )
+        cls._invalidate(material_ids)
+
+    @classmethod
+    @transaction.atomic
+    def refresh(cls, material_ids) -> int:
+        """
+        Recompute summaries from stock and active reservations.
+
+        Missing summaries are inserted first and all rows are locked before
+        stock is aggregated, so a concurrent first movement of a material
+        either waits for the lock or is already visible to the aggregate.
+        """
+        material_ids = set(material_ids)
+        if not material_ids:
+            return 0
+
+        present = set(
+            cls.model.objects.filter(material_id__in=material_ids).values_list('material_id', flat=True)
+        )
+        cls.model.objects.bulk_create(
+            [cls.model(material_id=m) for m in material_ids - present],
+            ignore_conflicts=True
+        )
+        existing = {
+            summary.material_id: summary
+            for summary in cls.model.objects.select_for_update().filter(
+                material_id__in=material_ids
+            )
+        }
+        computed = cls._compute(material_ids)
+
+        fields = [
+            'on_hand_quantity', *cls.model.LOCATION_TYPE_FIELDS.values(), 'reserved_quantity'
+        ]
+        now = timezone.now()
+        for material_id, summary in existing.items():
+            for field in fields:
+                setattr(summary, field, getattr(computed[material_id], field))
+            summary.updated_at = now
+
+        cls.model.objects.bulk_update(list(existing.values()), fields + ['updated_at'])
+        cls._invalidate(material_ids)
+        return len(material_ids)
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Recompute summaries for every material that has stock or a summary."""
+        material_ids = set(
+            MaterialStock.objects.values_list('material_id', flat=True).distinct()
+        )
+        material_ids.update(cls.model.objects.values_list('material_id', flat=True))
+        return cls.refresh(material_ids)
+
+    @classmethod
+    def get_availability(cls, material_ids, expiring_days: int = None) -> dict:
+        """
+        Bulk availability lookup.
+
+        Returns {material_id: summary dict}. Cached summaries are served
+        from memory; the rest are loaded in one query and materialized
+        on first use. When expiring_days is given, quantities expiring
+        within that many days (not yet expired) are added with one grouped query.
+        """
+        material_ids = list(dict.fromkeys(material_ids))
+        result = {
+            material_id: dict(summary)
+            for material_id, summary in _availability_cache.get_many(material_ids).items()
+        }
+
+        misses = [m for m in material_ids if m not in result]
+        if misses:
+            loaded = {
+                summary.material_id: cls._to_dict(summary)
+                for summary in cls.model.objects.filter(material_id__in=misses)
+            }
+            unmaterialized = set(misses) - loaded.keys()
+            if unmaterialized:
+                cls.refresh(unmaterialized)
+                loaded.update({
+                    summary.material_id: cls._to_dict(summary)
+                    for summary in cls.model.objects.filter(material_id__in=unmaterialized)
+                })
+            _availability_cache.set_many(loaded)
+            result.update({m: dict(summary) for m, summary in loaded.items()})
+
+        if expiring_days is not None:
+            today = timezone.now().date()
+            cutoff = today + timedelta(days=expiring_days)
+            # Already expired stock is not "expiring"
+            expiring = dict(
+                MaterialStock.objects.filter(
+                    material_id__in=material_ids,
+                    expiry_date__gte=today,
+                    expiry_date__lte=cutoff,
+                ).values('material_id').annotate(
+                    total=Sum('quantity')
+                ).values_list('material_id', 'total')
+            )
+            for material_id, summary in result.items():
+                summary['expiring_quantity'] = expiring.get(material_id) or Decimal('0')
+
+        return result
+
+
+class ReservationService(BaseService):
+    """
+    Service for reserving stock against order BOM requirements.
+
+    Requirements come from exploding each order's technology for its
+    planned quantity; they are compared against the availability summary
+    (on hand minus reserved) and reservations are written atomically.
+    """
+    model = MaterialReservation
+    DEFAULT_ORDER_STATES = ('accepted',)
+
+    @classmethod
+    def _load_orders(cls, order_ids=None, states=None) -> list:
+        """Load orders with a technology, in allocation priority order."""
+        from mes.plugins.orders.domain.models import Order
+
+        queryset = Order.objects.filter(technology__isnull=False)
+        if order_ids:
+            queryset = queryset.filter(id__in=order_ids)
+        else:
+            queryset = queryset.filter(state__in=states or cls.DEFAULT_ORDER_STATES)
+
+        return list(
+            queryset.order_by(F('deadline').asc(nulls_last=True), 'created_at', 'id')
+            .values('id', 'number', 'technology_id', 'planned_quantity')
+        )
+
+    @classmethod
+    def get_order_requirements(cls, orders: list) -> dict:
+        """
+        Material requirements per order.
+
+        Each technology is exploded once per unit and scaled by every
+        order's planned quantity, rounded up to stock precision. Returns {order_id: {material_id: Decimal}}.
+        """
+        from mes.plugins.routing.application.services import TechnologyService
+
+        unit_requirements = TechnologyService.get_unit_requirements(
+            {order['technology_id'] for order in orders}
+        )
+        return {
+            order['id']: {
+                material_id: (quantity * order['planned_quantity']).quantize(
+                    STOCK_QUANTUM, rounding=ROUND_UP
+                )
+                for material_id, quantity in unit_requirements.get(order['technology_id'], {}).items()
+            }
+            for order in orders
+        }
+
+    @classmethod
+    def check_shortages(cls, order_ids: list = None, states: list = None) -> dict:
+        """
+        Check material shortages for many orders in one pass.
+
+        Outstanding requirements (BOM need minus what the order already
+        has reserved) are allocated against available stock in order
+        priority (deadline, then creation) to find which orders are short.
+        """
+        orders = cls._load_orders(order_ids, states)
+        requirements = cls.get_order_requirements(orders)
+
+        own_reserved = defaultdict(Decimal)
+        for order_id, material_id, quantity in cls.get_queryset().filter(
+            order_id__in=requirements.keys(), status='active'
+        ).values_list('order_id', 'material_id', 'quantity'):
+            own_reserved[(order_id, material_id)] += quantity
+
+        material_ids = {m for needs in requirements.values() for m in needs}
+        availability = StockAvailabilityService.get_availability(material_ids)
+        remaining = {
+            material_id: summary['available_quantity']
+            for material_id, summary in availability.items()
+        }
+
+        totals = {
+            material_id: {'required': Decimal('0'), 'outstanding': Decimal('0'), 'shortage': Decimal('0')}
+            for material_id in material_ids
+        }
+        order_results = []
+        for order in orders:
+            shortages = []
+            for material_id, required in requirements[order['id']].items():
+                outstanding = max(required - own_reserved[(order['id'], material_id)], Decimal('0'))
+                totals[material_id]['required'] += required
+                totals[material_id]['outstanding'] += outstanding
+                if outstanding <= 0:
+                    continue
+
+                covered = min(max(remaining[material_id], Decimal('0')), outstanding)
+                remaining[material_id] -= outstanding
+                if covered < outstanding:
+                    missing = outstanding - covered
+                    totals[material_id]['shortage'] += missing
+                    shortages.append({
+                        'material_id': material_id,
+                        'required': required,
+                        'outstanding': outstanding,
+                        'shortage': missing,
+                    })
+
+            order_results.append({
+                'order_id': order['id'],
+                'order_number': order['number'],
+                'short': bool(shortages),
+                'shortages': shortages,
+            })
+
+        material_results = [
+            {
+                'material_id': material_id,
+                'required': total['required'],
+                'outstanding': total['outstanding'],
+                'on_hand': availability[material_id]['on_hand_quantity'],
+                'reserved': availability[material_id]['reserved_quantity'],
+                'available': availability[material_id]['available_quantity'],
+                'shortage': total['shortage'],
+            }
+            for material_id, total in totals.items()
+        ]
+
+        return {
+            'order_count': len(orders),
+            'short_order_count': sum(1 for o in order_results if o['short']),
+            'orders': order_results,
+            'materials': material_results,
+        }
+
+    @classmethod
+    @transaction.atomic
+    def reserve_for_orders(cls, order_ids: list, allow_partial: bool = False) -> dict:
+        """
+        Reserve outstanding BOM requirements for orders atomically.
+
+        Availability summaries are locked while allocating. Without
+        allow_partial an order is only reserved when every material it
+        needs is fully available; otherwise whatever is available is taken.
+        """
+        orders = cls._load_orders(order_ids)
+        requirements = cls.get_order_requirements(orders)
+        material_ids = {m for needs in requirements.values() for m in needs}
+
+        # Materialize missing summaries before locking them
+        StockAvailabilityService.get_availability(material_ids)
+        summaries = {
+            summary.material_id: summary
+            for summary in MaterialAvailability.objects.select_for_update().filter(
+                material_id__in=material_ids
+            )
+        }
+        existing = {
+            (reservation.order_id, reservation.material_id): reservation
+            for reservation in cls.model.objects.select_for_update().filter(
+                order_id__in=requirements.keys()
+            )
+        }
+
+        to_create = []
+        to_update = {}
+        now = timezone.now()
+        results = []
+
+        for order in orders:
+            needs = {}
+            for material_id, required in requirements[order['id']].items():
+                reservation = existing.get((order['id'], material_id))
+                held = reservation.quantity if reservation and reservation.status == 'active' else Decimal('0')
+                if required > held:
+                    needs[material_id] = required - held
+
+            if not allow_partial and any(
+                summaries[m].available_quantity < need for m, need in needs.items()
+            ):
+                results.append({'order_id': order['id'], 'order_number': order['number'], 'status': 'short'})
+                continue
+
+            reserved_lines = 0
+            short = False
+            for material_id, need in needs.items():
+                summary = summaries[material_id]
+                take = min(need, max(summary.available_quantity, Decimal('0')))
+                if take < need:
+                    short = True
+                if take <= 0:
+                    continue
+
+                reservation = existing.get((order['id'], material_id))
+                if reservation is None:
+                    reservation = cls.model(
+                        order_id=order['id'], material_id=material_id, quantity=take
+                    )
+                    existing[(order['id'], material_id)] = reservation
+                    to_create.append(reservation)
+                else:
+                    if reservation.status != 'active':
+                        reservation.quantity = Decimal('0')
+                        reservation.status = 'active'
+                    reservation.quantity += take
+                    reservation.updated_at = now
+                    to_update[reservation.id] = reservation
+
+                summary.reserved_quantity += take
+                summary.updated_at = now
+                reserved_lines += 1
+
+            results.append({
+                'order_id': order['id'],
+                'order_number': order['number'],
+                'status': 'partial' if short else 'reserved',
+                'reserved_lines': reserved_lines,
+            })
+
+        if to_create:
+            cls.model.objects.bulk_create(to_create)
+        if to_update:
+            cls.model.objects.bulk_update(
+                list(to_update.values()), ['quantity', 'status', 'updated_at']
+            )
+        if summaries:
+            MaterialAvailability.objects.bulk_update(
+                list(summaries.values()), ['reserved_quantity', 'updated_at']
+            )
+            StockAvailabilityService._invalidate(summaries.keys())
+
+        return {
+            'reserved_count': sum(1 for r in results if r['status'] == 'reserved'),
+            'results': results,
+        }
+
+    @classmethod
+    @transaction.atomic
+    def consume_for_order(cls, order_id: int, consumed: dict) -> int:
+        """
+        Draw down an order's active reservations by consumed quantities.
+
+        consumed: {material_id: quantity}. Reservations reaching zero are
+        marked consumed. Returns the number of reservations touched.
+        """
+        reservations = list(
+            cls.model.objects.select_for_update().filter(
+                order_id=order_id, material_id__in=consumed.keys(), status='active'
+            )
+        )
+        if not reservations:
+            return 0
+
+        now = timezone.now()
+        drawn = {}
+        for reservation in reservations:
+            take = min(reservation.quantity, consumed[reservation.material_id])
+            drawn[reservation.material_id] = take
+            reservation.quantity -= take
+            if reservation.quantity <= 0:
+                reservation.status = 'consumed'
+            reservation.updated_at = now
+        cls.model.objects.bulk_update(reservations, ['quantity', 'status', 'updated_at'])
+
+        summaries = list(
+            MaterialAvailability.objects.select_for_update().filter(
+                material_id__in=drawn.keys()
+            )
+        )
+        for summary in summaries:
+            summary.reserved_quantity = max(
+                summary.reserved_quantity - drawn[summary.material_id], Decimal('0')
+            )
+            summary.updated_at = now
+        MaterialAvailability.objects.bulk_update(summaries, ['reserved_quantity', 'updated_at'])
+        StockAvailabilityService._invalidate(drawn.keys())
+
+        return len(reservations)
+
+    @classmethod
+    @transaction.atomic
+    def release_for_orders(cls, order_ids: list, status: str = 'released') -> int:
+        """Release (or mark consumed) all active reservations of orders."""
+        if status not in ('released', 'consumed'):
+            raise ValidationException(
+                "Status must be 'released' or 'consumed'",
+                field='status'
+            )
+
+        reservations = list(
+            cls.model.objects.select_for_update().filter(
+                order_id__in=order_ids, status='active'
+            )
+        )
+        if not reservations:
+            return 0
+
+        released = defaultdict(Decimal)
+        now = timezone.now()
+        for reservation in reservations:
+            released[reservation.material_id] += reservation.quantity
+            reservation.status = status
+            reservation.updated_at = now
+        cls.model.objects.bulk_update(reservations, ['status', 'updated_at'])
+
+        summaries = list(
+            MaterialAvailability.objects.select_for_update().filter(
+                material_id__in=released.keys()
+            )
+        )
+        for summary in summaries:
+            summary.reserved_quantity = max(
+                summary.reserved_quantity - released[summary.material_id], Decimal('0')
+            )
+            summary.updated_at = now
+        MaterialAvailability.objects.bulk_update(summaries, ['reserved_quantity', 'updated_at'])
+        StockAvailabilityService._invalidate(released.keys())
+
+        return len(reservations)
+
+
 class ContainerService(BaseService):
-    """Service for managing containers and their contents."""
+    """
+    Service for managing containers and their contents.
+
+    Bulk operations load all containers with one locked query, validate in
+    memory and write with a single bulk_update. Nested containers carry the
+    location of their outermost parent, so moving a pallet moves everything
+    on it.
+    """
     model = Container
 
     @classmethod
@@ -136,9 +1059,12 @@ class ContainerService(BaseService):
         return cls.get_queryset().filter(container_id=container_id).first()
 
     @classmethod
-    def get_by_location(cls, location: str):
-        """Get all containers at a location."""
-        return cls.get_queryset().filter(location=location)
+    def get_by_location(cls, location: str, top_level_only: bool = False):
+        """Get all containers at a location (indexed lookup)."""
+        queryset = cls.get_queryset().filter(location=location)
+        if top_level_only:
+            queryset = queryset.filter(parent__isnull=True)
+        return queryset
 
     @classmethod
     def get_by_material(cls, material_id: int):
@@ -146,67 +1072,204 @@ class ContainerService(BaseService):
         return cls.get_queryset().filter(content_material_id=material_id)
 
     @classmethod
-    @transaction.atomic
-    def fill_container(
-        cls,
-        container_id: str,
-        material_id: int,
-        quantity: Decimal
-    ) -> Container:
-        """Fill a container with material."""
-        container = cls.get_by_id(container_id)
-        if not container:
+    def _load(cls, container_ids) -> dict:
+        """Lock and load containers by container_id, failing on unknown IDs."""
+        container_ids = list(dict.fromkeys(container_ids))
+        containers = {
+            container.container_id: container
+            for container in cls.model.objects.select_for_update().filter(
+                container_id__in=container_ids
+            )
+        }
+        missing = [cid for cid in container_ids if cid not in containers]
+        if missing:
             raise ValidationException(
-                f'Container {container_id} not found',
+                f"Containers not found: {', '.join(missing)}",
                 field='container_id'
             )
+        return containers
 
-        if container.content_material_id and container.content_quantity > 0:
+    @classmethod
+    def _descendants(cls, containers) -> list:
+        """All containers nested in the given ones, one query per nesting level."""
+        seen = {c.pk for c in containers}
+        level = list(seen)
+        descendants = []
+        while level:
+            children = [
+                child for child in cls.model.objects.select_for_update().filter(
+                    parent_id__in=level
+                )
+                if child.pk not in seen
+            ]
+            seen.update(child.pk for child in children)
+            descendants.extend(children)
+            level = [child.pk for child in children]
+        return descendants
+
+    @classmethod
+    @transaction.atomic
+    def fill_containers(cls, lines: list) -> list:
+        """
+        Fill many containers in one call.
+
+        lines: list of {'container_id', 'material_id', 'quantity'}
+        All lines are validated before anything is written.
+        """
+        containers = cls._load(line['container_id'] for line in lines)
+
+        errors = []
+        for line in lines:
+            container = containers[line['container_id']]
+            if line['quantity'] <= 0:
+                errors.append(f"{line['container_id']}: quantity must be positive")
+            elif container.content_material_id and container.content_quantity > 0:
+                errors.append(f"{line['container_id']}: already contains material")
+        if errors:
             raise BusinessRuleException(
                 'CONTAINER_NOT_EMPTY',
-                f'Container {container_id} already contains material'
+                f"Cannot fill containers ({'; '.join(errors)})"
             )
 
-        container.content_material_id = material_id
-        container.content_quantity = quantity
-        container.save(update_fields=['content_material_id', 'content_quantity', 'updated_at'])
-        return container
+        now = timezone.now()
+        for line in lines:
+            container = containers[line['container_id']]
+            container.content_material_id = line['material_id']
+            container.content_quantity = line['quantity']
+            container.updated_at = now
+        filled = [containers[cid] for cid in dict.fromkeys(line['container_id'] for line in lines)]
+        cls.model.objects.bulk_update(
+            filled, ['content_material', 'content_quantity', 'updated_at']
+        )
+        return filled
+
+    @classmethod
+    @transaction.atomic
+    def empty_containers(cls, container_ids: list) -> list:
+        """Empty many containers in one call."""
+        loaded = cls._load(container_ids)
+        containers = [loaded[cid] for cid in dict.fromkeys(container_ids)]
+        now = timezone.now()
+        for container in containers:
+            container.content_material_id = None
+            container.content_quantity = Decimal('0')
+            container.updated_at = now
+        cls.model.objects.bulk_update(
+            containers, ['content_material', 'content_quantity', 'updated_at']
+        )
+        return containers
+
+    @classmethod
+    @transaction.atomic
+    def move_containers(cls, container_ids: list, new_location: str) -> list:
+        """
+        Move many containers and everything nested in them to a location.
+
+        Returns the moved containers including the nested ones.
+        """
+        if not new_location:
+            raise ValidationException('Location is required', field='location')
+
+        loaded = cls._load(container_ids)
+        containers = [loaded[cid] for cid in dict.fromkeys(container_ids)]
+        moved_pks = {c.pk for c in containers}
+
+        # A container moved without its parent is taken off that parent
+        for container in containers:
+            if container.parent_id not in moved_pks:
+                container.parent_id = None
+
+        now = timezone.now()
+        moved = containers + cls._descendants(containers)
+        for container in moved:
+            container.location = new_location
+            container.updated_at = now
+        cls.model.objects.bulk_update(moved, ['location', 'parent', 'updated_at'])
+        return moved
+
+    @classmethod
+    @transaction.atomic
+    def nest_containers(cls, parent_id: str, child_ids: list) -> list:
+        """
+        Put containers into a parent container (e.g. totes onto a pallet).
+
+        Children and everything nested in them take the parent's location.
+        """
+        containers = cls._load([parent_id, *child_ids])
+        parent = containers[parent_id]
+        children = [containers[cid] for cid in dict.fromkeys(child_ids)]
+
+        # Walk up from the parent: neither it nor its ancestors may be a child
+        child_pks = {child.pk for child in children}
+        ancestor_id, next_id = parent.pk, parent.parent_id
+        seen = set()
+        while ancestor_id and ancestor_id not in seen:
+            if ancestor_id in child_pks:
+                raise BusinessRuleException(
+                    'CONTAINER_CYCLE',
+                    f'Container {parent_id} cannot be nested inside itself'
+                )
+            seen.add(ancestor_id)
+            ancestor_id = next_id
+            next_id = cls.model.objects.filter(pk=ancestor_id).values_list(
+                'parent_id', flat=True
+            ).first() if ancestor_id else None
+
+        now = timezone.now()
+        for child in children:
+            child.parent_id = parent.pk
+        nested = children + cls._descendants(children)
+        for container in nested:
+            container.location = parent.location
+            container.updated_at = now
+        cls.model.objects.bulk_update(nested, ['location', 'parent', 'updated_at'])
+        return nested
+
+    @classmethod
+    @transaction.atomic
+    def fill_container(
+        cls,
+        container_id: str,
+        material_id: int,
+        quantity: Decimal
+    ) -> Container:
+        """Fill a container with material."""
+        return cls.fill_containers([{
+            'container_id': container_id,
+            'material_id': material_id,
+            'quantity': quantity,
+        }])[0]
 
     @classmethod
     @transaction.atomic
     def empty_container(cls, container_id: str) -> Container:
         """Empty a container."""
-        container = cls.get_by_id(container_id)
-        if not container:
-            raise ValidationException(
-                f'Container {container_id} not found',
-                field='container_id'
-            )
-
-        container.content_material_id = None
-        container.content_quantity = Decimal('0')
-        container.save(update_fields=['content_material_id', 'content_quantity', 'updated_at'])
-        return container
+        return cls.empty_containers([container_id])[0]
 
     @classmethod
     @transaction.atomic
     def move_container(cls, container_id: str, new_location: str) -> Container:
-        """Move a container to a new location."""
-        container = cls.get_by_id(container_id)
-        if not container:
-            raise ValidationException(
-                f'Container {container_id} not found',
-                field='container_id'
-            )
-
-        container.location = new_location
-        container.save(update_fields=['location', 'updated_at'])
-        return container
+        """Move a container (and anything nested in it) to a new location."""
+        return cls.move_containers([container_id], new_location)[0]
 
 
 class TraceabilityService(BaseService):
-    """Service for material traceability and genealogy."""
+    """
+    Service for material traceability and genealogy.
+
+    Batches form a directed graph (raw material batch -> finished good
+    batch). Multi-level queries walk it with a recursive CTE, or read the
+    precomputed TraceabilityClosure table when TRACEABILITY_CLOSURE_ENABLED
+    is set (run rebuild_closure() once after enabling it). Record writes
+    keep the closure current incrementally.
+    """
     model = TraceabilityRecord
+    MAX_DEPTH = 100
+    RECURSIVE_CTE_VENDORS = ('postgresql', 'sqlite', 'mysql')
+
+    @classmethod
+    def closure_enabled(cls) -> bool:
+        return getattr(settings, 'TRACEABILITY_CLOSURE_ENABLED', False)
 
     @classmethod
     @transaction.atomic
@@ -219,61 +1282,469 @@ class TraceabilityService(BaseService):
         quantity_used: Decimal
     ) -> TraceabilityRecord:
         """Record material consumption for traceability."""
-        return cls.model.objects.create(
+        record = cls.model.objects.create(
             finished_good_id=finished_good_id,
             finished_good_batch=finished_good_batch,
             raw_material_id=raw_material_id,
             raw_material_batch=raw_material_batch,
             quantity_used=quantity_used
         )
+        cls.extend_closure([(raw_material_batch, finished_good_batch)])
+        return record
+
+    @classmethod
+    @transaction.atomic
+    def record_consumption_bulk(
+        cls,
+        finished_good_id: int,
+        finished_good_batch: str,
+        lines: list
+    ) -> list:
+        """
+        Record many consumed raw material batches for one finished good batch.
+
+        lines: list of {'raw_material_id', 'raw_material_batch', 'quantity_used'}
+
+        Writes all records with one bulk_create and extends the closure once.
+        """
+        records = cls.model.objects.bulk_create([
+            cls.model(
+                finished_good_id=finished_good_id,
+                finished_good_batch=finished_good_batch,
+                raw_material_id=line['raw_material_id'],
+                raw_material_batch=line['raw_material_batch'],
+                quantity_used=line['quantity_used'],
+            )
+            for line in lines
+        ])
+        cls.extend_closure(
+            (line['raw_material_batch'], finished_good_batch) for line in lines
+        )
+        return records
+
+    @classmethod
+    def get_component_consumption(cls, record) -> dict:
+        """
+        Materials consumed by a production counting record.
+
+        Inputs of the record's operation component (OperationProductInComponent)
+        scaled by the done quantity relative to the component's output
+        quantity. Intermediates produced by child operations of the same
+        tree flow directly between operations and are not drawn from stock.
+        Returns {material_id: Decimal}.
+        """
+        from mes.plugins.routing.domain.models import (
+            OperationProductInComponent, OperationProductOutComponent
+        )
+
+        if not record.component_id or not record.done_quantity:
+            return {}
+
+        product_id = record.product_id or record.order.product_id
+        outputs = dict(
+            OperationProductOutComponent.objects.filter(
+                operation_component_id=record.component_id
+            ).values_list('product_id', 'quantity')
+        )
+        out_quantity = outputs.get(product_id)
+        if out_quantity is None and len(outputs) == 1:
+            out_quantity = next(iter(outputs.values()))
+        runs = record.done_quantity / out_quantity if out_quantity else record.done_quantity
+
+        intermediates = OperationProductOutComponent.objects.filter(
+            operation_component__parent_id=record.component_id
+        ).values('product_id')
+        consumption = defaultdict(Decimal)
+        for material_id, quantity in OperationProductInComponent.objects.filter(
+            operation_component_id=record.component_id
+        ).exclude(product_id__in=intermediates).values_list('product_id', 'quantity'):
+            consumption[material_id] += (quantity * runs).quantize(STOCK_QUANTUM, rounding=ROUND_UP)
+        return dict(consumption)
+
+    @classmethod
+    @transaction.atomic
+    def consume_for_production(
+        cls,
+        record,
+        finished_good_batch: str = None,
+        strategy: str = 'fefo',
+        location_type: str = None
+    ) -> dict:
+        """
+        Consume BOM inputs for a completed production counting record.
+
+        Derives consumption from the operation's BOM x done quantity,
+        picks stock batches FEFO/FIFO, draws down the order's reservations
+        and writes all traceability records in one transaction.
+        """
+        consumption = cls.get_component_consumption(record)
+        finished_good_batch = finished_good_batch or record.order.number
+        finished_good_id = record.product_id or record.order.product_id
+
+        allocations = StockService.consume(consumption, strategy, location_type)
+        ReservationService.consume_for_order(record.order_id, consumption)
+        records = cls.record_consumption_bulk(
+            finished_good_id,
+            finished_good_batch,
+            [
+                {
+                    'raw_material_id': a['material_id'],
+                    'raw_material_batch': a['batch_number'] or '',
+                    'quantity_used': a['quantity'],
+                }
+                for a in allocations
+            ]
+        )
+
+        return {
+            'finished_good_batch': finished_good_batch,
+            'record_count': len(records),
+            'allocations': allocations,
+        }
+
+    @classmethod
+    def get_recorded_consumption(cls, record, finished_good_batch: str = None) -> dict:
+        """
+        Consumption already recorded for a production counting record.
+
+        Same shape as consume_for_production(), read back from the
+        traceability records of the finished good batch. Stock locations
+        are not kept on traceability records and are left out.
+        """
+        finished_good_batch = finished_good_batch or record.order.number
+        finished_good_id = record.product_id or record.order.product_id
+        allocations = [
+            {'material_id': material_id, 'batch_number': batch_number, 'quantity': quantity}
+            for material_id, batch_number, quantity in cls.model.objects.filter(
+                finished_good_batch=finished_good_batch,
+                finished_good_id=finished_good_id
+            ).order_by('id').values_list('raw_material_id', 'raw_material_batch', 'quantity_used')
+        ]
+        return {
+            'finished_good_batch': finished_good_batch,
+            'record_count': len(allocations),
+            'allocations': allocations,
+        }
+
+    @classmethod
+    def extend_closure(cls, edges) -> int:
+        """
+        Add new raw -> finished batch edges to the closure table.
+
+        Every ancestor of the raw batch becomes an ancestor of every
+        descendant of the finished batch. No-op when the closure is disabled.
+        """
+        if not cls.closure_enabled():
+            return 0
+
+        edges = set(edges)
+        raw_batches = {raw for raw, _ in edges}
+        finished_batches = {finished for _, finished in edges}
+
+        ancestors = defaultdict(dict)
+        for ancestor, descendant, depth in TraceabilityClosure.objects.filter(
+            descendant_batch__in=raw_batches
+        ).values_list('ancestor_batch', 'descendant_batch', 'depth'):
+            ancestors[descendant][ancestor] = depth
+
+        descendants = defaultdict(dict)
+        for ancestor, descendant, depth in TraceabilityClosure.objects.filter(
+            ancestor_batch__in=finished_batches
+        ).values_list('ancestor_batch', 'descendant_batch', 'depth'):
+            descendants[ancestor][descendant] = depth
+
+        pairs = {}
+        for raw, finished in edges:
+            upstream = {raw: 0, **ancestors[raw]}
+            downstream = {finished: 0, **descendants[finished]}
+            for ancestor, up_depth in upstream.items():
+                for descendant, down_depth in downstream.items():
+                    if ancestor == descendant:
+                        continue
+                    depth = up_depth + 1 + down_depth
+                    key = (ancestor, descendant)
+                    if key not in pairs or depth < pairs[key]:
+                        pairs[key] = depth
+
+        # Keep the shortest path when a pair is already known
+        for ancestor, descendant, depth in TraceabilityClosure.objects.filter(
+            ancestor_batch__in={a for a, _ in pairs},
+            descendant_batch__in={d for _, d in pairs}
+        ).values_list('ancestor_batch', 'descendant_batch', 'depth'):
+            key = (ancestor, descendant)
+            if key in pairs and pairs[key] >= depth:
+                del pairs[key]
+
+        cls._write_closure(pairs)
+        return len(pairs)
+
+    @classmethod
+    def retract_closure(cls, edges) -> int:
+        """
+        Re-derive the closure pairs that may have run through removed edges.
+
+        Call after the raw -> finished records have been deleted or changed.
+        Only pairs from an ancestor of the raw batch to a descendant of the
+        finished batch are dropped and recomputed from the remaining edges;
+        the rest of the closure is untouched. No-op when the closure is disabled.
+        """
+        if not cls.closure_enabled():
+            return 0
+
+        restored = 0
+        for raw, finished in set(edges):
+            upstream = {raw} | set(
+                TraceabilityClosure.objects.filter(descendant_batch=raw)
+                .values_list('ancestor_batch', flat=True)
+            )
+            downstream = {finished} | set(
+                TraceabilityClosure.objects.filter(ancestor_batch=finished)
+                .values_list('descendant_batch', flat=True)
+            )
+            TraceabilityClosure.objects.filter(
+                ancestor_batch__in=upstream, descendant_batch__in=downstream
+            ).delete()
+
+            # A surviving path leaves the upstream set over exactly one edge;
+            # the parts before and after that edge are unaffected pairs
+            within = defaultdict(dict)
+            for ancestor, descendant, depth in TraceabilityClosure.objects.filter(
+                ancestor_batch__in=upstream, descendant_batch__in=upstream
+            ).values_list('ancestor_batch', 'descendant_batch', 'depth'):
+                within[ancestor][descendant] = depth
+
+            exits = defaultdict(set)
+            for source, target in cls.model.objects.filter(
+                raw_material_batch__in=upstream
+            ).exclude(
+                finished_good_batch__in=upstream
+            ).values_list('raw_material_batch', 'finished_good_batch').distinct():
+                exits[source].add(target)
+            targets = set().union(*exits.values())
+
+            reach = defaultdict(dict)
+            for ancestor, descendant, depth in TraceabilityClosure.objects.filter(
+                ancestor_batch__in=targets, descendant_batch__in=downstream
+            ).values_list('ancestor_batch', 'descendant_batch', 'depth'):
+                reach[ancestor][descendant] = depth
+            for target in targets & downstream:
+                reach[target][target] = 0
+
+            pairs = {}
+            for ancestor in upstream:
+                for source, up_depth in {ancestor: 0, **within[ancestor]}.items():
+                    for target in exits.get(source, ()):
+                        for descendant, down_depth in reach[target].items():
+                            if descendant == ancestor:
+                                continue
+                            depth = up_depth + 1 + down_depth
+                            key = (ancestor, descendant)
+                            if key not in pairs or depth < pairs[key]:
+                                pairs[key] = depth
+
+            cls._write_closure(pairs)
+            restored += len(pairs)
+        return restored
+
+    @classmethod
+    def _write_closure(cls, pairs: dict):
+        """Upsert {(ancestor, descendant): depth} into the closure table."""
+        TraceabilityClosure.objects.bulk_create(
+            [
+                TraceabilityClosure(ancestor_batch=a, descendant_batch=d, depth=depth)
+                for (a, d), depth in pairs.items()
+            ],
+            batch_size=5000,
+            update_conflicts=True,
+            unique_fields=['ancestor_batch', 'descendant_batch'],
+            update_fields=['depth']
+        )
+
+    @classmethod
+    @transaction.atomic
+    def rebuild_closure(cls) -> int:
+        """
+        Rebuild the closure table from all traceability records.
+
+        Runs set-based INSERT ... SELECT statements, one per genealogy
+        level, until no new pairs are found.
+        """
+        closure_table = TraceabilityClosure._meta.db_table
+        record_table = cls.model._meta.db_table
+
+        TraceabilityClosure.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {closure_table} (ancestor_batch, descendant_batch, depth) "
+                f"SELECT DISTINCT raw_material_batch, finished_good_batch, 1 "
+                f"FROM {record_table} WHERE raw_material_batch <> finished_good_batch"
+            )
+            depth = 1
+            while depth < cls.MAX_DEPTH:
+                cursor.execute(
+                    f"INSERT INTO {closure_table} (ancestor_batch, descendant_batch, depth) "
+                    f"SELECT DISTINCT c.ancestor_batch, t.finished_good_batch, c.depth + 1 "
+                    f"FROM {closure_table} c "
+                    f"JOIN {record_table} t ON t.raw_material_batch = c.descendant_batch "
+                    f"WHERE c.depth = %s AND t.finished_good_batch <> c.ancestor_batch "
+                    f"AND NOT EXISTS (SELECT 1 FROM {closure_table} x "
+                    f"WHERE x.ancestor_batch = c.ancestor_batch "
+                    f"AND x.descendant_batch = t.finished_good_batch)",
+                    [depth]
+                )
+                if cursor.rowcount == 0:
+                    break
+                depth += 1
+
+        return TraceabilityClosure.objects.count()
+
+    @classmethod
+    def _walk(cls, batch: str, downstream: bool, max_depth: int = None) -> dict:
+        """
+        Return {batch: depth} for every batch reachable from batch.
+
+        Downstream follows raw -> finished edges (where a batch went),
+        upstream follows finished -> raw edges (what a batch is made of).
+        """
+        max_depth = min(max_depth or cls.MAX_DEPTH, cls.MAX_DEPTH)
+        source, target = (
+            ('raw_material_batch', 'finished_good_batch') if downstream
+            else ('finished_good_batch', 'raw_material_batch')
+        )
+
+        if cls.closure_enabled():
+            if downstream:
+                rows = TraceabilityClosure.objects.filter(
+                    ancestor_batch=batch, depth__lte=max_depth
+                ).values_list('descendant_batch', 'depth')
+            else:
+                rows = TraceabilityClosure.objects.filter(
+                    descendant_batch=batch, depth__lte=max_depth
+                ).values_list('ancestor_batch', 'depth')
+            return dict(rows)
+
+        if connection.vendor in cls.RECURSIVE_CTE_VENDORS:
+            table = cls.model._meta.db_table
+            sql = (
+                f"WITH RECURSIVE walk(batch, depth) AS ("
+                f"SELECT {target}, 1 FROM {table} WHERE {source} = %s "
+                f"UNION "
+                f"SELECT t.{target}, w.depth + 1 FROM {table} t "
+                f"JOIN walk w ON t.{source} = w.batch WHERE w.depth < %s"
+                f") SELECT batch, MIN(depth) FROM walk WHERE batch <> %s GROUP BY batch"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [batch, max_depth, batch])
+                return dict(cursor.fetchall())
+
+        # Fallback: one query per level
+        found = {}
+        frontier = {batch}
+        for depth in range(1, max_depth + 1):
+            next_batches = set(
+                cls.get_queryset().filter(**{f'{source}__in': frontier})
+                .values_list(target, flat=True).distinct()
+            ) - found.keys() - {batch}
+            if not next_batches:
+                break
+            for b in next_batches:
+                found[b] = depth
+            frontier = next_batches
+        return found
 
     @classmethod
-    def trace_forward(cls, raw_material_batch: str):
+    def get_downstream_batches(cls, batch: str, max_depth: int = None) -> dict:
+        """All batches made (directly or indirectly) from batch: {batch: depth}."""
+        return cls._walk(batch, downstream=True, max_depth=max_depth)
+
+    @classmethod
+    def get_upstream_batches(cls, batch: str, max_depth: int = None) -> dict:
+        """All batches consumed (directly or indirectly) by batch: {batch: depth}."""
+        return cls._walk(batch, downstream=False, max_depth=max_depth)
+
+    @classmethod
+    def trace_forward(cls, raw_material_batch: str, max_depth: int = 1):
         """
         Forward traceability: find all finished goods that used a raw material batch.
+
+        With max_depth > 1 (or None for all levels) records of the
+        intermediate batches made from it are included as well.
         """
+        batches = {raw_material_batch}
+        if max_depth != 1:
+            downstream = cls.get_downstream_batches(raw_material_batch, max_depth)
+            batches.update(b for b, depth in downstream.items() if depth < (max_depth or cls.MAX_DEPTH))
         return cls.get_queryset().filter(
-            raw_material_batch=raw_material_batch
+            raw_material_batch__in=batches
         ).select_related('finished_good', 'raw_material')
 
     @classmethod
-    def trace_backward(cls, finished_good_batch: str):
+    def trace_backward(cls, finished_good_batch: str, max_depth: int = 1):
         """
         Backward traceability: find all raw materials used in a finished good batch.
+
+        With max_depth > 1 (or None for all levels) records of the
+        intermediate batches it was made from are included as well.
         """
+        batches = {finished_good_batch}
+        if max_depth != 1:
+            upstream = cls.get_upstream_batches(finished_good_batch, max_depth)
+            batches.update(b for b, depth in upstream.items() if depth < (max_depth or cls.MAX_DEPTH))
         return cls.get_queryset().filter(
-            finished_good_batch=finished_good_batch
+            finished_good_batch__in=batches
         ).select_related('finished_good', 'raw_material')
 
     @classmethod
-    def get_affected_batches(cls, raw_material_batch: str) -> list:
+    def get_affected_batches(cls, raw_material_batch: str, max_depth: int = None) -> list:
         """
-        Get all affected finished good batches for a recall scenario.
+        Get all affected batches for a recall scenario.
+
+        Returns the complete downstream set across all levels, nearest first.
         """
-        records = cls.trace_forward(raw_material_batch)
-        return list(records.values_list('finished_good_batch', flat=True).distinct())
+        downstream = cls.get_downstream_batches(raw_material_batch, max_depth)
+        return sorted(downstream, key=lambda b: (downstream[b], b))
 
     @classmethod
-    def get_genealogy(cls, finished_good_batch: str) -> dict:
+    def get_genealogy(cls, finished_good_batch: str, max_depth: int = None) -> dict:
         """
         Get complete genealogy for a finished good batch.
 
-        Returns hierarchical structure of all raw materials used.
+        Returns hierarchical structure of all raw materials used, across
+        all levels, loaded with one graph query and one record query.
         """
-        records = cls.trace_backward(finished_good_batch)
+        upstream = cls.get_upstream_batches(finished_good_batch, max_depth)
+        max_level = max(upstream.values(), default=0)
+        parents = {finished_good_batch} | {
+            b for b, depth in upstream.items() if depth < max_level
+        }
+        records = cls.get_queryset().filter(
+            finished_good_batch__in=parents
+        ).select_related('raw_material').order_by('timestamp')
 
-        return {
-            'batch': finished_good_batch,
-            'components': [
+        inputs = defaultdict(list)
+        for record in records:
+            inputs[record.finished_good_batch].append(record)
+
+        def build(batch, path):
+            return [
                 {
                     'material_number': r.raw_material.number,
                     'material_name': r.raw_material.name,
                     'batch': r.raw_material_batch,
                     'quantity_used': str(r.quantity_used),
-                    'timestamp': r.timestamp.isoformat()
+                    'timestamp': r.timestamp.isoformat(),
+                    'components': (
+                        build(r.raw_material_batch, path | {r.raw_material_batch})
+                        if r.raw_material_batch not in path else []
+                    )
                 }
-                for r in records
+                for r in inputs.get(batch, [])
             ]
+
+        return {
+            'batch': finished_good_batch,
+            'levels': max_level,
+            'components': build(finished_good_batch, {finished_good_batch})
         }
 
 
@@ -344,6 +1815,144 @@ class KanbanService(StatefulService):
 
         return card
 
+    @classmethod
+    def stock_changed(cls, keys) -> None:
+        """
+        Schedule a replenishment cycle for stock movements.
+
+        keys: iterable of (material_id, location_name) touched by a movement.
+        The cycle runs once the surrounding transaction commits, so a batch
+        movement triggers one cycle for all of its lines.
+        """
+        if not settings.KANBAN_AUTO_REPLENISHMENT:
+            return
+        keys = set(keys)
+        if keys:
+            transaction.on_commit(lambda: cls.run_cycle(keys))
+
+    @classmethod
+    def get_stock_levels(cls, cards) -> dict:
+        """Stock on hand per (material_id, location) of the cards in one grouped query."""
+        material_ids = {card.material_id for card in cards}
+        locations = {card.location for card in cards}
+        if not material_ids:
+            return {}
+        return {
+            (row['material_id'], row['location_name']): row['total']
+            for row in MaterialStock.objects.filter(
+                material_id__in=material_ids, location_name__in=locations
+            ).values('material_id', 'location_name').annotate(total=Sum('quantity')).order_by()
+        }
+
+    @classmethod
+    def evaluate(cls, card: KanbanCard, level: Decimal):
+        """
+        Target status of a card for the stock level at its location, or None.
+
+        Full cards at or below their reorder point and empty cards start
+        replenishing; replenishing cards whose location is back at capacity
+        are full again.
+        """
+        reorder_point = card.reorder_point if card.reorder_point is not None else Decimal('0')
+        if card.status == 'full' and level <= reorder_point:
+            target = 'replenishing'
+        elif card.status == 'empty':
+            target = 'replenishing'
+        elif card.status == 'replenishing' and level >= card.capacity:
+            target = 'full'
+        else:
+            return None
+        return target if cls.validate_transition(card.status, target) else None
+
+    @classmethod
+    def _consolidate(cls, triggered: list, levels: dict) -> list:
+        """Group triggered cards into one request per supplier, or per location without one."""
+        requests = {}
+        for card in triggered:
+            supplier = card.material.supplier
+            key = ('supplier', supplier.id) if supplier else ('location', card.location)
+            request = requests.setdefault(key, {
+                'supplier_id': supplier.id if supplier else None,
+                'supplier_name': supplier.name if supplier else None,
+                'location': None if supplier else card.location,
+                'lines': [],
+            })
+            level = levels.get((card.material_id, card.location), Decimal('0'))
+            request['lines'].append({
+                'card_id': card.id,
+                'material_id': card.material_id,
+                'material_number': card.material.number,
+                'location': card.location,
+                'quantity': max(card.capacity - level, Decimal('0')),
+            })
+        return list(requests.values())
+
+    @classmethod
+    @transaction.atomic
+    def run_cycle(cls, keys=None) -> dict:
+        """
+        Evaluate kanban cards against current stock and flip them in batch.
+
+        keys: optional set of (material_id, location) to limit the cycle to
+        cards touched by stock movements; None evaluates every card.
+
+        Uses one query for the cards, one grouped query for stock levels and
+        a single bulk_update for all transitions. Consolidated requests for
+        newly triggered cards are returned and sent via replenishment_requested.
+        """
+        queryset = cls.get_queryset().select_related(
+            'material', 'material__supplier'
+        ).select_for_update(of=('self',))
+        if keys is not None:
+            keys = set(keys)
+            if not keys:
+                return {'evaluated': 0, 'triggered': 0, 'completed': 0, 'requests': []}
+            queryset = queryset.filter(
+                material_id__in={m for m, _ in keys},
+                location__in={l for _, l in keys}
+            )
+
+        cards = [
+            card for card in queryset
+            if keys is None or (card.material_id, card.location) in keys
+        ]
+        levels = cls.get_stock_levels(cards)
+
+        now = timezone.now()
+        changed = []
+        triggered = []
+        completed = 0
+        for card in cards:
+            target = cls.evaluate(card, levels.get((card.material_id, card.location), Decimal('0')))
+            if target is None:
+                continue
+            if target == 'full':
+                card.last_replenished = now
+                completed += 1
+            else:
+                triggered.append(card)
+            card.status = target
+            card.updated_at = now
+            changed.append(card)
+
+        if changed:
+            cls.model.objects.bulk_update(
+                changed, ['status', 'last_replenished', 'updated_at'], batch_size=1000
+            )
+
+        requests = cls._consolidate(triggered, levels)
+        if requests:
+            transaction.on_commit(
+                lambda: replenishment_requested.send(sender=cls, requests=requests)
+            )
+
+        return {
+            'evaluated': len(cards),
+            'triggered': len(triggered),
+            'completed': completed,
+            'requests': requests,
+        }
+
     @classmethod
     def stats(cls):
         """Get kanban system statistics."""
@@ -1,5 +1,6 @@
 from django.db import models
 from mes.plugins.basic.domain.models import Product
+from mes.plugins.orders.domain.models import Order
 
 
 class MaterialStock(models.Model):
@@ -22,11 +23,84 @@ class MaterialStock(models.Model):
 
     class Meta:
         unique_together = ('material', 'location_name', 'batch_number')
+        indexes = [
+            # Expiry reports scan by date range
+            models.Index(fields=['expiry_date', 'material']),
+            # FEFO picking walks one material's batches in expiry order
+            models.Index(fields=['material', 'expiry_date']),
+        ]
 
     def __str__(self):
         return f"{self.material.name} - {self.location_name} ({self.quantity})"
 
 
+class MaterialAvailability(models.Model):
+    """Maintained per-material stock summary.
+    Updated incrementally by stock movements so availability checks do not
+    have to aggregate MaterialStock on every call.
+    """
+    LOCATION_TYPE_FIELDS = {
+        'warehouse': 'warehouse_quantity',
+        'shop_floor': 'shop_floor_quantity',
+        'buffer': 'buffer_quantity',
+    }
+
+    material = models.OneToOneField(
+        Product, on_delete=models.CASCADE, related_name='availability')
+    on_hand_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=0)
+    warehouse_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=0)
+    shop_floor_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=0)
+    buffer_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=0)
+    reserved_quantity = models.DecimalField(
+        max_digits=15, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Material Availability"
+        verbose_name_plural = "Material Availability"
+
+    def __str__(self):
+        return f"{self.material_id}: {self.on_hand_quantity} on hand"
+
+    @property
+    def available_quantity(self):
+        return self.on_hand_quantity - self.reserved_quantity
+
+
+class MaterialReservation(models.Model):
+    """Stock reserved for an order's BOM requirement of one material."""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('released', 'Released'),
+        ('consumed', 'Consumed'),
+    ]
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name='material_reservations')
+    material = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.DecimalField(max_digits=15, decimal_places=4, default=0)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='active')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Material Reservation"
+        verbose_name_plural = "Material Reservations"
+        unique_together = ('order', 'material')
+        indexes = [
+            models.Index(fields=['material', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.order.number}: {self.material.name} ({self.quantity})"
+
+
 class Container(models.Model):
     CONTAINER_TYPES = [
         ('bin', 'Bin'),
@@ -40,10 +114,19 @@ class Container(models.Model):
         Product, on_delete=models.SET_NULL, null=True, blank=True)
     content_quantity = models.DecimalField(
         max_digits=15, decimal_places=4, default=0)
+    # Nested containers (e.g. totes on a pallet) share the location of
+    # their outermost parent; it is kept in sync when the parent moves.
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['location']),
+        ]
+
     def __str__(self):
         return f"{self.container_id} ({self.type})"
 
@@ -58,10 +141,35 @@ class TraceabilityRecord(models.Model):
     quantity_used = models.DecimalField(max_digits=15, decimal_places=4)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['raw_material_batch', 'finished_good_batch']),
+            models.Index(fields=['finished_good_batch', 'raw_material_batch']),
+        ]
+
     def __str__(self):
         return f"{self.finished_good_batch} <- {self.raw_material_batch}"
 
 
+class TraceabilityClosure(models.Model):
+    """Transitive closure of the batch genealogy graph.
+    One row per (ancestor, descendant) batch pair reachable through
+    TraceabilityRecord edges, with the length of the path in depth.
+    """
+    ancestor_batch = models.CharField(max_length=100)
+    descendant_batch = models.CharField(max_length=100)
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('ancestor_batch', 'descendant_batch')
+        indexes = [
+            models.Index(fields=['descendant_batch', 'depth']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_batch} -> {self.descendant_batch} ({self.depth})"
+
+
 class KanbanCard(models.Model):
     STATUS_CHOICES = [
         ('full', 'Full'),
@@ -72,11 +180,21 @@ class KanbanCard(models.Model):
     material = models.ForeignKey(Product, on_delete=models.CASCADE)
     location = models.CharField(max_length=255)
     capacity = models.DecimalField(max_digits=15, decimal_places=4)
+    # Stock level at the location at or below which replenishment is
+    # triggered automatically; empty means only when stock runs out.
+    reorder_point = models.DecimalField(
+        max_digits=15, decimal_places=4, null=True, blank=True)
     status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, default='full')
     last_replenished = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['material', 'location']),
+            models.Index(fields=['status']),
+        ]
+
     def __str__(self):
         return f"Kanban: {self.material.name} @ {self.location}"
@@ -0,0 +1,23 @@
+"""
+Evaluate every kanban card against current stock.
+
+Stock movements already trigger cycles for the cards they touch; run this
+periodically from cron as a sweep for changes made outside the services.
+"""
+from django.core.management.base import BaseCommand
+
+from mes.plugins.inventory.application.services import KanbanService
+
+
+class Command(BaseCommand):
+    help = 'Run a kanban replenishment cycle over all cards.'
+
+    def handle(self, *args, **options):
+        result = KanbanService.run_cycle()
+        for request in result['requests']:
+            target = request['supplier_name'] or request['location']
+            self.stdout.write(f"{target}: {len(request['lines'])} lines")
+        self.stdout.write(self.style.SUCCESS(
+            f"Evaluated {result['evaluated']} cards: "
+            f"{result['triggered']} triggered, {result['completed']} completed."
+        ))
@@ -0,0 +1,37 @@
+"""
+Scan stock by days-to-expiry and refresh the cached expiry report.
+
+Intended to run from cron (e.g. every hour and right after midnight) so
+the expiry endpoint is served from the cache.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mes.plugins.inventory.application.services import ExpiryService
+
+
+class Command(BaseCommand):
+    help = 'Bucket stock by days-to-expiry and cache the expiry report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--as-of',
+            help='Report date (YYYY-MM-DD), defaults to today.'
+        )
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = date.fromisoformat(options['as_of'])
+            except ValueError:
+                raise CommandError(f"Invalid date '{options['as_of']}'")
+
+        report = ExpiryService.scan(as_of)
+        for bucket in report['buckets']:
+            self.stdout.write(
+                f"{bucket['bucket']:>10}: {bucket['quantity']} "
+                f"in {bucket['batch_count']} batches of {bucket['material_count']} materials"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Expiry scan for {report['as_of']} cached."))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-19 13:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("basic", "0002_workstation_production_line"),
+        ("inventory", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterialAvailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "on_hand_quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                (
+                    "warehouse_quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                (
+                    "shop_floor_quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                (
+                    "buffer_quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                (
+                    "reserved_quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "material",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="availability",
+                        to="basic.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Material Availability",
+                "verbose_name_plural": "Material Availability",
+            },
+        ),
+    ]
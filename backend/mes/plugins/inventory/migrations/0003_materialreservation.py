@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-19 13:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("basic", "0002_workstation_production_line"),
+        ("orders", "0002_initial"),
+        ("inventory", "0002_materialavailability"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterialReservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "quantity",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=15),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("released", "Released"),
+                            ("consumed", "Consumed"),
+                        ],
+                        default="active",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "material",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="basic.product",
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="material_reservations",
+                        to="orders.order",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Material Reservation",
+                "verbose_name_plural": "Material Reservations",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="materialreservation",
+            index=models.Index(
+                fields=["material", "status"], name="inventory_m_materia_ef2814_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="materialreservation",
+            unique_together={("order", "material")},
+        ),
+    ]
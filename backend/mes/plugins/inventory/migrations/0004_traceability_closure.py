@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0003_materialreservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TraceabilityClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ancestor_batch", models.CharField(max_length=100)),
+                ("descendant_batch", models.CharField(max_length=100)),
+                ("depth", models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="traceabilityrecord",
+            index=models.Index(
+                fields=["raw_material_batch", "finished_good_batch"],
+                name="inventory_t_raw_mat_1aa3a1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="traceabilityrecord",
+            index=models.Index(
+                fields=["finished_good_batch", "raw_material_batch"],
+                name="inventory_t_finishe_7c6eb0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="traceabilityclosure",
+            index=models.Index(
+                fields=["descendant_batch", "depth"],
+                name="inventory_t_descend_06b69b_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="traceabilityclosure",
+            unique_together={("ancestor_batch", "descendant_batch")},
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0004_traceability_closure"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="materialstock",
+            index=models.Index(
+                fields=["expiry_date", "material"],
+                name="inventory_m_expiry__1c4c4c_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="materialstock",
+            index=models.Index(
+                fields=["material", "expiry_date"],
+                name="inventory_m_materia_105325_idx",
+            ),
+        ),
+    ]
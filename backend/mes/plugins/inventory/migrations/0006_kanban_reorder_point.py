@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0005_materialstock_expiry_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kanbancard",
+            name="reorder_point",
+            field=models.DecimalField(
+                blank=True, decimal_places=4, max_digits=15, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kanbancard",
+            index=models.Index(
+                fields=["material", "location"], name="inventory_k_materia_c6cdef_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="kanbancard",
+            index=models.Index(fields=["status"], name="inventory_k_status_961333_idx"),
+        ),
+    ]
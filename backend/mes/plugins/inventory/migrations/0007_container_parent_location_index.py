@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 13:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("inventory", "0006_kanban_reorder_point"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="container",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="children",
+                to="inventory.container",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="container",
+            index=models.Index(
+                fields=["location"], name="inventory_c_locatio_d675ca_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,13 @@
+"""
+Inventory signals.
+
+replenishment_requested is sent once per kanban replenishment cycle that
+triggered cards, with requests consolidated per supplier (or per location
+for materials without a supplier). Purchasing or internal logistics can
+connect receivers to turn them into orders or pick lists.
+
+    kwargs: requests=[{'supplier_id', 'supplier_name', 'location', 'lines': [...]}]
+"""
+from django.dispatch import Signal
+
+replenishment_requested = Signal()
@@ -1,12 +1,63 @@
 from rest_framework import serializers
-from ..domain.models import MaintenanceLog
+from mes.plugins.basic.domain.models import Workstation
+from ..domain.models import MaintenanceLog, MaintenancePlan, MaintenanceWindow
 
 
 class MaintenanceLogSerializer(serializers.ModelSerializer):
     workstation_name = serializers.CharField(
         source='workstation.name', read_only=True)
     duration_hours = serializers.ReadOnlyField()
+    joined_technicians = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field='technician_name')
 
     class Meta:
         model = MaintenanceLog
         fields = '__all__'
+
+
+class MaintenanceStartSerializer(serializers.Serializer):
+    """Start maintenance on a workstation or join the running one"""
+    workstation = serializers.PrimaryKeyRelatedField(queryset=Workstation.objects.all())
+    type = serializers.ChoiceField(choices=MaintenanceLog.TYPE_CHOICES)
+    description = serializers.CharField()
+    technician_name = serializers.CharField(max_length=255)
+    start_time = serializers.DateTimeField(required=False)
+
+
+class DowntimeQuerySerializer(serializers.Serializer):
+    """Date window of the downtime analytics"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
+class ReliabilityQuerySerializer(serializers.Serializer):
+    """Horizon of the failure forecast"""
+    horizon_hours = serializers.FloatField(min_value=0.1, max_value=8760, default=24)
+
+
+class MaintenancePlanSerializer(serializers.ModelSerializer):
+    workstation_name = serializers.CharField(
+        source='workstation.name', read_only=True)
+
+    class Meta:
+        model = MaintenancePlan
+        fields = '__all__'
+
+
+class MaintenanceWindowSerializer(serializers.ModelSerializer):
+    workstation_name = serializers.CharField(
+        source='workstation.name', read_only=True)
+    plan_name = serializers.CharField(source='plan.name', read_only=True)
+    late = serializers.ReadOnlyField()
+
+    class Meta:
+        model = MaintenanceWindow
+        fields = '__all__'
+        read_only_fields = ['plan', 'workstation', 'due_at', 'created_at']
+
+
+class PlanningRequestSerializer(serializers.Serializer):
+    """Horizon and optional workstation scope of a planning run"""
+    horizon_days = serializers.IntegerField(min_value=1, max_value=1825, required=False)
+    workstation_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False)
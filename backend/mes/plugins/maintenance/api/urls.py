@@ -1,7 +1,9 @@
 from rest_framework.routers import DefaultRouter
-from .views import MaintenanceLogViewSet
+from .views import MaintenanceLogViewSet, MaintenancePlanViewSet, MaintenanceWindowViewSet
 
 router = DefaultRouter()
 router.register(r'logs', MaintenanceLogViewSet)
+router.register(r'plans', MaintenancePlanViewSet)
+router.register(r'windows', MaintenanceWindowViewSet)
 
 urlpatterns = router.urls
@@ -1,9 +1,97 @@
-from rest_framework import viewsets
-from ..domain.models import MaintenanceLog
-from .serializers import MaintenanceLogSerializer
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.base.exceptions import BusinessRuleException
+from core.base.views import BaseViewSet
+from ..application.services import (
+    MaintenanceService, DowntimeAnalyticsService, ReliabilityService, PreventiveMaintenanceService
+)
+from ..domain.models import MaintenanceLog, MaintenancePlan, MaintenanceWindow
+from .serializers import (
+    MaintenanceLogSerializer, DowntimeQuerySerializer, ReliabilityQuerySerializer,
+    MaintenancePlanSerializer, MaintenanceWindowSerializer, PlanningRequestSerializer,
+    MaintenanceStartSerializer
+)
 
 
-class MaintenanceLogViewSet(viewsets.ModelViewSet):
-    queryset = MaintenanceLog.objects.all()
+class MaintenanceLogViewSet(BaseViewSet):
+    queryset = MaintenanceLog.objects.prefetch_related('joined_technicians')
     serializer_class = MaintenanceLogSerializer
     filterset_fields = ['workstation', 'type']
+
+    def _save(self, serializer):
+        try:
+            with transaction.atomic():
+                return serializer.save()
+        except IntegrityError:
+            raise BusinessRuleException(
+                'ACTIVE_MAINTENANCE_EXISTS',
+                'Workstation already has active maintenance'
+            )
+
+    def perform_create(self, serializer):
+        self._save(serializer)
+
+    def perform_update(self, serializer):
+        self._save(serializer)
+
+    @action(detail=False, methods=['post'])
+    def start(self, request):
+        """Start maintenance on a workstation, or join the one already running.
+        Body: {"workstation": <id>, "type": "breakdown", "description": "...",
+               "technician_name": "...", "start_time": "ISO datetime" (optional)}
+        """
+        serializer = MaintenanceStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        log, created = MaintenanceService.start_or_join(
+            workstation_id=data['workstation'].id,
+            maintenance_type=data['type'],
+            description=data['description'],
+            technician_name=data['technician_name'],
+            start_time=data.get('start_time')
+        )
+        return Response(
+            {**MaintenanceLogSerializer(log).data, 'created': created},
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def downtime(self, request):
+        """Downtime, MTBF and MTTR of all workstations.
+        Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: last 30 days)
+        """
+        serializer = DowntimeQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(DowntimeAnalyticsService.get_downtime(**serializer.validated_data))
+
+    @action(detail=False, methods=['get'])
+    def reliability(self, request):
+        """Failure forecast of all modelled workstations, highest risk first.
+        Query: ?horizon_hours=24
+        """
+        serializer = ReliabilityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(ReliabilityService.forecast(**serializer.validated_data))
+
+
+class MaintenancePlanViewSet(BaseViewSet):
+    queryset = MaintenancePlan.objects.select_related('workstation')
+    serializer_class = MaintenancePlanSerializer
+    filterset_fields = ['workstation', 'trigger', 'active']
+
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Replan preventive maintenance windows into the production schedule gaps.
+        Body: {"horizon_days": 365, "workstation_ids": [1, 2]} (both optional)
+        """
+        serializer = PlanningRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(PreventiveMaintenanceService.plan(**serializer.validated_data))
+
+
+class MaintenanceWindowViewSet(BaseViewSet):
+    queryset = MaintenanceWindow.objects.select_related('workstation', 'plan')
+    serializer_class = MaintenanceWindowSerializer
+    filterset_fields = ['workstation', 'plan', 'status']
@@ -1,4 +1,10 @@
 """Application services for maintenance management."""
-from .services import MaintenanceService
+from .services import (
+    MaintenanceService, DowntimeAnalyticsService, ReliabilityService,
+    PreventiveMaintenanceService, AvailabilityService
+)
 
-__all__ = ['MaintenanceService']
+__all__ = [
+    'MaintenanceService', 'DowntimeAnalyticsService', 'ReliabilityService',
+    'PreventiveMaintenanceService', 'AvailabilityService'
+]
@@ -0,0 +1,116 @@
+"""
+Reliability engine.
+
+Weibull models of the times between failures of many workstations,
+fitted in one vectorized NumPy pass. Inter-failure times of all
+workstations are packed into one (workstation x interval) matrix padded
+with NaN, and the maximum likelihood shape of every row is solved with
+the same Newton iterations.
+
+Times are in hours. For a Weibull(shape k, scale l):
+    R(t) = exp(-(t / l) ** k)             reliability (survival)
+    h(t) = k / l * (t / l) ** (k - 1)     hazard rate
+"""
+import math
+
+import numpy as np
+
+# Rows with fewer intervals fall back to an exponential model (shape 1)
+MIN_WEIBULL_INTERVALS = 3
+SHAPE_BOUNDS = (0.1, 20.0)
+NEWTON_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-8
+
+
+def interval_matrix(series) -> np.ndarray:
+    """
+    Pack inter-failure times into a NaN padded matrix.
+
+    series: list of 1-D sequences of failure times (hours, ascending), one
+    per workstation. Row i holds the gaps between consecutive failures.
+    """
+    gaps = [np.diff(np.asarray(times, dtype=float)) for times in series]
+    width = max((g.size for g in gaps), default=0)
+    matrix = np.full((len(gaps), max(width, 1)), np.nan)
+    for row, g in enumerate(gaps):
+        g = g[g > 0]
+        matrix[row, :g.size] = g
+    return matrix
+
+
+def fit_weibull(intervals) -> tuple:
+    """
+    Maximum likelihood Weibull fit per row.
+
+    Solves 1/k + mean(ln x) - sum(x^k ln x) / sum(x^k) = 0 for the shape k
+    by Newton's method on all rows at once; the scale follows in closed
+    form. Rows with fewer than MIN_WEIBULL_INTERVALS intervals get an
+    exponential fit (k = 1, scale = mean); rows without intervals NaN.
+
+    Returns (shape, scale, count) arrays.
+    """
+    x = np.atleast_2d(np.asarray(intervals, dtype=float))
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Normalise by the row mean so x^k stays well scaled
+        mean = np.where(valid, x, 0.0).sum(axis=1) / count
+    z = np.where(valid, x / mean[:, None], 1.0)
+    log_z = np.log(z)
+    mean_log = np.where(count > 0, (log_z * valid).sum(axis=1) / np.maximum(count, 1), 0.0)
+
+    shape = np.ones(len(x))
+    for _ in range(NEWTON_ITERATIONS):
+        zk = np.where(valid, z ** shape[:, None], 0.0)
+        s0 = zk.sum(axis=1)
+        s1 = (zk * log_z).sum(axis=1)
+        s2 = (zk * log_z * log_z).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f = 1.0 / shape + mean_log - s1 / s0
+            df = -1.0 / shape ** 2 - (s2 * s0 - s1 * s1) / (s0 * s0)
+            step = np.where(np.isfinite(f / df), f / df, 0.0)
+        shape = np.clip(shape - step, *SHAPE_BOUNDS)
+        if np.all(np.abs(step) < NEWTON_TOLERANCE):
+            break
+
+    weibull = count >= MIN_WEIBULL_INTERVALS
+    shape = np.where(weibull, shape, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zk = np.where(valid, z ** shape[:, None], 0.0)
+        scale = mean * (zk.sum(axis=1) / np.maximum(count, 1)) ** (1.0 / shape)
+    shape = np.where(count > 0, shape, np.nan)
+    scale = np.where(count > 0, scale, np.nan)
+    return shape, scale, count
+
+
+def reliability(t, shape, scale):
+    """Probability of surviving past t."""
+    t = np.maximum(np.asarray(t, dtype=float), 0.0)
+    return np.exp(-(t / scale) ** shape)
+
+
+def hazard(t, shape, scale):
+    """Instantaneous failure rate (failures per hour) at age t."""
+    t = np.maximum(np.asarray(t, dtype=float), 1e-9)
+    return shape / scale * (t / scale) ** (shape - 1)
+
+
+def failure_probability(age, horizon, shape, scale):
+    """Probability of failing within `horizon` hours given no failure for `age` hours."""
+    age = np.maximum(np.asarray(age, dtype=float), 0.0)
+    with np.errstate(over='ignore', invalid='ignore'):
+        conditional = np.exp((age / scale) ** shape - ((age + horizon) / scale) ** shape)
+    return np.clip(1.0 - conditional, 0.0, 1.0)
+
+
+def residual_quantile(age, probability, shape, scale):
+    """Hours from now until the failure probability reaches `probability`, given the age."""
+    age = np.maximum(np.asarray(age, dtype=float), 0.0)
+    return scale * ((age / scale) ** shape - math.log(1.0 - probability)) ** (1.0 / shape) - age
+
+
+def mean_life(shape, scale):
+    """Mean time between failures of the fitted distribution."""
+    shape = np.asarray(shape, dtype=float)
+    gamma = np.vectorize(lambda k: math.gamma(1.0 + 1.0 / k) if np.isfinite(k) else np.nan)
+    return scale * gamma(shape)
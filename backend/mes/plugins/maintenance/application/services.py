@@ -4,14 +4,34 @@ Maintenance Management Services.
 Business logic for equipment maintenance tracking, preventive maintenance
 scheduling, and downtime analysis.
 """
-from datetime import timedelta
-from django.db import transaction
-from django.db.models import Sum, Count, Q, Avg
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Sum, Count, Q, Avg, F, Value, DateTimeField, DurationField, ExpressionWrapper,
+    Exists, OuterRef, Subquery
+)
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
 from django.utils import timezone
 
 from core.base.services import BaseService
 from core.base.exceptions import ValidationException, BusinessRuleException
-from ..domain.models import MaintenanceLog
+from mes.plugins.basic.domain.models import Workstation
+from mes.plugins.production_counting.domain.models import ProductionCounting
+from mes.plugins.scheduling.domain.models import Scheduling
+from ..domain.models import (
+    MaintenanceLog, MaintenanceLogTechnician, WorkstationReliability, MaintenancePlan, MaintenanceWindow
+)
+from . import reliability
+from .timeline import Timeline
+
+
+def _hours(duration) -> float:
+    return round(duration.total_seconds() / 3600, 2) if duration else 0.0
 
 
 class MaintenanceService(BaseService):
@@ -39,6 +59,33 @@ class MaintenanceService(BaseService):
         cutoff = timezone.now() - timedelta(days=days)
         return cls.get_queryset().filter(start_time__gte=cutoff)
 
+    @classmethod
+    def _validate_type(cls, maintenance_type: str) -> None:
+        if maintenance_type not in dict(cls.model.TYPE_CHOICES):
+            raise ValidationException(
+                f"Invalid maintenance type. Must be one of: {', '.join(dict(cls.model.TYPE_CHOICES).keys())}",
+                field='type'
+            )
+
+    @classmethod
+    def _active_exists_error(cls, active: MaintenanceLog):
+        return BusinessRuleException(
+            'ACTIVE_MAINTENANCE_EXISTS',
+            f'Workstation already has active maintenance started at {active.start_time}'
+        )
+
+    @classmethod
+    def _create_open_log(cls, workstation_id, maintenance_type, description, technician_name, start_time):
+        """Insert an open log; IntegrityError when the workstation already has one."""
+        with transaction.atomic():
+            return cls.model.objects.create(
+                workstation_id=workstation_id,
+                type=maintenance_type,
+                description=description,
+                technician_name=technician_name,
+                start_time=start_time or timezone.now()
+            )
+
     @classmethod
     @transaction.atomic
     def start_maintenance(
@@ -53,29 +100,82 @@ class MaintenanceService(BaseService):
         Start a new maintenance activity.
 
         Validates that there's no active maintenance for the workstation.
+        The check is the one-open-log-per-workstation constraint itself,
+        so concurrent starts cannot both succeed.
         """
-        if maintenance_type not in dict(cls.model.TYPE_CHOICES):
-            raise ValidationException(
-                f"Invalid maintenance type. Must be one of: {', '.join(dict(cls.model.TYPE_CHOICES).keys())}",
-                field='type'
+        cls._validate_type(maintenance_type)
+        try:
+            return cls._create_open_log(
+                workstation_id, maintenance_type, description, technician_name, start_time
             )
+        except IntegrityError:
+            active = cls.get_active_maintenance().filter(workstation_id=workstation_id).first()
+            if active is None:
+                raise
+            raise cls._active_exists_error(active)
 
-        # Check for active maintenance on this workstation
-        active = cls.get_active_maintenance().filter(workstation_id=workstation_id).first()
-        if active:
-            raise BusinessRuleException(
-                'ACTIVE_MAINTENANCE_EXISTS',
-                f'Workstation already has active maintenance started at {active.start_time}'
-            )
+    @classmethod
+    @transaction.atomic
+    def start_or_join(
+        cls,
+        workstation_id: int,
+        maintenance_type: str,
+        description: str,
+        technician_name: str,
+        start_time=None
+    ) -> tuple:
+        """
+        Start maintenance on a workstation, or join the one already running.
 
-        return cls.model.objects.create(
-            workstation_id=workstation_id,
-            type=maintenance_type,
-            description=description,
-            technician_name=technician_name,
-            start_time=start_time or timezone.now()
+        Joining records the technician on the open log; a running log of
+        another type is not joined. Safe under concurrent calls: whoever
+        loses the race to create the log joins it instead.
+        Returns (log, created).
+        """
+        cls._validate_type(maintenance_type)
+        for _ in range(2):
+            try:
+                return cls._create_open_log(
+                    workstation_id, maintenance_type, description, technician_name, start_time
+                ), True
+            except IntegrityError:
+                pass
+            active = cls.get_active_maintenance().select_for_update().filter(
+                workstation_id=workstation_id
+            ).first()
+            if active:
+                if active.type != maintenance_type:
+                    raise BusinessRuleException(
+                        'MAINTENANCE_TYPE_MISMATCH',
+                        f'Workstation already has {active.type} maintenance running '
+                        f'since {active.start_time}'
+                    )
+                return cls._join(active, technician_name), False
+            # Completed in the meantime; try starting again
+        raise BusinessRuleException(
+            'MAINTENANCE_START_CONFLICT',
+            'Maintenance on this workstation changed concurrently, please retry'
         )
 
+    @classmethod
+    def _join(cls, log: MaintenanceLog, technician_name: str) -> MaintenanceLog:
+        """Record a technician on a locked open log (once per name, any case)."""
+        if log.technician_name.lower() != technician_name.lower() and not log.joined_technicians.filter(
+            technician_name__iexact=technician_name
+        ).exists():
+            MaintenanceLogTechnician.objects.create(log=log, technician_name=technician_name)
+            log.save(update_fields=['updated_at'])
+        return log
+
+    @classmethod
+    def worked_by(cls, technician_name: str) -> Q:
+        """Logs a technician started or joined."""
+        return Q(technician_name__iexact=technician_name) | Q(Exists(
+            MaintenanceLogTechnician.objects.filter(
+                log=OuterRef('pk'), technician_name__iexact=technician_name
+            )
+        ))
+
     @classmethod
     @transaction.atomic
     def complete_maintenance(
@@ -104,64 +204,76 @@ class MaintenanceService(BaseService):
         log.save(update_fields=['end_time', 'description', 'updated_at'])
         return log
 
+    @classmethod
+    def overlapping(cls, start, end):
+        """Logs with any downtime inside [start, end); open logs count as running."""
+        return cls.get_queryset().filter(
+            Q(end_time__gt=start) | Q(end_time__isnull=True),
+            start_time__lt=end
+        )
+
+    @classmethod
+    def clipped_duration(cls, start, end, now=None):
+        """Duration of each log clipped to [start, end) as a database expression."""
+        clipped_start = Greatest(F('start_time'), Value(start, output_field=DateTimeField()))
+        clipped_end = Least(
+            Coalesce(F('end_time'), Value(now or timezone.now(), output_field=DateTimeField())),
+            Value(end, output_field=DateTimeField())
+        )
+        return ExpressionWrapper(clipped_end - clipped_start, output_field=DurationField())
+
     @classmethod
     def get_workstation_downtime(cls, workstation_id: int, days: int = 30) -> dict:
         """
         Calculate total downtime for a workstation.
 
-        Returns total hours, breakdown by type, and average duration.
+        Durations are clipped to the last `days` and summed per type in
+        one grouped query. Returns total hours, breakdown by type, and
+        average duration.
         """
-        cutoff = timezone.now() - timedelta(days=days)
-        logs = cls.get_by_workstation(workstation_id).filter(
-            start_time__gte=cutoff,
-            end_time__isnull=False
-        )
+        now = timezone.now()
+        cutoff = now - timedelta(days=days)
+        rows = cls.overlapping(cutoff, now).filter(
+            workstation_id=workstation_id
+        ).values('type').annotate(
+            duration=Sum(cls.clipped_duration(cutoff, now, now)),
+            count=Count('id')
+        ).order_by()
 
-        # Calculate durations
-        total_seconds = 0
-        by_type = {}
-
-        for log in logs:
-            duration = (log.end_time - log.start_time).total_seconds()
-            total_seconds += duration
-            by_type[log.type] = by_type.get(log.type, 0) + duration
-
-        total_hours = round(total_seconds / 3600, 2)
+        by_type = {row['type']: row['duration'] for row in rows}
+        count = sum(row['count'] for row in rows)
+        total = sum(by_type.values(), timedelta())
 
         return {
             'workstation_id': workstation_id,
             'period_days': days,
-            'total_downtime_hours': total_hours,
-            'by_type': {
-                mtype: round(seconds / 3600, 2)
-                for mtype, seconds in by_type.items()
-            },
-            'maintenance_count': logs.count(),
-            'avg_duration_hours': round(total_hours / logs.count(), 2) if logs.count() > 0 else 0
+            'total_downtime_hours': _hours(total),
+            'by_type': {mtype: _hours(duration) for mtype, duration in by_type.items()},
+            'maintenance_count': count,
+            'avg_duration_hours': _hours(total / count) if count else 0
         }
 
     @classmethod
     def get_technician_workload(cls, technician_name: str, days: int = 30) -> dict:
-        """Get workload statistics for a technician."""
-        cutoff = timezone.now() - timedelta(days=days)
-        logs = cls.get_queryset().filter(
-            technician_name__iexact=technician_name,
-            start_time__gte=cutoff
-        )
-
-        completed = logs.filter(end_time__isnull=False)
-        total_hours = sum(
-            (log.end_time - log.start_time).total_seconds() / 3600
-            for log in completed
+        """Get workload statistics for a technician, in one aggregate query."""
+        now = timezone.now()
+        cutoff = now - timedelta(days=days)
+        totals = cls.overlapping(cutoff, now).filter(
+            cls.worked_by(technician_name)
+        ).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(end_time__isnull=False)),
+            active=Count('id', filter=Q(end_time__isnull=True)),
+            duration=Sum(cls.clipped_duration(cutoff, now, now), filter=Q(end_time__isnull=False))
         )
 
         return {
             'technician': technician_name,
             'period_days': days,
-            'total_maintenance_count': logs.count(),
-            'completed_count': completed.count(),
-            'active_count': logs.filter(end_time__isnull=True).count(),
-            'total_hours': round(total_hours, 2)
+            'total_maintenance_count': totals['total'],
+            'completed_count': totals['completed'],
+            'active_count': totals['active'],
+            'total_hours': _hours(totals['duration'])
         }
 
     @classmethod
@@ -201,3 +313,645 @@ class MaintenanceService(BaseService):
             .annotate(breakdown_count=Count('id'))
             .order_by('-breakdown_count')
         )
+
+
+class DowntimeAnalyticsService(BaseService):
+    """
+    Fleet-wide downtime analytics: downtime per workstation, type,
+    technician and day, with MTBF and MTTR for every workstation.
+
+    Log intervals are clipped to the window and to day boundaries in the
+    database. Logs within a single day are summed in one grouped query;
+    the few that span midnight are split per day in Python. Closed days
+    are cached per day; today is always computed live.
+    """
+    model = MaintenanceLog
+    CACHE_KEY = 'maintenance:downtime:v2:{day}'
+    # Unplanned stops; preventive work is downtime but not a failure
+    FAILURE_TYPES = ('breakdown', 'corrective')
+
+    @classmethod
+    def _day_bounds(cls, day):
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+    @classmethod
+    def _query_days(cls, first_day, last_day, now) -> dict:
+        """
+        Downtime of consecutive days.
+
+        Returns {day: {(workstation_id, type, technician, joined): [seconds, started]}}
+        where started counts logs that began that day. Every log appears
+        once with its starter (joined False) and once per technician who
+        joined it (joined True); only the former count as downtime.
+        """
+        start, _ = cls._day_bounds(first_day)
+        _, end = cls._day_bounds(last_day)
+        queryset = MaintenanceService.overlapping(start, end).annotate(
+            clipped_start=Greatest(F('start_time'), Value(start, output_field=DateTimeField())),
+            clipped_end=Least(
+                Coalesce(F('end_time'), Value(now, output_field=DateTimeField())),
+                Value(end, output_field=DateTimeField())
+            ),
+        ).annotate(
+            start_day=TruncDate('clipped_start'),
+            end_day=TruncDate('clipped_end'),
+        )
+
+        days = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+        # Starters and joined technicians, the latter one row per technician
+        sources = (
+            (queryset, 'technician_name', False),
+            (queryset.filter(joined_technicians__isnull=False), 'joined_technicians__technician_name', True),
+        )
+        for logs, technician_field, joined in sources:
+            single_day = logs.filter(start_day=F('end_day')).values(
+                'start_day', 'workstation_id', 'type', technician_field
+            ).annotate(
+                duration=Sum(ExpressionWrapper(
+                    F('clipped_end') - F('clipped_start'), output_field=DurationField()
+                )),
+                started=Count('id', filter=Q(start_time__gte=start))
+            ).order_by()
+            for row in single_day:
+                entry = days[row['start_day']][
+                    (row['workstation_id'], row['type'], row[technician_field], joined)
+                ]
+                entry[0] += row['duration'].total_seconds() if row['duration'] else 0.0
+                entry[1] += row['started']
+
+            spanning = logs.exclude(start_day=F('end_day')).values_list(
+                'workstation_id', 'type', technician_field, 'start_time', 'clipped_start', 'clipped_end'
+            )
+            for workstation_id, mtype, technician, started_at, clipped_start, clipped_end in spanning:
+                key = (workstation_id, mtype, technician, joined)
+                cursor = clipped_start
+                while cursor < clipped_end:
+                    day = timezone.localtime(cursor).date()
+                    _, day_end = cls._day_bounds(day)
+                    piece_end = min(day_end, clipped_end)
+                    days[day][key][0] += (piece_end - cursor).total_seconds()
+                    cursor = piece_end
+                if started_at >= start:
+                    days[timezone.localtime(started_at).date()][key][1] += 1
+        return days
+
+    @classmethod
+    def get_rows(cls, start, end, now=None) -> dict:
+        """Per-day downtime of a date window, closed days served from the cache."""
+        now = now or timezone.now()
+        today = timezone.localdate(now)
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        closed = [day for day in days if day < today]
+
+        keys = {day: cls.CACHE_KEY.format(day=day.isoformat()) for day in closed}
+        cached = cache.get_many(keys.values())
+        by_day = {day: cached[key] for day, key in keys.items() if key in cached}
+        missing = [day for day in closed if day not in by_day]
+        if missing:
+            queried = cls._query_days(min(missing), max(missing), now)
+            fresh = {day: dict(queried.get(day, {})) for day in missing}
+            cache.set_many(
+                {keys[day]: rows for day, rows in fresh.items()},
+                settings.MAINTENANCE_ANALYTICS_CACHE_TIMEOUT
+            )
+            by_day.update(fresh)
+        if start <= today <= end:
+            by_day[today] = dict(cls._query_days(today, today, now).get(today, {}))
+        return by_day
+
+    @classmethod
+    def invalidate(cls, start_time, end_time=None) -> None:
+        """Drop cached days touched by a log running from start_time to end_time (open when None)."""
+        first = timezone.localtime(start_time).date()
+        last = timezone.localtime(end_time).date() if end_time else timezone.localdate()
+        cache.delete_many([
+            cls.CACHE_KEY.format(day=(first + timedelta(days=n)).isoformat())
+            for n in range((last - first).days + 1)
+        ])
+
+    @classmethod
+    def get_downtime(cls, start=None, end=None) -> dict:
+        """
+        Downtime of all workstations over a date window (default: last 30 days).
+
+        MTTR is failure downtime per failure and MTBF the remaining time
+        of the window per failure, with failures being breakdown and
+        corrective logs that started in the window.
+
+        Returns {'start', 'end', 'window_hours', 'total_downtime_hours',
+        'workstations': [...], 'by_type', 'by_technician', 'by_day'}.
+        """
+        now = timezone.now()
+        end = end or timezone.localdate(now)
+        start = start or end - timedelta(days=29)
+        if start > end:
+            raise ValidationException('Start date must not be after end date', field='start')
+
+        window_start, _ = cls._day_bounds(start)
+        _, window_end = cls._day_bounds(end)
+        window_seconds = (min(window_end, now) - window_start).total_seconds()
+        window_seconds = max(window_seconds, 0.0)
+
+        stations = defaultdict(lambda: {'seconds': 0.0, 'events': 0, 'failures': 0,
+                                        'failure_seconds': 0.0, 'by_type': defaultdict(float)})
+        by_type = defaultdict(float)
+        by_technician = defaultdict(lambda: [0.0, 0])
+        by_day = {}
+        for day, rows in sorted(cls.get_rows(start, end, now).items()):
+            day_seconds = 0.0
+            for (workstation_id, mtype, technician, joined), (seconds, started) in rows.items():
+                by_technician[technician][0] += seconds
+                by_technician[technician][1] += started
+                if joined:
+                    continue
+                station = stations[workstation_id]
+                station['seconds'] += seconds
+                station['events'] += started
+                station['by_type'][mtype] += seconds
+                if mtype in cls.FAILURE_TYPES:
+                    station['failures'] += started
+                    station['failure_seconds'] += seconds
+                by_type[mtype] += seconds
+                day_seconds += seconds
+            by_day[day] = day_seconds
+
+        workstations = []
+        for workstation in Workstation.objects.values('id', 'number', 'name').order_by('number'):
+            station = stations.get(workstation['id'])
+            seconds = station['seconds'] if station else 0.0
+            failures = station['failures'] if station else 0
+            failure_seconds = station['failure_seconds'] if station else 0.0
+            workstations.append({
+                'workstation_id': workstation['id'],
+                'number': workstation['number'],
+                'name': workstation['name'],
+                'downtime_hours': round(seconds / 3600, 2),
+                'by_type': {
+                    mtype: round(value / 3600, 2)
+                    for mtype, value in (station['by_type'].items() if station else ())
+                },
+                'events': station['events'] if station else 0,
+                'failures': failures,
+                'mttr_hours': round(failure_seconds / failures / 3600, 2) if failures else None,
+                # Overlapping logs are summed, so keep the derived KPIs non-negative
+                'mtbf_hours': (
+                    round(max(window_seconds - failure_seconds, 0.0) / failures / 3600, 2)
+                    if failures else None
+                ),
+                'availability': (
+                    round(max(1 - seconds / window_seconds, 0.0) * 100, 2) if window_seconds else None
+                ),
+            })
+
+        return {
+            'start': start,
+            'end': end,
+            'window_hours': round(window_seconds / 3600, 2),
+            'total_downtime_hours': round(sum(by_day.values()) / 3600, 2),
+            'workstations': workstations,
+            'by_type': {mtype: round(value / 3600, 2) for mtype, value in sorted(by_type.items())},
+            'by_technician': [
+                {'technician': technician, 'hours': round(seconds / 3600, 2), 'events': events}
+                for technician, (seconds, events) in sorted(
+                    by_technician.items(), key=lambda item: -item[1][0]
+                )
+            ],
+            'by_day': [
+                {'day': day, 'hours': round(seconds / 3600, 2)} for day, seconds in sorted(by_day.items())
+            ],
+        }
+
+
+class ReliabilityService(BaseService):
+    """
+    Weibull reliability models of workstations and failure forecasts.
+
+    fit_all (management command fit_reliability) fits the time between
+    failures of every workstation in one vectorized pass and stores the
+    parameters; forecasts and scheduling risk checks only read them.
+    """
+    model = WorkstationReliability
+    CACHE_KEY = 'maintenance:reliability'
+
+    @classmethod
+    @transaction.atomic
+    def fit_all(cls) -> int:
+        """Refit all workstations with failures from one query. Returns the number fitted."""
+        failures = defaultdict(list)
+        repairs = defaultdict(list)
+        for workstation_id, start_time, end_time in MaintenanceLog.objects.filter(
+            type__in=DowntimeAnalyticsService.FAILURE_TYPES
+        ).order_by('workstation_id', 'start_time').values_list('workstation_id', 'start_time', 'end_time'):
+            failures[workstation_id].append(start_time)
+            if end_time:
+                repairs[workstation_id].append((end_time - start_time).total_seconds() / 3600)
+        if not failures:
+            return 0
+
+        workstation_ids = list(failures)
+        matrix = reliability.interval_matrix([
+            [moment.timestamp() / 3600 for moment in failures[workstation_id]]
+            for workstation_id in workstation_ids
+        ])
+        shape, scale, _ = reliability.fit_weibull(matrix)
+        mtbf = reliability.mean_life(shape, scale)
+
+        existing = {
+            row.workstation_id: row
+            for row in cls.get_queryset().filter(workstation_id__in=workstation_ids)
+        }
+        now = timezone.now()
+        created, changed = [], []
+        for index, workstation_id in enumerate(workstation_ids):
+            row = existing.get(workstation_id)
+            if row is None:
+                row = cls.model(workstation_id=workstation_id)
+                created.append(row)
+            else:
+                changed.append(row)
+            row.failure_count = len(failures[workstation_id])
+            row.shape = float(shape[index]) if np.isfinite(shape[index]) else None
+            row.scale_hours = float(scale[index]) if np.isfinite(scale[index]) else None
+            row.mtbf_hours = float(mtbf[index]) if np.isfinite(mtbf[index]) else None
+            times = repairs[workstation_id]
+            row.mttr_hours = sum(times) / len(times) if times else None
+            row.last_failure_at = failures[workstation_id][-1]
+            row.fitted_at = now
+
+        cls.model.objects.bulk_create(created)
+        cls.model.objects.bulk_update(changed, [
+            'failure_count', 'shape', 'scale_hours', 'mtbf_hours', 'mttr_hours',
+            'last_failure_at', 'fitted_at'
+        ])
+        transaction.on_commit(lambda: cache.delete(cls.CACHE_KEY))
+        return len(workstation_ids)
+
+    @classmethod
+    def get_models(cls) -> dict:
+        """Fitted models {workstation_id: (shape, scale_hours, last_failure_at)}, cached."""
+        models = cache.get(cls.CACHE_KEY)
+        if models is None:
+            models = {
+                workstation_id: (shape, scale, last_failure_at)
+                for workstation_id, shape, scale, last_failure_at in cls.get_queryset().filter(
+                    shape__isnull=False, scale_hours__isnull=False
+                ).values_list('workstation_id', 'shape', 'scale_hours', 'last_failure_at')
+            }
+            cache.set(cls.CACHE_KEY, models, settings.RELIABILITY_CACHE_TIMEOUT)
+        return models
+
+    @classmethod
+    def window_risk(cls, windows, now=None) -> np.ndarray:
+        """
+        Probability of a failure inside each (workstation_id, start, end)
+        window, given the workstation has run since its last failure.
+        Workstations without a model get 0.
+        """
+        now = now or timezone.now()
+        models = cls.get_models()
+        windows = list(windows)
+        risk = np.zeros(len(windows))
+        known = [i for i, (workstation_id, _, _) in enumerate(windows) if workstation_id in models]
+        if not known:
+            return risk
+
+        shape = np.array([models[windows[i][0]][0] for i in known])
+        scale = np.array([models[windows[i][0]][1] for i in known])
+        age = np.array([(now - models[windows[i][0]][2]).total_seconds() / 3600 for i in known])
+        start = np.array([max((windows[i][1] - now).total_seconds(), 0.0) / 3600 for i in known])
+        end = np.array([max((windows[i][2] - now).total_seconds(), 0.0) / 3600 for i in known])
+        survive_now = reliability.reliability(age, shape, scale)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probability = (
+                reliability.reliability(age + start, shape, scale)
+                - reliability.reliability(age + end, shape, scale)
+            ) / survive_now
+        risk[known] = np.clip(np.nan_to_num(probability, nan=1.0), 0.0, 1.0)
+        return risk
+
+    @classmethod
+    def forecast(cls, horizon_hours: float = 24, workstation_ids=None, now=None) -> list:
+        """
+        Failure forecast per modelled workstation.
+
+        Returns [{'workstation_id', 'number', 'name', 'failure_count', 'shape',
+        'scale_hours', 'mtbf_hours', 'mttr_hours', 'last_failure_at', 'age_hours',
+        'hazard_rate', 'failure_probability', 'next_failure': {'earliest',
+        'likely', 'latest'}}] sorted by failure_probability, highest first;
+        next_failure spans the 10%, 50% and 90% points of the remaining life.
+        """
+        now = now or timezone.now()
+        queryset = cls.get_queryset().filter(
+            shape__isnull=False, scale_hours__isnull=False
+        ).select_related('workstation')
+        if workstation_ids is not None:
+            queryset = queryset.filter(workstation_id__in=workstation_ids)
+        rows = list(queryset)
+        if not rows:
+            return []
+
+        shape = np.array([row.shape for row in rows])
+        scale = np.array([row.scale_hours for row in rows])
+        age = np.array([max((now - row.last_failure_at).total_seconds(), 0.0) / 3600 for row in rows])
+        hazard = reliability.hazard(age, shape, scale)
+        probability = reliability.failure_probability(age, horizon_hours, shape, scale)
+        quantiles = {
+            key: reliability.residual_quantile(age, p, shape, scale)
+            for key, p in (('earliest', 0.1), ('likely', 0.5), ('latest', 0.9))
+        }
+
+        forecasts = []
+        for index, row in enumerate(rows):
+            forecasts.append({
+                'workstation_id': row.workstation_id,
+                'number': row.workstation.number,
+                'name': row.workstation.name,
+                'failure_count': row.failure_count,
+                'shape': row.shape,
+                'scale_hours': row.scale_hours,
+                'mtbf_hours': row.mtbf_hours,
+                'mttr_hours': row.mttr_hours,
+                'last_failure_at': row.last_failure_at,
+                'age_hours': round(float(age[index]), 2),
+                'hazard_rate': float(hazard[index]),
+                'failure_probability': round(float(probability[index]), 4),
+                'next_failure': {
+                    key: now + timedelta(hours=float(values[index]))
+                    for key, values in quantiles.items()
+                },
+            })
+        forecasts.sort(key=lambda f: -f['failure_probability'])
+        return forecasts
+
+
+class PreventiveMaintenanceService(BaseService):
+    """
+    Preventive maintenance planning.
+
+    Turns maintenance plans into future windows for all workstations in
+    one batch: due dates are projected from the last preventive log and
+    the recent usage of the workstation (operating hours and cycles from
+    production counting), and each window is placed in a free gap of the
+    workstation's production schedule so production is not displaced.
+    """
+    model = MaintenancePlan
+
+    @classmethod
+    def _usage_since(cls, expression):
+        """Subquery summing production counting usage of a plan's workstation since its anchor."""
+        return Subquery(
+            ProductionCounting.objects.filter(
+                workstation=OuterRef('workstation'),
+                start_time__gte=OuterRef('anchor'),
+                end_time__isnull=False
+            ).values('workstation').annotate(total=Sum(expression)).values('total')
+        )
+
+    @classmethod
+    def _usage_rates(cls, workstation_ids, since, now) -> dict:
+        """Operating hours and cycles per calendar hour {workstation_id: (hours, cycles)}."""
+        rows = ProductionCounting.objects.filter(
+            workstation_id__in=workstation_ids,
+            start_time__gte=since,
+            end_time__isnull=False
+        ).values('workstation_id').annotate(
+            duration=Sum(ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField())),
+            cycles=Sum(F('done_quantity') + F('rejected_quantity'))
+        ).order_by()
+        window = (now - since).total_seconds() / 3600
+        return {
+            row['workstation_id']: (
+                (row['duration'].total_seconds() / 3600 if row['duration'] else 0.0) / window,
+                float(row['cycles'] or 0) / window
+            )
+            for row in rows
+        }
+
+    @classmethod
+    def _timelines(cls, workstation_ids, now, horizon_end) -> dict:
+        """Busy timeline per workstation: schedule items, maintenance logs and kept windows."""
+        busy = defaultdict(list)
+        busy.update({workstation_id: [] for workstation_id in workstation_ids})
+        scheduled = Scheduling.objects.filter(
+            component__operation__workstations__in=workstation_ids,
+            planned_end__gt=now,
+            planned_start__lt=horizon_end
+        ).values_list('component__operation__workstations', 'planned_start', 'planned_end')
+        logs = MaintenanceService.overlapping(now, horizon_end).filter(
+            workstation_id__in=workstation_ids, end_time__isnull=False
+        ).values_list('workstation_id', 'start_time', 'end_time')
+        windows = MaintenanceWindow.objects.filter(
+            workstation_id__in=workstation_ids,
+            status='planned',
+            planned_end__gt=now,
+            planned_start__lt=horizon_end
+        ).values_list('workstation_id', 'planned_start', 'planned_end')
+        for rows in (scheduled, logs, windows):
+            for workstation_id, start, end in rows:
+                busy[workstation_id].append((start, end))
+        return {workstation_id: Timeline(intervals) for workstation_id, intervals in busy.items()}
+
+    @classmethod
+    @transaction.atomic
+    def plan(cls, horizon_days: int = None, workstation_ids=None, now=None) -> dict:
+        """
+        Replan the preventive maintenance windows of the next `horizon_days`.
+
+        Future windows still in status planned are replaced; windows that
+        already started, are done or cancelled are kept and block their
+        slot. A window is placed at the latest free slot before its due
+        time (at most PM_EARLY_TOLERANCE of the interval early), otherwise
+        at the first free slot after it. Usage-based plans of workstations
+        without recent production are skipped.
+
+        Returns {'plans', 'windows', 'late', 'skipped', 'horizon_end'}.
+        """
+        now = now or timezone.now()
+        horizon_end = now + timedelta(days=horizon_days or settings.PM_PLANNING_HORIZON_DAYS)
+
+        last_preventive = MaintenanceLog.objects.filter(
+            workstation=OuterRef('workstation'), type='preventive'
+        ).annotate(
+            finished=Coalesce('end_time', 'start_time')
+        ).order_by('-start_time').values('finished')[:1]
+        plans = cls.get_queryset().filter(active=True)
+        if workstation_ids is not None:
+            plans = plans.filter(workstation_id__in=workstation_ids)
+        plans = list(plans.annotate(
+            anchor=Coalesce(Subquery(last_preventive), 'created_at')
+        ).annotate(
+            used_hours=cls._usage_since(ExpressionWrapper(
+                F('end_time') - F('start_time'), output_field=DurationField()
+            )),
+            used_cycles=cls._usage_since(F('done_quantity') + F('rejected_quantity')),
+        ).order_by('workstation_id', 'id'))
+
+        scope = cls.get_queryset() if workstation_ids is None else cls.get_queryset().filter(
+            workstation_id__in=workstation_ids
+        )
+        MaintenanceWindow.objects.filter(
+            plan__in=scope, status='planned', planned_start__gte=now
+        ).delete()
+        if not plans:
+            return {'plans': 0, 'windows': 0, 'late': 0, 'skipped': 0, 'horizon_end': horizon_end}
+
+        plan_workstations = {plan.workstation_id for plan in plans}
+        rates = cls._usage_rates(
+            plan_workstations, now - timedelta(days=settings.PM_USAGE_LOOKBACK_DAYS), now
+        )
+        timelines = cls._timelines(plan_workstations, now, horizon_end)
+
+        # (due, plan index, period) per workstation, periods in calendar hours
+        queues = defaultdict(list)
+        skipped = 0
+        for index, plan in enumerate(plans):
+            interval = float(plan.interval)
+            if plan.trigger == 'calendar':
+                period = interval * 24
+                due = plan.anchor + timedelta(hours=period)
+            else:
+                hours_rate, cycles_rate = rates.get(plan.workstation_id, (0.0, 0.0))
+                if plan.trigger == 'operating_hours':
+                    rate = hours_rate
+                    used = plan.used_hours.total_seconds() / 3600 if plan.used_hours else 0.0
+                else:
+                    rate = cycles_rate
+                    used = float(plan.used_cycles or 0)
+                if rate <= 0:
+                    skipped += 1
+                    continue
+                period = interval / rate
+                due = now + timedelta(hours=max(interval - used, 0.0) / rate)
+            queues[plan.workstation_id].append((due, index, period))
+
+        windows = []
+        late = 0
+        for workstation_id, queue in queues.items():
+            timeline = timelines[workstation_id]
+            heapq.heapify(queue)
+            while queue:
+                due, index, period = heapq.heappop(queue)
+                if due >= horizon_end:
+                    continue
+                plan = plans[index]
+                duration = timedelta(minutes=plan.duration_minutes)
+                start = None
+                if due > now:
+                    earliest = max(now, due - timedelta(hours=period * settings.PM_EARLY_TOLERANCE))
+                    start = timeline.latest_fit(due, earliest, duration)
+                if start is None:
+                    start = timeline.earliest_fit(max(due, now), duration)
+                if start >= horizon_end:
+                    continue
+                timeline.reserve(start, start + duration)
+                late += start > due
+                windows.append(MaintenanceWindow(
+                    plan=plan,
+                    workstation_id=workstation_id,
+                    due_at=due,
+                    planned_start=start,
+                    planned_end=start + duration,
+                ))
+                # Servicing resets the counter, so the next one is due a period later
+                heapq.heappush(queue, (start + duration + timedelta(hours=period), index, period))
+
+        MaintenanceWindow.objects.bulk_create(windows, batch_size=1000)
+        # Bulk writes bypass the model signals
+        transaction.on_commit(AvailabilityService.invalidate)
+        return {
+            'plans': len(plans),
+            'windows': len(windows),
+            'late': late,
+            'skipped': skipped,
+            'horizon_end': horizon_end,
+        }
+
+
+class AvailabilityService(BaseService):
+    """
+    Maintenance availability mask of the workstations.
+
+    For every workstation with upcoming maintenance, a Timeline of the
+    intervals it is down: open maintenance logs (until their expected
+    end), logs booked in the future and planned preventive windows.
+    The mask is cached and dropped whenever a log or window is saved or
+    deleted (see signals).
+    """
+    model = MaintenanceLog
+    CACHE_KEY = 'maintenance:availability'
+
+    @classmethod
+    def _expected_durations(cls) -> dict:
+        """Average completed duration {(workstation_id, type): timedelta} from history."""
+        return {
+            (row['workstation_id'], row['type']): row['duration']
+            for row in cls.get_queryset().filter(end_time__isnull=False).values(
+                'workstation_id', 'type'
+            ).annotate(
+                duration=Avg(ExpressionWrapper(F('end_time') - F('start_time'), output_field=DurationField()))
+            ).order_by()
+        }
+
+    @classmethod
+    def build_mask(cls, now=None) -> dict:
+        """
+        Unavailable intervals {workstation_id: Timeline} from now on.
+
+        An open log is expected to last as long as the workstation's past
+        logs of the same type (MAINTENANCE_EXPECTED_MINUTES without
+        history); one already running longer is assumed to need that
+        long again from now.
+        """
+        now = now or timezone.now()
+        fallback = timedelta(minutes=settings.MAINTENANCE_EXPECTED_MINUTES)
+        busy = defaultdict(list)
+
+        open_logs = list(MaintenanceService.get_active_maintenance().values_list(
+            'workstation_id', 'type', 'start_time'
+        ))
+        expected = cls._expected_durations() if open_logs else {}
+        for workstation_id, mtype, start in open_logs:
+            duration = expected.get((workstation_id, mtype)) or fallback
+            end = start + duration
+            if end <= now:
+                end = now + duration
+            busy[workstation_id].append((start, end))
+
+        booked = cls.get_queryset().filter(end_time__gt=now).values_list(
+            'workstation_id', 'start_time', 'end_time'
+        )
+        windows = MaintenanceWindow.objects.filter(
+            status='planned', planned_end__gt=now
+        ).values_list('workstation_id', 'planned_start', 'planned_end')
+        for rows in (booked, windows):
+            for workstation_id, start, end in rows:
+                busy[workstation_id].append((start, end))
+        return {workstation_id: Timeline(intervals) for workstation_id, intervals in busy.items()}
+
+    @classmethod
+    def get_mask(cls) -> dict:
+        """Cached availability mask {workstation_id: Timeline}."""
+        mask = cache.get(cls.CACHE_KEY)
+        if mask is None:
+            mask = cls.build_mask()
+            cache.set(cls.CACHE_KEY, mask, settings.MAINTENANCE_AVAILABILITY_CACHE_TIMEOUT)
+        return mask
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cache.delete(cls.CACHE_KEY)
+
+    @classmethod
+    def next_free(cls, workstation_ids, after, duration, mask=None):
+        """
+        Earliest start >= after at which any of the workstations is free of
+        maintenance for `duration` (a timedelta). Found by bisecting each
+        workstation's timeline; workstations without maintenance are free.
+        """
+        mask = cls.get_mask() if mask is None else mask
+        starts = [
+            mask[workstation_id].earliest_fit(after, duration) if workstation_id in mask else after
+            for workstation_id in workstation_ids
+        ]
+        return min(starts, default=after)
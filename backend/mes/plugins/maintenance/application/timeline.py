@@ -0,0 +1,60 @@
+"""
+Workstation timelines.
+
+Busy intervals of one workstation (production schedule items, maintenance)
+merged into sorted, non-overlapping lists so free gaps can be found with
+binary search instead of scanning every schedule item.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class Timeline:
+    """Merged busy intervals [start, end) of a single resource."""
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_free(self, start, end) -> bool:
+        """True when [start, end) does not touch any busy interval."""
+        index = bisect_left(self.starts, end) - 1
+        return index < 0 or self.ends[index] <= start
+
+    def earliest_fit(self, after, duration):
+        """Earliest start >= after of a free slot of the given length."""
+        start = after
+        index = bisect_right(self.starts, start) - 1
+        if index >= 0 and self.ends[index] > start:
+            start = self.ends[index]
+        for i in range(index + 1, len(self.starts)):
+            if self.starts[i] >= start + duration:
+                break
+            start = max(start, self.ends[i])
+        return start
+
+    def latest_fit(self, before, not_before, duration):
+        """Latest start in [not_before, before] of a free slot, or None."""
+        start = before
+        while start >= not_before:
+            index = bisect_left(self.starts, start + duration) - 1
+            if index < 0 or self.ends[index] <= start:
+                return start
+            start = self.starts[index] - duration
+        return None
+
+    def reserve(self, start, end) -> None:
+        """Mark a free slot as busy."""
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
@@ -5,3 +5,6 @@ class MaintenanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mes.plugins.maintenance'
     label = 'maintenance'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,3 +1,5 @@
+from decimal import Decimal
+from django.core.validators import MinValueValidator
 from django.db import models
 from mes.plugins.basic.domain.models import Workstation
 
@@ -19,6 +21,19 @@ class MaintenanceLog(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['workstation', 'end_time']),
+        ]
+        constraints = [
+            # At most one open (running) maintenance per workstation
+            models.UniqueConstraint(
+                fields=['workstation'],
+                condition=models.Q(end_time__isnull=True),
+                name='maintenance_one_open_log_per_workstation'
+            ),
+        ]
+
     def __str__(self):
         return f"{self.workstation.name} - {self.type} ({self.start_time.date()})"
 
@@ -28,3 +43,113 @@ class MaintenanceLog(models.Model):
             diff = self.end_time - self.start_time
             return round(diff.total_seconds() / 3600, 2)
         return 0
+
+
+class MaintenanceLogTechnician(models.Model):
+    """Technician who joined a running maintenance.
+    The technician who started it stays in MaintenanceLog.technician_name.
+    """
+    log = models.ForeignKey(
+        MaintenanceLog, on_delete=models.CASCADE, related_name='joined_technicians')
+    technician_name = models.CharField(max_length=255)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('log', 'technician_name')
+        indexes = [
+            models.Index(fields=['technician_name']),
+        ]
+
+    def __str__(self):
+        return f"{self.technician_name} ({self.log_id})"
+
+
+class WorkstationReliability(models.Model):
+    """Fitted Weibull model of the time between breakdowns of a workstation.
+    Refreshed by the fit_reliability batch job; forecasts are derived from it.
+    """
+    workstation = models.OneToOneField(
+        Workstation, on_delete=models.CASCADE, related_name='reliability')
+    failure_count = models.PositiveIntegerField(default=0)
+    shape = models.FloatField(null=True, blank=True)
+    scale_hours = models.FloatField(null=True, blank=True)
+    mtbf_hours = models.FloatField(null=True, blank=True)
+    mttr_hours = models.FloatField(null=True, blank=True)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    fitted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Workstation Reliability"
+        verbose_name_plural = "Workstation Reliability"
+
+    def __str__(self):
+        return f"{self.workstation.name}: shape={self.shape} scale={self.scale_hours}h"
+
+
+class MaintenancePlan(models.Model):
+    """Preventive maintenance plan of a workstation.
+    Service is due every `interval` days, operating hours or counted cycles
+    (depending on the trigger) after the last preventive maintenance.
+    """
+    TRIGGER_CHOICES = [
+        ('calendar', 'Calendar days'),
+        ('operating_hours', 'Operating hours'),
+        ('cycles', 'Cycles'),
+    ]
+
+    workstation = models.ForeignKey(
+        Workstation, on_delete=models.CASCADE, related_name='maintenance_plans')
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES, default='calendar')
+    interval = models.DecimalField(
+        max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    duration_minutes = models.PositiveIntegerField(default=60, validators=[MinValueValidator(1)])
+    technician_name = models.CharField(max_length=255, blank=True)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Maintenance Plan"
+        verbose_name_plural = "Maintenance Plans"
+        ordering = ['workstation', 'name']
+
+    def __str__(self):
+        return f"{self.workstation.name} - {self.name} (every {self.interval} {self.trigger})"
+
+
+class MaintenanceWindow(models.Model):
+    """Planned preventive maintenance slot generated from a plan.
+    Placed in a gap of the workstation's production schedule.
+    """
+    STATUS_CHOICES = [
+        ('planned', 'Planned'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    plan = models.ForeignKey(MaintenancePlan, on_delete=models.CASCADE, related_name='windows')
+    workstation = models.ForeignKey(
+        Workstation, on_delete=models.CASCADE, related_name='maintenance_windows')
+    due_at = models.DateTimeField()
+    planned_start = models.DateTimeField()
+    planned_end = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planned')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Maintenance Window"
+        verbose_name_plural = "Maintenance Windows"
+        ordering = ['workstation', 'planned_start']
+        indexes = [
+            models.Index(fields=['workstation', 'planned_start']),
+            models.Index(fields=['plan', 'status', 'planned_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.workstation.name} - {self.plan.name} ({self.planned_start})"
+
+    @property
+    def late(self):
+        return self.planned_start > self.due_at
@@ -0,0 +1,28 @@
+"""
+Refit the Weibull reliability models of all workstations.
+
+Schedule it from cron (e.g. nightly) so failure forecasts and the
+scheduling risk check use up-to-date parameters.
+"""
+from django.core.management.base import BaseCommand
+
+from mes.plugins.maintenance.application.services import ReliabilityService
+
+
+class Command(BaseCommand):
+    help = 'Fit time-between-failure models of all workstations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon', type=float, default=24,
+            help='Forecast horizon in hours for the printed summary (default 24).'
+        )
+
+    def handle(self, *args, **options):
+        fitted = ReliabilityService.fit_all()
+        for forecast in ReliabilityService.forecast(horizon_hours=options['horizon'])[:10]:
+            self.stdout.write(
+                f"{forecast['number']}: {forecast['failure_probability']:.1%} failure risk "
+                f"in {options['horizon']:g}h, MTBF {forecast['mtbf_hours'] or 0:.1f}h"
+            )
+        self.stdout.write(self.style.SUCCESS(f'{fitted} workstations fitted.'))
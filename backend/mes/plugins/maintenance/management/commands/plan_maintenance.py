@@ -0,0 +1,27 @@
+"""
+Replan preventive maintenance windows.
+
+Schedule it from cron (e.g. nightly, after the production schedule is
+updated) so windows follow the current schedule gaps and usage.
+"""
+from django.core.management.base import BaseCommand
+
+from mes.plugins.maintenance.application.services import PreventiveMaintenanceService
+
+
+class Command(BaseCommand):
+    help = 'Generate preventive maintenance windows from the maintenance plans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Planning horizon in days (default PM_PLANNING_HORIZON_DAYS).'
+        )
+
+    def handle(self, *args, **options):
+        result = PreventiveMaintenanceService.plan(horizon_days=options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['windows']} windows planned for {result['plans']} plans until "
+            f"{result['horizon_end']:%Y-%m-%d} ({result['late']} late, "
+            f"{result['skipped']} plans without recent usage)."
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2 on 2026-10-19 13:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("basic", "0002_workstation_production_line"),
+        ("maintenance", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkstationReliability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("failure_count", models.PositiveIntegerField(default=0)),
+                ("shape", models.FloatField(blank=True, null=True)),
+                ("scale_hours", models.FloatField(blank=True, null=True)),
+                ("mtbf_hours", models.FloatField(blank=True, null=True)),
+                ("mttr_hours", models.FloatField(blank=True, null=True)),
+                ("last_failure_at", models.DateTimeField(blank=True, null=True)),
+                ("fitted_at", models.DateTimeField(auto_now=True)),
+                (
+                    "workstation",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reliability",
+                        to="basic.workstation",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Workstation Reliability",
+                "verbose_name_plural": "Workstation Reliability",
+            },
+        ),
+    ]
@@ -0,0 +1,143 @@
+# Generated by Django 4.2 on 2026-10-19 13:56
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("basic", "0002_workstation_production_line"),
+        ("maintenance", "0002_workstation_reliability"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaintenancePlan",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField(blank=True)),
+                (
+                    "trigger",
+                    models.CharField(
+                        choices=[
+                            ("calendar", "Calendar days"),
+                            ("operating_hours", "Operating hours"),
+                            ("cycles", "Cycles"),
+                        ],
+                        default="calendar",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "interval",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        validators=[
+                            django.core.validators.MinValueValidator(Decimal("0.01"))
+                        ],
+                    ),
+                ),
+                (
+                    "duration_minutes",
+                    models.PositiveIntegerField(
+                        default=60,
+                        validators=[django.core.validators.MinValueValidator(1)],
+                    ),
+                ),
+                ("technician_name", models.CharField(blank=True, max_length=255)),
+                ("active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "workstation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="maintenance_plans",
+                        to="basic.workstation",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Maintenance Plan",
+                "verbose_name_plural": "Maintenance Plans",
+                "ordering": ["workstation", "name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="MaintenanceWindow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("due_at", models.DateTimeField()),
+                ("planned_start", models.DateTimeField()),
+                ("planned_end", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("planned", "Planned"),
+                            ("done", "Done"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        default="planned",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="windows",
+                        to="maintenance.maintenanceplan",
+                    ),
+                ),
+                (
+                    "workstation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="maintenance_windows",
+                        to="basic.workstation",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Maintenance Window",
+                "verbose_name_plural": "Maintenance Windows",
+                "ordering": ["workstation", "planned_start"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="maintenancewindow",
+            index=models.Index(
+                fields=["workstation", "planned_start"],
+                name="maintenance_worksta_c93b4e_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancewindow",
+            index=models.Index(
+                fields=["plan", "status", "planned_start"],
+                name="maintenance_plan_id_feefb0_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+def close_duplicate_open_logs(apps, schema_editor):
+    """Close all but the latest open log of a workstation when the next one started."""
+    MaintenanceLog = apps.get_model('maintenance', 'MaintenanceLog')
+    open_logs = MaintenanceLog.objects.filter(end_time__isnull=True).order_by('workstation_id', '-start_time')
+    latest = {}
+    for log in open_logs:
+        if log.workstation_id in latest:
+            log.end_time = max(latest[log.workstation_id], log.start_time)
+            log.save(update_fields=['end_time'])
+        latest[log.workstation_id] = log.start_time
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("maintenance", "0003_maintenance_plans"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="maintenancelog",
+            index=models.Index(
+                fields=["workstation", "end_time"],
+                name="maintenance_worksta_9170d7_idx",
+            ),
+        ),
+        migrations.RunPython(close_duplicate_open_logs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="maintenancelog",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("end_time__isnull", True)),
+                fields=("workstation",),
+                name="maintenance_one_open_log_per_workstation",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2 on 2026-10-19 14:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def split_joined_technicians(apps, schema_editor):
+    """Move technicians appended as 'Starter, Joiner, ...' into their own rows."""
+    MaintenanceLog = apps.get_model('maintenance', 'MaintenanceLog')
+    MaintenanceLogTechnician = apps.get_model('maintenance', 'MaintenanceLogTechnician')
+    for log in MaintenanceLog.objects.filter(technician_name__contains=', '):
+        names = [name.strip() for name in log.technician_name.split(', ') if name.strip()]
+        if len(names) < 2:
+            continue
+        log.technician_name = names[0]
+        log.save(update_fields=['technician_name'])
+        joined = {}
+        for name in names[1:]:
+            joined.setdefault(name.lower(), name)
+        MaintenanceLogTechnician.objects.bulk_create([
+            MaintenanceLogTechnician(log=log, technician_name=name)
+            for key, name in joined.items() if key != names[0].lower()
+        ])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("maintenance", "0004_one_open_log_per_workstation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MaintenanceLogTechnician",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("technician_name", models.CharField(max_length=255)),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "log",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="joined_technicians",
+                        to="maintenance.maintenancelog",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="maintenancelogtechnician",
+            index=models.Index(
+                fields=["technician_name"], name="maintenance_technic_dc8025_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="maintenancelogtechnician",
+            unique_together={("log", "technician_name")},
+        ),
+        migrations.RunPython(split_joined_technicians, migrations.RunPython.noop),
+    ]
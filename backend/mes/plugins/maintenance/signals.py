@@ -0,0 +1,37 @@
+"""
+Maintenance signals.
+
+Any saved or deleted maintenance log or window changes when workstations
+are down, so the cached availability mask used by scheduling is dropped
+once the transaction commits. Logs also drop the cached downtime days
+they cover, before and after the change.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .application.services import AvailabilityService, DowntimeAnalyticsService
+from .domain.models import MaintenanceLog, MaintenanceWindow
+
+
+@receiver([post_save, post_delete], sender=MaintenanceLog)
+@receiver([post_save, post_delete], sender=MaintenanceWindow)
+def invalidate_availability(sender, **kwargs):
+    transaction.on_commit(AvailabilityService.invalidate)
+
+
+@receiver(pre_save, sender=MaintenanceLog)
+def invalidate_previous_downtime(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {'start_time', 'end_time'} & set(update_fields):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('start_time', 'end_time').first()
+    if previous:
+        transaction.on_commit(lambda: DowntimeAnalyticsService.invalidate(*previous))
+
+
+@receiver([post_save, post_delete], sender=MaintenanceLog)
+def invalidate_downtime(sender, instance, **kwargs):
+    start_time, end_time = instance.start_time, instance.end_time
+    transaction.on_commit(lambda: DowntimeAnalyticsService.invalidate(start_time, end_time))
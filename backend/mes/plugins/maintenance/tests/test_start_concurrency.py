@@ -0,0 +1,69 @@
+import threading
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.base.exceptions import BusinessRuleException
+from mes.plugins.basic.domain.models import Workstation
+from mes.plugins.maintenance.application import MaintenanceService
+from mes.plugins.maintenance.models import MaintenanceLog
+
+TECHNICIANS = 20
+
+
+def run_parallel(target, count=TECHNICIANS):
+    """Run target(i) in `count` threads at once; returns {i: result or exception}."""
+    results = {}
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        except Exception as exc:
+            results[i] = exc
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class StartMaintenanceConcurrencyTests(TransactionTestCase):
+    """Parallel starts on one workstation leave exactly one open log."""
+
+    def setUp(self):
+        self.workstation = Workstation.objects.create(number='WS-1', name='Press')
+
+    def open_logs(self):
+        return MaintenanceLog.objects.filter(workstation=self.workstation, end_time__isnull=True)
+
+    def test_parallel_start_maintenance(self):
+        results = run_parallel(lambda i: MaintenanceService.start_maintenance(
+            self.workstation.id, 'breakdown', 'Hydraulic leak', f'Technician {i}'
+        ))
+
+        started = [result for result in results.values() if isinstance(result, MaintenanceLog)]
+        rejected = [result for result in results.values() if isinstance(result, BusinessRuleException)]
+        self.assertEqual(len(started), 1)
+        self.assertEqual(len(rejected), TECHNICIANS - 1)
+        self.assertTrue(all(exc.code == 'BUSINESS_RULE_ACTIVE_MAINTENANCE_EXISTS' for exc in rejected))
+        self.assertEqual(self.open_logs().count(), 1)
+
+    def test_parallel_start_or_join(self):
+        results = run_parallel(lambda i: MaintenanceService.start_or_join(
+            self.workstation.id, 'breakdown', 'Hydraulic leak', f'Technician {i}'
+        ))
+
+        errors = [result for result in results.values() if isinstance(result, Exception)]
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(created for _, created in results.values()), 1)
+        self.assertEqual(self.open_logs().count(), 1)
+
+        log = self.open_logs().get()
+        technicians = {log.technician_name, *log.joined_technicians.values_list('technician_name', flat=True)}
+        self.assertEqual(technicians, {f'Technician {i}' for i in range(TECHNICIANS)})
@@ -24,3 +24,11 @@ class ProductionCountingSerializer(serializers.ModelSerializer):
         if obj.operator_id:
             return f"{obj.operator.name} {obj.operator.surname}"
         return None
+
+
+class StopProductionSerializer(serializers.Serializer):
+    produced_quantity = serializers.DecimalField(max_digits=12, decimal_places=5, min_value=0, required=False)
+    scrap_quantity = serializers.DecimalField(max_digits=12, decimal_places=5, min_value=0, required=False)
+    consume_materials = serializers.BooleanField(default=False)
+    finished_good_batch = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    strategy = serializers.ChoiceField(choices=['fefo', 'fifo'], default='fefo')
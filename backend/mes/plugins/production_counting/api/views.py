@@ -2,9 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Sum, F
+from core.base.exceptions import DomainException
 from ..domain.models import ProductionCounting
-from .serializers import ProductionCountingSerializer
+from ..application.services import ProductionCountingService
+from .serializers import ProductionCountingSerializer, StopProductionSerializer
 from mes.plugins.orders.domain.models import Order
 
 
@@ -119,19 +122,44 @@ class ProductionCountingViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def stop(self, request, pk=None):
+        """Complete a production record.
+
+        Body: {"produced_quantity": 10, "scrap_quantity": 0,
+               "consume_materials": true, "finished_good_batch": "B-1",
+               "strategy": "fefo"}
+        With consume_materials the operation's inputs are drawn from stock
+        and traceability records are written in the same transaction.
+        Stopping a completed record again returns it unchanged, with the
+        consumption recorded for it when consume_materials is set.
+        """
         record = self.get_object()
-        produced = request.data.get('produced_quantity')
-        scrap = request.data.get('scrap_quantity')
-        from django.utils import timezone
-        if produced is not None:
-            record.done_quantity = produced
-        if scrap is not None:
-            record.rejected_quantity = scrap
-        record.end_time = timezone.now()
-        record.status = 'completed'
-        record.save()
-        self._update_order_done_quantity(record.order)
-        return Response(self.get_serializer(record).data)
+        serializer = StopProductionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            with transaction.atomic():
+                record = ProductionCountingService.complete_production(
+                    record,
+                    done_quantity=data.get('produced_quantity'),
+                    rejected_quantity=data.get('scrap_quantity'),
+                    consume_materials=data['consume_materials'],
+                    finished_good_batch=data.get('finished_good_batch') or None,
+                    strategy=data['strategy']
+                )
+                self._update_order_done_quantity(record.order)
+        except DomainException as exc:
+            return Response({'error': exc.message, 'code': exc.code}, status=status.HTTP_400_BAD_REQUEST)
+        response = self.get_serializer(record).data
+        if record.consumption is not None:
+            response['consumption'] = {
+                'finished_good_batch': record.consumption['finished_good_batch'],
+                'record_count': record.consumption['record_count'],
+                'allocations': [
+                    {**a, 'quantity': str(a['quantity'])}
+                    for a in record.consumption['allocations']
+                ],
+            }
+        return Response(response)
 
     @action(detail=True, methods=['post'])
     def report(self, request, pk=None):
@@ -114,7 +114,7 @@ class ProductionCountingService(StatefulService):
 
         record.done_quantity = done_quantity
         record.rejected_quantity = rejected_quantity
-        record.save(update_fields=['done_quantity', 'rejected_quantity', 'updated_at'])
+        record.save(update_fields=['done_quantity', 'rejected_quantity'])
         return record
 
     @classmethod
@@ -123,13 +123,32 @@ class ProductionCountingService(StatefulService):
         cls,
         record: ProductionCounting,
         done_quantity: Decimal = None,
-        rejected_quantity: Decimal = None
+        rejected_quantity: Decimal = None,
+        consume_materials: bool = False,
+        finished_good_batch: str = None,
+        strategy: str = 'fefo'
     ) -> ProductionCounting:
         """
         Complete a production counting record.
 
-        Records end time and optionally updates final quantities.
+        Records end time and optionally updates final quantities. With
+        consume_materials the operation's BOM inputs for the done quantity
+        are drawn from stock and recorded as traceability in the same
+        transaction; the result is kept on record.consumption.
+
+        Completing an already completed record changes nothing; with
+        consume_materials the consumption recorded earlier is reported.
         """
+        if record.status == 'completed':
+            record.consumption = None
+            if consume_materials:
+                from mes.plugins.inventory.application.services import TraceabilityService
+                record.consumption = TraceabilityService.get_recorded_consumption(
+                    record,
+                    finished_good_batch=finished_good_batch
+                )
+            return record
+
         if done_quantity is not None:
             record.done_quantity = done_quantity
         if rejected_quantity is not None:
@@ -138,8 +157,17 @@ class ProductionCountingService(StatefulService):
         record.end_time = timezone.now()
         record.status = 'completed'
         record.save(update_fields=[
-            'done_quantity', 'rejected_quantity', 'end_time', 'status', 'updated_at'
+            'done_quantity', 'rejected_quantity', 'end_time', 'status'
         ])
+
+        record.consumption = None
+        if consume_materials:
+            from mes.plugins.inventory.application.services import TraceabilityService
+            record.consumption = TraceabilityService.consume_for_production(
+                record,
+                finished_good_batch=finished_good_batch,
+                strategy=strategy
+            )
         return record
 
     @classmethod
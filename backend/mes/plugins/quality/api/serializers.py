@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from ..domain.models import InspectionConfig, QualityCheck, NCR, SPCData
+from ..domain.models import InspectionConfig, QualityCheck, NCR, SPCData, SPCBaseline
 
 
 class InspectionConfigSerializer(serializers.ModelSerializer):
@@ -9,6 +9,7 @@ class InspectionConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = InspectionConfig
         fields = '__all__'
+        read_only_fields = ('nominal', 'lower_limit', 'upper_limit', 'unit')
 
 
 class QualityCheckSerializer(serializers.ModelSerializer):
@@ -18,6 +19,36 @@ class QualityCheckSerializer(serializers.ModelSerializer):
     class Meta:
         model = QualityCheck
         fields = '__all__'
+        read_only_fields = ('passed', 'ncr')
+
+
+class QualityResultLineSerializer(serializers.Serializer):
+    """One measured result to score against its inspection config"""
+    config = serializers.IntegerField()
+    result_value = serializers.CharField(max_length=100, allow_blank=True)
+
+
+class QualityEvaluateSerializer(serializers.Serializer):
+    """Serializer for bulk evaluation of check results"""
+    results = QualityResultLineSerializer(many=True, allow_empty=False, max_length=50000)
+
+
+class QualityCheckLineSerializer(QualityResultLineSerializer):
+    """One result of a batch; order_number overrides the batch default"""
+    order_number = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class QualityCheckBatchSerializer(serializers.Serializer):
+    """Serializer for recording a batch of check results"""
+    order_number = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    inspector_name = serializers.CharField(max_length=255)
+    results = QualityCheckLineSerializer(many=True, allow_empty=False, max_length=50000)
+
+
+class QualityAnalyticsQuerySerializer(serializers.Serializer):
+    """Date window of the quality analytics"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
 
 
 class NCRSerializer(serializers.ModelSerializer):
@@ -32,3 +63,64 @@ class SPCDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = SPCData
         fields = '__all__'
+
+
+class SPCBaselineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SPCBaseline
+        fields = '__all__'
+
+
+class SPCAnalyzeSerializer(serializers.Serializer):
+    """Query parameters of a control chart analysis"""
+    parameter_name = serializers.CharField(max_length=100)
+    machine_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(min_value=2, max_value=100000, default=1000)
+    chart_type = serializers.ChoiceField(choices=SPCBaseline.CHART_TYPES, required=False)
+
+
+class SPCFreezeBaselineSerializer(serializers.Serializer):
+    """Serializer for freezing control limits from a baseline period"""
+    parameter_name = serializers.CharField(max_length=100)
+    machine_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    chart_type = serializers.ChoiceField(choices=SPCBaseline.CHART_TYPES, default='imr')
+    subgroup_size = serializers.IntegerField(min_value=1, max_value=25, default=1)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=2, required=False)
+
+    def validate(self, attrs):
+        if attrs['chart_type'] in ('xbar_r', 'xbar_s') and attrs['subgroup_size'] < 2:
+            raise serializers.ValidationError(
+                {'subgroup_size': 'Subgroup charts need a subgroup size of at least 2.'})
+        if attrs['chart_type'] not in ('xbar_r', 'xbar_s'):
+            attrs['subgroup_size'] = 1
+        return attrs
+
+
+class SPCCheckSerializer(serializers.Serializer):
+    """Serializer for checking a single measurement against control rules"""
+    parameter_name = serializers.CharField(max_length=100)
+    value = serializers.DecimalField(max_digits=10, decimal_places=4)
+    machine_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
+
+class SPCEvaluateSerializer(serializers.Serializer):
+    """Serializer for the baseline evaluation batch job"""
+    points = serializers.IntegerField(min_value=2, max_value=100000, default=1000)
+
+
+class SPCHistorySerializer(serializers.Serializer):
+    """Query parameters of a long-window SPC history"""
+    RESOLUTIONS = ['auto', 'raw', 'minute', 'hour']
+
+    parameter_name = serializers.CharField(max_length=100)
+    machine_id = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    resolution = serializers.ChoiceField(choices=RESOLUTIONS, default='auto')
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': 'End must not be before start.'})
+        return attrs
@@ -1,10 +1,11 @@
 from rest_framework.routers import DefaultRouter
-from .views import InspectionConfigViewSet, QualityCheckViewSet, NCRViewSet, SPCDataViewSet
+from .views import InspectionConfigViewSet, QualityCheckViewSet, NCRViewSet, SPCDataViewSet, SPCBaselineViewSet
 
 router = DefaultRouter()
 router.register(r'inspection-config', InspectionConfigViewSet)
 router.register(r'checks', QualityCheckViewSet)
 router.register(r'ncr', NCRViewSet)
+router.register(r'spc-baselines', SPCBaselineViewSet)
 router.register(r'spc', SPCDataViewSet)
 
 urlpatterns = router.urls
@@ -1,19 +1,92 @@
 from rest_framework import viewsets
-from ..domain.models import InspectionConfig, QualityCheck, NCR, SPCData
-from .serializers import InspectionConfigSerializer, QualityCheckSerializer, NCRSerializer, SPCDataSerializer
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.base.exceptions import ValidationException
+from core.base.views import BaseViewSet, ReadOnlyBaseViewSet
+from ..application.services import (
+    InspectionConfigService, QualityCheckService, QualityAnalyticsService, SPCService
+)
+from ..domain.models import InspectionConfig, QualityCheck, NCR, SPCData, SPCBaseline
+from .serializers import (
+    InspectionConfigSerializer, QualityCheckSerializer, QualityEvaluateSerializer,
+    QualityCheckBatchSerializer, QualityAnalyticsQuerySerializer, NCRSerializer, SPCDataSerializer,
+    SPCBaselineSerializer, SPCAnalyzeSerializer, SPCFreezeBaselineSerializer, SPCCheckSerializer,
+    SPCEvaluateSerializer, SPCHistorySerializer
+)
 
 
-class InspectionConfigViewSet(viewsets.ModelViewSet):
+class InspectionConfigViewSet(BaseViewSet):
     queryset = InspectionConfig.objects.all()
     serializer_class = InspectionConfigSerializer
     filterset_fields = ['operation']
 
+    def perform_create(self, serializer):
+        serializer.instance = InspectionConfigService.create(**serializer.validated_data)
 
-class QualityCheckViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        serializer.instance = InspectionConfigService.update(serializer.instance, **serializer.validated_data)
+
+    def perform_destroy(self, instance):
+        InspectionConfigService.delete(instance)
+
+
+class QualityCheckViewSet(BaseViewSet):
     queryset = QualityCheck.objects.all()
     serializer_class = QualityCheckSerializer
     filterset_fields = ['order_number', 'config']
 
+    def perform_create(self, serializer):
+        serializer.instance = QualityCheckService.record_check(**serializer.validated_data)
+
+    def perform_update(self, serializer):
+        QualityAnalyticsService.invalidate(serializer.instance)
+        QualityAnalyticsService.invalidate(serializer.save())
+
+    def perform_destroy(self, instance):
+        QualityAnalyticsService.invalidate(instance)
+        instance.delete()
+
+    @action(detail=False, methods=['post'])
+    def record(self, request):
+        """Record a batch of results; failed mandatory checks raise one NCR per order and config.
+        Failures for order numbers that match no order are listed under unmatched_orders.
+        Body: {"order_number": "...", "inspector_name": "...",
+               "results": [{"config": 1, "result_value": "10.02", "order_number": "optional"}, ...]}
+        """
+        serializer = QualityCheckBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = QualityCheckService.record_checks(**serializer.validated_data)
+        return Response({
+            'recorded': len(result['checks']),
+            'passed': result['passed'],
+            'failed': result['failed'],
+            'check_ids': [check.id for check in result['checks']],
+            'ncrs': NCRSerializer(
+                NCR.objects.select_related('product').filter(id__in=[ncr.id for ncr in result['ncrs']]),
+                many=True
+            ).data,
+            'unmatched_orders': result['unmatched_orders'],
+            'unmatched_check_ids': [check.id for check in result['unmatched']],
+        }, status=201)
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """Pass rate, defect Pareto and first-pass yield.
+        Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: last 30 days)
+        """
+        serializer = QualityAnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(QualityAnalyticsService.get_analytics(**serializer.validated_data))
+
+    @action(detail=False, methods=['post'])
+    def evaluate(self, request):
+        """Score a lot of results against their compiled tolerance limits (nothing is stored).
+        Body: {"results": [{"config": 1, "result_value": "10.02"}, ...]}
+        """
+        serializer = QualityEvaluateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(QualityCheckService.evaluate_bulk(serializer.validated_data['results']))
+
 
 class NCRViewSet(viewsets.ModelViewSet):
     queryset = NCR.objects.all()
@@ -21,7 +94,93 @@ class NCRViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'product']
 
 
-class SPCDataViewSet(viewsets.ModelViewSet):
+class SPCDataViewSet(BaseViewSet):
     queryset = SPCData.objects.all()
     serializer_class = SPCDataSerializer
     filterset_fields = ['parameter_name', 'machine_id']
+
+    def perform_create(self, serializer):
+        measurement = serializer.save()
+        SPCService.update_accumulators([measurement])
+
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        """Store a batch of measurements and check them against the control rules.
+        Body: {"measurements": [{"parameter_name": "...", "value": 10.02,
+               "machine_id": "...", "timestamp": "2024-01-01T10:00:00.125Z"}, ...]}
+        Rows may also be sent as [parameter_name, value, machine_id, timestamp].
+        Invalid items come back under "rejected", rule hits under "violations".
+        """
+        measurements = request.data.get('measurements')
+        if not isinstance(measurements, list) or not measurements:
+            raise ValidationException('measurements must be a non-empty list', field='measurements')
+        result = SPCService.ingest(measurements)
+        return Response(result, status=201 if result['accepted'] else 400)
+
+    @action(detail=False, methods=['get'])
+    def analyze(self, request):
+        """Control chart with Nelson rule violations against the frozen baseline.
+        Query: ?parameter_name=...&machine_id=...&limit=1000&chart_type=imr|xbar_r|xbar_s|ewma|cusum
+        """
+        serializer = SPCAnalyzeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        result = SPCService.analyze(
+            params['parameter_name'],
+            machine_id=params['machine_id'],
+            limit=params['limit'],
+            chart_type=params.get('chart_type')
+        )
+        if result is None:
+            return Response({'error': 'No data for parameter'}, status=404)
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """Series over a long window, stitched from raw points and rollups.
+        Query: ?parameter_name=...&machine_id=...&start=...&end=...&resolution=auto|raw|minute|hour
+        """
+        serializer = SPCHistorySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        points = SPCService.get_history(**params)
+        return Response({
+            'parameter_name': params['parameter_name'],
+            'machine_id': params['machine_id'],
+            'limits': SPCService.get_control_limits(params['parameter_name'], params['machine_id']),
+            'points': points,
+        })
+
+    @action(detail=False, methods=['post'])
+    def freeze_baseline(self, request):
+        """Freeze control limits from a baseline period.
+        Body: {"parameter_name": "...", "machine_id": "", "chart_type": "xbar_r",
+               "subgroup_size": 5, "start": "...", "end": "...", "limit": 125}
+        """
+        serializer = SPCFreezeBaselineSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        baseline = SPCService.freeze_baseline(**serializer.validated_data)
+        return Response(SPCBaselineSerializer(baseline).data)
+
+    @action(detail=False, methods=['post'], url_path='check-control')
+    def check_control(self, request):
+        """Body: {"parameter_name": "...", "value": "...", "machine_id": ""}"""
+        serializer = SPCCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(SPCService.check_out_of_control(**serializer.validated_data))
+
+    @action(detail=False, methods=['post'])
+    def evaluate(self, request):
+        """Evaluate the latest points of all baselined series (batch job).
+        Body: {"points": 1000}
+        """
+        serializer = SPCEvaluateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        findings = SPCService.evaluate_baselines(points=serializer.validated_data['points'])
+        return Response({'out_of_control': len(findings), 'findings': findings})
+
+
+class SPCBaselineViewSet(ReadOnlyBaseViewSet):
+    queryset = SPCBaseline.objects.all()
+    serializer_class = SPCBaselineSerializer
+    filterset_fields = ['parameter_name', 'machine_id', 'chart_type']
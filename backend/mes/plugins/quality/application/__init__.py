@@ -1,13 +1,19 @@
 from .services import (
     InspectionConfigService,
     QualityCheckService,
+    QualityAnalyticsService,
     NCRService,
     SPCService,
+    SPCIngestQueue,
+    spc_ingest_queue,
 )
 
 __all__ = [
     'InspectionConfigService',
     'QualityCheckService',
+    'QualityAnalyticsService',
     'NCRService',
     'SPCService',
+    'SPCIngestQueue',
+    'spc_ingest_queue',
 ]
@@ -4,19 +4,50 @@ Quality Management Services.
 Business logic for quality control, inspections, non-conformance reports,
 and statistical process control.
 """
-from decimal import Decimal
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Avg, StdDev, Count, Q
+from django.db.models import (
+    Avg, StdDev, Variance, Count, Min, Max, Sum, Q, F, Value, Window, ExpressionWrapper, FloatField
+)
+from django.db.models.functions import RowNumber, Trunc, TruncDate
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from core.base.services import BaseService, StatefulService
+from core.base.sequences import SequenceService
 from core.base.exceptions import ValidationException, BusinessRuleException
-from ..domain.models import InspectionConfig, QualityCheck, NCR, SPCData
+from core.utils.cache import LRUCache
+from ..domain.models import (
+    InspectionConfig, QualityCheck, NCR, SPCData, SPCBaseline, SPCAccumulator, SPCRollup
+)
+from . import spc, specs
+
+# Running statistics per (parameter_name, machine_id)
+_accumulators = LRUCache(maxsize=settings.SPC_ACCUMULATOR_CACHE_SIZE)
+# Frozen (center_line, sigma) per (generation, parameter_name, machine_id), None
+# if no baseline; the generation is shared between workers and bumped on freeze
+_baseline_limits = LRUCache(maxsize=settings.SPC_ACCUMULATOR_CACHE_SIZE)
+_accumulator_lock = threading.Lock()
+_dirty_accumulators = set()
+_last_flush = [time.monotonic()]
+
+SPC_VALUE_QUANTUM = Decimal('0.0001')
+SPC_VALUE_LIMIT = Decimal('1000000')  # SPCData.value max_digits=10, decimal_places=4
 
 
 class InspectionConfigService(BaseService):
     """Service for managing inspection configurations."""
     model = InspectionConfig
+    # Compiled limits (check_type, lower, upper) in the shared cache, so an
+    # invalidation reaches every worker
+    LIMITS_CACHE_KEY = 'quality:spec_limits:{id}'
 
     @classmethod
     def get_by_operation(cls, operation_id):
@@ -45,16 +76,99 @@ class InspectionConfigService(BaseService):
                 field='parameters'
             )
 
+    @classmethod
+    def compile_parameters(cls, check_type: str, parameters: str) -> dict:
+        """
+        Compile the tolerance specification into limit fields.
+
+        Returns the values of nominal, lower_limit, upper_limit and unit;
+        all empty for pass/fail checks.
+        """
+        cls.validate_parameters(check_type, parameters)
+        if check_type != 'variable':
+            return {'nominal': None, 'lower_limit': None, 'upper_limit': None, 'unit': ''}
+        try:
+            spec = specs.parse_spec(parameters)
+        except ValueError as exc:
+            raise ValidationException(str(exc), field='parameters')
+        return {
+            'nominal': spec['nominal'],
+            'lower_limit': spec['lower'],
+            'upper_limit': spec['upper'],
+            'unit': spec['unit'][:20],
+        }
+
     @classmethod
     @transaction.atomic
     def create(cls, **data):
-        """Create inspection config with validation."""
-        cls.validate_parameters(
+        """Create inspection config with compiled limits."""
+        data.update(cls.compile_parameters(
             data.get('check_type', ''),
             data.get('parameters', '')
-        )
+        ))
         return super().create(**data)
 
+    @classmethod
+    @transaction.atomic
+    def update(cls, instance: InspectionConfig, **data):
+        """Update inspection config, recompiling its limits."""
+        data.update(cls.compile_parameters(
+            data.get('check_type', instance.check_type),
+            data.get('parameters', instance.parameters)
+        ))
+        operation_id = instance.operation_id
+        instance = super().update(instance, **data)
+        cls.invalidate_limits(instance.id)
+        if instance.operation_id != operation_id:
+            QualityAnalyticsService.invalidate_config(instance.id)
+        return instance
+
+    @classmethod
+    @transaction.atomic
+    def delete(cls, instance: InspectionConfig) -> None:
+        config_id = instance.id
+        # Its checks are deleted with it
+        QualityAnalyticsService.invalidate_config(config_id)
+        super().delete(instance)
+        cls.invalidate_limits(config_id)
+
+    @classmethod
+    def invalidate_limits(cls, config_id: int) -> None:
+        """Drop cached limits now and again once the change is committed."""
+        key = cls.LIMITS_CACHE_KEY.format(id=config_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @classmethod
+    def get_limits(cls, config_ids) -> dict:
+        """
+        Compiled limits of many configs, served from the cache.
+
+        Returns {config_id: (check_type, lower, upper)} with float limits
+        (NaN where unbounded); unknown ids are left out.
+        """
+        keys = {config_id: cls.LIMITS_CACHE_KEY.format(id=config_id) for config_id in set(config_ids)}
+        cached = cache.get_many(keys.values())
+        limits = {config_id: cached[key] for config_id, key in keys.items() if key in cached}
+        missing = keys.keys() - limits.keys()
+        if missing:
+            loaded = {
+                config_id: (
+                    check_type,
+                    float(lower) if lower is not None else np.nan,
+                    float(upper) if upper is not None else np.nan,
+                )
+                for config_id, check_type, lower, upper in cls.get_queryset().filter(
+                    id__in=missing
+                ).values_list('id', 'check_type', 'lower_limit', 'upper_limit')
+            }
+            cache.set_many(
+                {keys[config_id]: value for config_id, value in loaded.items()},
+                settings.QUALITY_SPEC_LIMITS_CACHE_TIMEOUT
+            )
+            limits.update(loaded)
+        return limits
+
 
 class QualityCheckService(BaseService):
     """Service for recording and evaluating quality checks."""
@@ -66,32 +180,74 @@ class QualityCheckService(BaseService):
         Evaluate if a quality check result passes based on the config.
 
         For pass_fail: expects "Pass" or "Fail"
-        For variable: parses numeric value and compares to tolerance
+        For variable: compares the numeric value to the compiled limits;
+        results that are not numbers fail.
         """
         if config.check_type == 'pass_fail':
-            return result_value.lower() == 'pass'
+            return str(result_value).strip().lower() == 'pass'
 
-        # Variable check - parse tolerance from parameters
-        # Expected format: "10.0 +/- 0.1" or "10.0 ± 0.1"
         if config.check_type == 'variable':
             try:
-                result_num = Decimal(result_value)
-                params = config.parameters.replace('±', '+/-')
-
-                if '+/-' in params:
-                    parts = params.split('+/-')
-                    nominal = Decimal(parts[0].strip())
-                    tolerance = Decimal(parts[1].strip())
-                    return nominal - tolerance <= result_num <= nominal + tolerance
-                else:
-                    # No tolerance specified, exact match
-                    nominal = Decimal(params.strip())
-                    return result_num == nominal
-            except (ValueError, InvalidOperation):
+                result_num = Decimal(str(result_value).strip())
+            except InvalidOperation:
+                return False
+            # Every valid spec has at least one limit; none means it never compiled
+            if config.lower_limit is None and config.upper_limit is None:
+                return False
+            if not result_num.is_finite():
                 return False
+            if config.lower_limit is not None and result_num < config.lower_limit:
+                return False
+            if config.upper_limit is not None and result_num > config.upper_limit:
+                return False
+            return True
 
         return False
 
+    @classmethod
+    def evaluate_bulk(cls, results: list) -> dict:
+        """
+        Score many results across many configs in one vectorized pass.
+
+        results: [{'config': id, 'result_value': '10.02'}, ...]
+        Limits come from the compiled-spec cache (one query for misses).
+
+        Returns {'results': [{'config', 'result_value', 'passed'}], 'passed': n,
+        'failed': n, 'invalid': [{'index', 'config', 'error'}]}; invalid
+        items (unknown config) are left out of the scored results.
+        """
+        limits = InspectionConfigService.get_limits(item['config'] for item in results)
+
+        scored, invalid = [], []
+        for index, item in enumerate(results):
+            if item['config'] not in limits:
+                invalid.append({
+                    'index': index, 'config': item['config'], 'error': 'Unknown inspection config'
+                })
+            else:
+                scored.append(item)
+
+        check_types = np.array([limits[item['config']][0] for item in scored], dtype=object)
+        lower = np.array([limits[item['config']][1] for item in scored], dtype=float)
+        upper = np.array([limits[item['config']][2] for item in scored], dtype=float)
+        values = [item['result_value'] for item in scored]
+
+        passed = specs.within_limits(specs.parse_values(values), lower, upper)
+        passed &= (check_types == 'variable') & ~(np.isnan(lower) & np.isnan(upper))
+        pass_fail = np.flatnonzero(check_types == 'pass_fail')
+        passed[pass_fail] = [str(values[i]).strip().lower() == 'pass' for i in pass_fail]
+
+        passed_count = int(passed.sum())
+        return {
+            'results': [
+                {'config': item['config'], 'result_value': item['result_value'], 'passed': bool(flag)}
+                for item, flag in zip(scored, passed.tolist())
+            ],
+            'passed': passed_count,
+            'failed': len(scored) - passed_count,
+            'invalid': invalid,
+        }
+
     @classmethod
     @transaction.atomic
     def record_check(
@@ -104,23 +260,73 @@ class QualityCheckService(BaseService):
         """
         Record a quality check result and auto-evaluate pass/fail.
 
-        If the check fails and is mandatory, may trigger NCR creation.
+        If the check fails and is mandatory, an NCR is raised for it.
         """
-        passed = cls.evaluate_result(config, result_value)
-
-        check = cls.model.objects.create(
-            config=config,
+        result = cls.record_checks(
+            [{'config': config.id, 'result_value': result_value}],
             order_number=order_number,
-            result_value=result_value,
-            passed=passed,
             inspector_name=inspector_name
         )
+        return result['checks'][0]
 
-        # Auto-create NCR for failed mandatory checks
-        if not passed and config.mandatory:
-            NCRService.create_from_failed_check(check)
+    @classmethod
+    @transaction.atomic
+    def record_checks(cls, results: list, order_number: str = '', inspector_name: str = '') -> dict:
+        """
+        Record a batch of check results (e.g. a CMM report) in one go.
+
+        results: [{'config': id, 'result_value': '10.02', 'order_number': optional}, ...];
+        order_number is the default for items without their own. Results
+        are scored with evaluate_bulk, failures of mandatory checks are
+        grouped into one NCR per order and config, and all checks are
+        written with bulk_create. Failed mandatory checks whose order does
+        not exist raise no NCR and are returned in 'unmatched'.
+
+        Returns {'checks', 'ncrs', 'unmatched', 'unmatched_orders', 'passed', 'failed'}.
+        """
+        evaluation = cls.evaluate_bulk(results)
+        if evaluation['invalid']:
+            raise ValidationException(
+                f"Unknown inspection config at items "
+                f"{', '.join(str(item['index']) for item in evaluation['invalid'][:20])}",
+                field='results'
+            )
 
-        return check
+        configs = InspectionConfig.objects.in_bulk({item['config'] for item in results})
+        checks = []
+        failures = defaultdict(list)
+        for item, scored in zip(results, evaluation['results']):
+            check = cls.model(
+                config=configs[item['config']],
+                order_number=item.get('order_number') or order_number,
+                result_value=item['result_value'],
+                passed=scored['passed'],
+                inspector_name=inspector_name
+            )
+            if not check.order_number:
+                raise ValidationException('Every result needs an order number', field='order_number')
+            checks.append(check)
+            if not check.passed and check.config.mandatory:
+                failures[(check.order_number, check.config_id)].append(check)
+
+        ncrs = NCRService.create_for_failures(failures)
+        for key, ncr in ncrs.items():
+            for check in failures[key]:
+                check.ncr = ncr
+
+        unmatched = [
+            check for key, group in failures.items() if key not in ncrs for check in group
+        ]
+
+        created = cls.model.objects.bulk_create(checks)
+        return {
+            'checks': created,
+            'ncrs': list(ncrs.values()),
+            'unmatched': unmatched,
+            'unmatched_orders': sorted({check.order_number for check in unmatched}),
+            'passed': evaluation['passed'],
+            'failed': evaluation['failed'],
+        }
 
     @classmethod
     def get_order_checks(cls, order_number: str):
@@ -150,6 +356,215 @@ class QualityCheckService(BaseService):
         return round(stats['passed'] / stats['total'] * 100, 2)
 
 
+class QualityAnalyticsService(BaseService):
+    """
+    Quality KPIs for a date window: pass rate, defect Pareto and first-pass yield.
+
+    All KPIs are rolled up from one grouped query of check counts per
+    (day, order, config, operation, inspector). Rows of closed days never
+    change, so they are cached per day and only today is queried live.
+    """
+    model = QualityCheck
+    CACHE_KEY = 'quality:analytics:{day}'
+    PARETO_DIMENSIONS = ('config', 'operation', 'inspector')
+
+    @classmethod
+    def _query_days(cls, start, end) -> dict:
+        """Check counts per day from one grouped query: {day: [(order, config, operation, inspector, total, failed)]}."""
+        # Range on the raw timestamp so the (config, timestamp) index applies
+        rows = cls.get_queryset().filter(
+            timestamp__gte=timezone.make_aware(datetime.combine(start, datetime.min.time())),
+            timestamp__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        ).annotate(
+            day=TruncDate('timestamp')
+        ).values(
+            'day', 'order_number', 'config_id', 'config__operation_id', 'inspector_name'
+        ).annotate(
+            total=Count('id'),
+            failed=Count('id', filter=Q(passed=False))
+        ).order_by()
+
+        days = defaultdict(list)
+        for row in rows:
+            days[row['day']].append((
+                row['order_number'], row['config_id'], row['config__operation_id'],
+                row['inspector_name'], row['total'], row['failed']
+            ))
+        return days
+
+    @classmethod
+    def invalidate_days(cls, days) -> None:
+        """Drop cached days now and again once the change is committed."""
+        keys = [cls.CACHE_KEY.format(day=day.isoformat()) for day in set(days)]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def invalidate(cls, check: QualityCheck) -> None:
+        """Drop the cached day of a check (call when it is changed or deleted)."""
+        cls.invalidate_days([timezone.localtime(check.timestamp).date()])
+
+    @classmethod
+    def invalidate_config(cls, config_id: int) -> None:
+        """Drop the cached days holding checks of a config."""
+        cls.invalidate_days(
+            cls.get_queryset().filter(config_id=config_id).annotate(
+                day=TruncDate('timestamp')
+            ).values_list('day', flat=True).distinct()
+        )
+
+    @classmethod
+    def get_rows(cls, start, end) -> list:
+        """Grouped check counts of a window, closed days served from the cache."""
+        today = timezone.localdate()
+        days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+        closed = [day for day in days if day < today]
+
+        cached = cache.get_many([cls.CACHE_KEY.format(day=day.isoformat()) for day in closed])
+        by_day = {
+            day: cached[cls.CACHE_KEY.format(day=day.isoformat())]
+            for day in closed
+            if cls.CACHE_KEY.format(day=day.isoformat()) in cached
+        }
+        missing = [day for day in closed if day not in by_day]
+        if missing:
+            queried = cls._query_days(min(missing), max(missing))
+            fresh = {day: queried.get(day, []) for day in missing}
+            cache.set_many(
+                {cls.CACHE_KEY.format(day=day.isoformat()): rows for day, rows in fresh.items()},
+                settings.QUALITY_ANALYTICS_CACHE_TIMEOUT
+            )
+            by_day.update(fresh)
+        if start <= today <= end:
+            by_day[today] = cls._query_days(today, today).get(today, [])
+
+        return [(day, *row) for day in sorted(by_day) for row in by_day[day]]
+
+    @classmethod
+    def _pareto(cls, defects: dict, labels: dict) -> list:
+        total = sum(defects.values())
+        entries, cumulative = [], 0
+        for key, count in sorted(defects.items(), key=lambda item: (-item[1], str(item[0]))):
+            if not count:
+                continue
+            cumulative += count
+            entries.append({
+                'key': key,
+                'label': labels.get(key, key),
+                'defects': count,
+                'share': round(count / total * 100, 2),
+                'cumulative_share': round(cumulative / total * 100, 2),
+            })
+        return entries
+
+    @classmethod
+    def get_analytics(cls, start=None, end=None) -> dict:
+        """
+        Pass rate, defect Pareto and first-pass yield for a date window.
+
+        Defaults to the last 30 days. An order passes an operation first
+        time when none of its checks for that operation failed.
+
+        Returns {'start', 'end', 'pass_rate': {'total', 'passed', 'rate',
+        'by_day', 'by_config'}, 'pareto': {'config', 'operation',
+        'inspector'}, 'first_pass_yield': {'orders', 'first_pass', 'rate',
+        'by_operation', 'by_order'}}.
+        """
+        end = end or timezone.localdate()
+        start = start or end - timedelta(days=29)
+        if start > end:
+            raise ValidationException('Start date must not be after end date', field='start')
+
+        by_day = defaultdict(lambda: [0, 0])
+        by_config = defaultdict(lambda: [0, 0])
+        defects = {dimension: defaultdict(int) for dimension in cls.PARETO_DIMENSIONS}
+        orders = defaultdict(lambda: [0, 0])
+        order_operations = defaultdict(int)
+
+        for day, order_number, config_id, operation_id, inspector, total, failed in cls.get_rows(start, end):
+            by_day[day][0] += total
+            by_day[day][1] += failed
+            by_config[config_id][0] += total
+            by_config[config_id][1] += failed
+            defects['config'][config_id] += failed
+            defects['operation'][operation_id] += failed
+            defects['inspector'][inspector] += failed
+            orders[order_number][0] += total
+            orders[order_number][1] += failed
+            order_operations[(order_number, operation_id)] += failed
+
+        configs = {
+            row['id']: row
+            for row in InspectionConfig.objects.filter(id__in=by_config).values(
+                'id', 'description', 'operation_id', 'operation__name'
+            )
+        }
+        labels = {
+            'config': {config_id: row['description'] for config_id, row in configs.items()},
+            'operation': {row['operation_id']: row['operation__name'] for row in configs.values()},
+            'inspector': {},
+        }
+
+        def rate(passed, total):
+            return round(passed / total * 100, 2) if total else None
+
+        total = sum(counts[0] for counts in by_day.values())
+        failed = sum(counts[1] for counts in by_day.values())
+
+        operations = defaultdict(lambda: [0, 0])
+        for (_, operation_id), failures in order_operations.items():
+            operations[operation_id][0] += 1
+            operations[operation_id][1] += not failures
+        first_pass = sum(1 for _, failures in orders.values() if not failures)
+
+        return {
+            'start': start,
+            'end': end,
+            'pass_rate': {
+                'total': total,
+                'passed': total - failed,
+                'rate': rate(total - failed, total),
+                'by_day': [
+                    {'day': day, 'total': t, 'passed': t - f, 'rate': rate(t - f, t)}
+                    for day, (t, f) in sorted(by_day.items())
+                ],
+                'by_config': [
+                    {
+                        'config': config_id,
+                        'description': labels['config'].get(config_id, ''),
+                        'total': t,
+                        'passed': t - f,
+                        'rate': rate(t - f, t),
+                    }
+                    for config_id, (t, f) in sorted(by_config.items())
+                ],
+            },
+            'pareto': {
+                dimension: cls._pareto(defects[dimension], labels[dimension])
+                for dimension in cls.PARETO_DIMENSIONS
+            },
+            'first_pass_yield': {
+                'orders': len(orders),
+                'first_pass': first_pass,
+                'rate': rate(first_pass, len(orders)),
+                'by_operation': [
+                    {
+                        'operation': operation_id,
+                        'name': labels['operation'].get(operation_id, ''),
+                        'orders': count,
+                        'first_pass': passed,
+                        'rate': rate(passed, count),
+                    }
+                    for operation_id, (count, passed) in sorted(operations.items())
+                ],
+                'by_order': [
+                    {'order_number': order_number, 'checks': t, 'failed': f, 'first_pass': not f}
+                    for order_number, (t, f) in sorted(orders.items())
+                ],
+            },
+        }
+
+
 class NCRService(StatefulService):
     """Service for managing Non-Conformance Reports."""
     model = NCR
@@ -162,41 +577,102 @@ class NCRService(StatefulService):
 
     DISPOSITION_CHOICES = ['Rework', 'Scrap', 'Use As Is', 'Return to Supplier']
 
+    # Result values listed in a grouped NCR's description
+    MAX_LISTED_RESULTS = 20
+
     @classmethod
-    def generate_ncr_number(cls) -> str:
-        """Generate unique NCR number."""
-        from datetime import date
-        today = date.today()
-        prefix = f"NCR-{today.strftime('%Y%m%d')}"
+    def allocate_numbers(cls, count: int = 1, day=None) -> list:
+        """
+        Reserve `count` consecutive NCR numbers of a day.
 
-        # Find highest existing number for today
-        existing = cls.model.objects.filter(
-            ncr_number__startswith=prefix
-        ).order_by('-ncr_number').first()
+        Numbers come from the per-day series 'NCR-YYYYMMDD' of
+        SequenceService; a new day's series continues after the highest
+        number already issued that day.
+        """
+        day = day or timezone.localdate()
+        prefix = f"NCR-{day.strftime('%Y%m%d')}"
 
-        if existing:
-            last_seq = int(existing.ncr_number.split('-')[-1])
-            return f"{prefix}-{last_seq + 1:04d}"
+        def last_issued():
+            existing = cls.model.objects.filter(
+                ncr_number__startswith=prefix
+            ).order_by('-ncr_number').values_list('ncr_number', flat=True).first()
+            return int(existing.split('-')[-1]) if existing else 0
 
-        return f"{prefix}-0001"
+        values = SequenceService.allocate(prefix, count, start_after=last_issued)
+        return [f"{prefix}-{value:04d}" for value in values]
+
+    @classmethod
+    def generate_ncr_number(cls) -> str:
+        """Generate unique NCR number."""
+        return cls.allocate_numbers(1)[0]
 
     @classmethod
     @transaction.atomic
     def create_from_failed_check(cls, quality_check: QualityCheck) -> 'NCR':
         """Create NCR automatically from a failed quality check."""
-        from mes.plugins.basic.domain.models import Product
-
-        # Get product from the order (this would need order->product relationship)
-        # For now, create a generic NCR
-        ncr = cls.model.objects.create(
-            ncr_number=cls.generate_ncr_number(),
-            product_id=quality_check.config.operation.inspection_configs.first().operation.product_id if hasattr(quality_check.config.operation, 'product_id') else None,
-            issue_description=f"Failed quality check: {quality_check.config.description}. "
-                            f"Result: {quality_check.result_value}",
-            status='quarantine'
+        ncrs = cls.create_for_failures(
+            {(quality_check.order_number, quality_check.config_id): [quality_check]}
         )
+        ncr = ncrs.get((quality_check.order_number, quality_check.config_id))
+        if ncr is None:
+            raise BusinessRuleException(
+                'ORDER_NOT_FOUND',
+                f"No order '{quality_check.order_number}' to take the NCR product from"
+            )
+        if quality_check.pk:
+            quality_check.ncr = ncr
+            quality_check.save(update_fields=['ncr'])
         return ncr
 
+    @classmethod
+    @transaction.atomic
+    def create_for_failures(cls, failures: dict) -> dict:
+        """
+        Raise one NCR per group of failed checks.
+
+        failures: {(order_number, config_id): [QualityCheck, ...]}. The
+        product comes from the order; groups whose order does not exist
+        get no NCR. Numbers are allocated as one block and the NCRs are
+        written with bulk_create.
+
+        Returns {(order_number, config_id): NCR}.
+        """
+        from mes.plugins.orders.domain.models import Order
+
+        if not failures:
+            return {}
+        products = dict(Order.objects.filter(
+            number__in={order_number for order_number, _ in failures}
+        ).values_list('number', 'product_id'))
+        keys = [key for key in failures if key[0] in products]
+        if not keys:
+            return {}
+
+        numbers = cls.allocate_numbers(len(keys))
+        ncrs = {}
+        for key, number in zip(keys, numbers):
+            checks = failures[key]
+            config = checks[0].config
+            values = [check.result_value for check in checks]
+            if len(values) == 1:
+                description = f"Failed quality check: {config.description}. Result: {values[0]}"
+            else:
+                listed = ', '.join(values[:cls.MAX_LISTED_RESULTS])
+                if len(values) > cls.MAX_LISTED_RESULTS:
+                    listed += ', ...'
+                description = (
+                    f"Failed quality check: {config.description}. "
+                    f"{len(values)} results out of tolerance: {listed}"
+                )
+            ncrs[key] = cls.model(
+                ncr_number=number,
+                product_id=products[key[0]],
+                issue_description=description,
+                status='quarantine'
+            )
+        cls.model.objects.bulk_create(ncrs.values())
+        return ncrs
+
     @classmethod
     @transaction.atomic
     def create(cls, product_id: int, issue_description: str, **kwargs) -> 'NCR':
@@ -248,8 +724,20 @@ class NCRService(StatefulService):
 
 
 class SPCService(BaseService):
-    """Service for Statistical Process Control data and analysis."""
+    """
+    Service for Statistical Process Control data and analysis.
+
+    Series are evaluated with the NumPy engine in .spc against limits
+    frozen in an SPCBaseline per parameter and machine. Without a baseline
+    the limits are estimated from the analysed series itself.
+    """
     model = SPCData
+    BASELINE_GENERATION_KEY = 'quality:spc:baseline_generation'
+
+    BASELINE_FIELDS = (
+        'chart_type', 'subgroup_size', 'center_line', 'sigma', 'ucl', 'lcl',
+        'dispersion_center', 'dispersion_ucl', 'dispersion_lcl', 'sample_count',
+    )
 
     @classmethod
     def record_measurement(
@@ -259,44 +747,898 @@ class SPCService(BaseService):
         machine_id: str = ''
     ) -> SPCData:
         """Record a new SPC measurement."""
-        return cls.model.objects.create(
+        measurement = cls.model.objects.create(
             parameter_name=parameter_name,
             value=value,
             machine_id=machine_id
         )
+        transaction.on_commit(lambda: cls.update_accumulators([measurement]))
+        return measurement
 
     @classmethod
-    def get_parameter_stats(cls, parameter_name: str, limit: int = 100):
+    def _load_accumulator(cls, parameter_name: str, machine_id: str) -> spc.RunningStatistics:
         """
-        Get statistical analysis for a parameter.
+        Rebuild an accumulator from its persisted snapshot plus newer rows,
+        or from two aggregate queries when it was never persisted. An empty
+        machine_id covers all machines, as in get_series.
+        """
+        queryset = cls.get_queryset().filter(parameter_name=parameter_name)
+        if machine_id:
+            queryset = queryset.filter(machine_id=machine_id)
+        snapshot = SPCAccumulator.objects.filter(
+            parameter_name=parameter_name, machine_id=machine_id
+        ).first()
+
+        if snapshot:
+            accumulator = spc.RunningStatistics(
+                window_size=settings.SPC_WINDOW_SIZE,
+                count=snapshot.count,
+                mean=snapshot.mean,
+                m2=snapshot.m2,
+                minimum=snapshot.min_value,
+                maximum=snapshot.max_value,
+                recent=snapshot.recent,
+                last_data_id=snapshot.last_data_id,
+            )
+            for data_id, value in queryset.filter(
+                id__gt=snapshot.last_data_id
+            ).order_by('id').values_list('id', 'value'):
+                accumulator.push(value, data_id)
+            return accumulator
+
+        totals = queryset.aggregate(
+            count=Count('id'),
+            mean=Avg('value'),
+            minimum=Min('value'),
+            maximum=Max('value'),
+            last_id=Max('id'),
+        )
+        count = totals['count']
+        mean = float(totals['mean'] or 0)
+        m2 = 0.0
+        if count > 1:
+            # Second pass around the mean; sum(x^2) - n*mean^2 cancels badly
+            deviation = ExpressionWrapper(F('value') - Value(mean), output_field=FloatField())
+            m2 = float(queryset.filter(id__lte=totals['last_id']).aggregate(
+                m2=Sum(ExpressionWrapper(deviation * deviation, output_field=FloatField()))
+            )['m2'] or 0)
+        moments = (
+            count,
+            mean,
+            m2,
+            float(totals['minimum']) if count else None,
+            float(totals['maximum']) if count else None,
+        )
+        # Points past retention only survive in the rollups
+        rollups = cls._rollup_moments(parameter_name, machine_id)
+        if rollups is not None:
+            moments = spc.merge_moments(moments, rollups)
+        recent = list(
+            queryset.order_by('-id').values_list('value', flat=True)[:settings.SPC_WINDOW_SIZE]
+        )
+        recent.reverse()
+        return spc.RunningStatistics(
+            window_size=settings.SPC_WINDOW_SIZE,
+            count=moments[0],
+            mean=moments[1],
+            m2=moments[2],
+            minimum=moments[3],
+            maximum=moments[4],
+            recent=recent,
+            last_data_id=totals['last_id'] or 0,
+        )
+
+    @classmethod
+    def _rollup_moments(cls, parameter_name: str, machine_id: str):
+        """(count, mean, m2, min, max) over all rollups of a series, or None."""
+        rollups = SPCRollup.objects.filter(parameter_name=parameter_name)
+        if machine_id:
+            rollups = rollups.filter(machine_id=machine_id)
+        totals = rollups.aggregate(
+            count=Sum('count'),
+            total=Sum(ExpressionWrapper(F('count') * F('mean'), output_field=FloatField())),
+            m2=Sum('m2'),
+            minimum=Min('min_value'),
+            maximum=Max('max_value'),
+        )
+        count = totals['count']
+        if not count:
+            return None
+        mean = totals['total'] / count
+        # Within-bucket m2 plus the spread of the bucket means, second pass
+        deviation = ExpressionWrapper(F('mean') - Value(mean), output_field=FloatField())
+        spread = rollups.aggregate(spread=Sum(ExpressionWrapper(
+            F('count') * deviation * deviation, output_field=FloatField()
+        )))['spread']
+        m2 = totals['m2'] + (spread or 0.0)
+        return (count, mean, m2, totals['minimum'], totals['maximum'])
+
+    @classmethod
+    def get_accumulator(cls, parameter_name: str, machine_id: str = '') -> spc.RunningStatistics:
+        """Running statistics of a series, rebuilt lazily from the database on a miss."""
+        key = (parameter_name, machine_id or '')
+        accumulator = _accumulators.get(key)
+        if accumulator is None:
+            accumulator = cls._load_accumulator(*key)
+            _accumulators.set(key, accumulator)
+        return accumulator
 
-        Returns mean, std dev, min, max, and recent values for control charts.
+    @classmethod
+    def update_accumulators(cls, measurements) -> None:
+        """Fold stored measurements into their running statistics."""
+        by_key = defaultdict(list)
+        for measurement in measurements:
+            by_key[(measurement.parameter_name, measurement.machine_id or '')].append(measurement)
+        # Machine rows also belong to the all-machines series; only update it
+        # when loaded, a later load reads them from the database anyway
+        for parameter_name, machine_id in list(by_key):
+            if machine_id and (parameter_name, '') in _accumulators:
+                by_key[(parameter_name, '')].extend(by_key[(parameter_name, machine_id)])
+
+        for key, rows in by_key.items():
+            if any(row.id is None for row in rows):
+                # Without ids the rows cannot be matched on reload; rebuild lazily
+                _accumulators.delete(key)
+                continue
+            accumulator = cls.get_accumulator(*key)
+            with _accumulator_lock:
+                for row in sorted(rows, key=lambda row: row.id):
+                    if row.id is None or row.id > accumulator.last_data_id:
+                        accumulator.push(row.value, row.id)
+                _dirty_accumulators.add(key)
+
+        if time.monotonic() - _last_flush[0] >= settings.SPC_PERSIST_INTERVAL:
+            cls.flush_accumulators()
+
+    @classmethod
+    @transaction.atomic
+    def flush_accumulators(cls) -> int:
+        """Persist accumulators changed since the last flush. Returns the number written."""
+        with _accumulator_lock:
+            keys = list(_dirty_accumulators)
+            _dirty_accumulators.clear()
+            _last_flush[0] = time.monotonic()
+            states = {}
+            for key in keys:
+                accumulator = _accumulators.get(key)
+                # Evicted accumulators are rebuilt from newer rows on reload
+                if accumulator is not None:
+                    states[key] = {
+                        'count': accumulator.count,
+                        'mean': accumulator.mean,
+                        'm2': accumulator.m2,
+                        'min_value': accumulator.minimum,
+                        'max_value': accumulator.maximum,
+                        'recent': list(accumulator.window),
+                        'last_data_id': accumulator.last_data_id,
+                    }
+        if not states:
+            return 0
+
+        existing = {
+            (row.parameter_name, row.machine_id): row
+            for row in SPCAccumulator.objects.filter(
+                parameter_name__in={p for p, _ in states},
+                machine_id__in={m for _, m in states}
+            )
+        }
+        now = timezone.now()
+        created, changed = [], []
+        for (parameter_name, machine_id), state in states.items():
+            row = existing.get((parameter_name, machine_id))
+            if row is None:
+                created.append(SPCAccumulator(
+                    parameter_name=parameter_name, machine_id=machine_id, **state
+                ))
+                continue
+            for field, value in state.items():
+                setattr(row, field, value)
+            row.updated_at = now
+            changed.append(row)
+
+        if created:
+            SPCAccumulator.objects.bulk_create(created)
+        if changed:
+            SPCAccumulator.objects.bulk_update(
+                changed,
+                ['count', 'mean', 'm2', 'min_value', 'max_value', 'recent', 'last_data_id', 'updated_at']
+            )
+        return len(states)
+
+    @classmethod
+    def _parse_measurement(cls, item, now):
         """
-        queryset = cls.get_queryset().filter(
-            parameter_name=parameter_name
-        ).order_by('-timestamp')[:limit]
+        Validate one raw measurement.
 
-        values = list(queryset.values_list('value', flat=True))
+        Accepts {'parameter_name', 'value', 'machine_id', 'timestamp'} or a
+        [parameter_name, value, machine_id, timestamp] row; timestamps are
+        ISO 8601 strings or epoch seconds. Returns (SPCData, None) or
+        (None, error message).
+        """
+        if isinstance(item, dict):
+            parameter_name = item.get('parameter_name') or item.get('parameter')
+            value = item.get('value')
+            machine_id = item.get('machine_id') or ''
+            timestamp = item.get('timestamp')
+        elif isinstance(item, (list, tuple)) and 2 <= len(item) <= 4:
+            parameter_name, value = item[0], item[1]
+            machine_id = (item[2] if len(item) > 2 else '') or ''
+            timestamp = item[3] if len(item) > 3 else None
+        else:
+            return None, 'Expected an object or a [parameter_name, value, machine_id, timestamp] row'
+
+        if not parameter_name or not isinstance(parameter_name, str) or len(parameter_name) > 100:
+            return None, 'parameter_name is required (max 100 characters)'
+        if not isinstance(machine_id, str) or len(machine_id) > 100:
+            return None, 'machine_id must be a string (max 100 characters)'
+        if isinstance(value, bool) or value is None:
+            return None, 'value must be a number'
+        try:
+            value = Decimal(value if isinstance(value, str) else str(value))
+        except (InvalidOperation, ValueError, TypeError):
+            return None, 'value must be a number'
+        if not value.is_finite() or abs(value) >= SPC_VALUE_LIMIT:
+            return None, 'value out of range'
+        value = value.quantize(SPC_VALUE_QUANTUM)
+
+        if timestamp is None or timestamp == '':
+            timestamp = now
+        elif isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            try:
+                timestamp = datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                return None, 'timestamp out of range'
+        elif isinstance(timestamp, str):
+            try:
+                parsed = parse_datetime(timestamp)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                return None, 'timestamp must be ISO 8601 or epoch seconds'
+            timestamp = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+        else:
+            return None, 'timestamp must be ISO 8601 or epoch seconds'
+
+        return cls.model(
+            parameter_name=parameter_name,
+            value=value,
+            machine_id=machine_id,
+            timestamp=timestamp
+        ), None
 
-        if not values:
+    @classmethod
+    def evaluate_batch(cls, measurements: list) -> list:
+        """
+        Nelson rule violations of a batch of new measurements.
+
+        Per series the batch is ordered by sample time, prefixed with the
+        buffered history of its accumulator and evaluated in one vectorized
+        pass against the baseline (or rolling window) limits.
+
+        measurements: list of (index, SPCData). Returns
+        [{'index', 'parameter_name', 'machine_id', 'value', 'timestamp', 'rules'}].
+        """
+        by_key = defaultdict(list)
+        for index, measurement in measurements:
+            by_key[(measurement.parameter_name, measurement.machine_id)].append((index, measurement))
+
+        history_size = max(spc.RULE_WINDOWS.values()) - 1
+        violations = []
+        for key, rows in by_key.items():
+            rows.sort(key=lambda row: row[1].timestamp)
+            accumulator = cls.get_accumulator(*key)
+            limits = cls.get_control_limits(*key)
+            with _accumulator_lock:
+                history = list(accumulator.window)[-history_size:]
+                if limits is None:
+                    window = list(accumulator.window)
+                    if len(window) < 2:
+                        window = window + [float(m.value) for _, m in rows]
+                    if len(window) < 2:
+                        continue
+                    limits = (float(np.mean(window)), float(np.std(window, ddof=1)))
+
+            series = np.array(history + [float(m.value) for _, m in rows])
+            flags = spc.nelson_rules(series, *limits)
+            offset = len(history)
+            fired = np.zeros(len(rows), dtype=bool)
+            for mask in flags.values():
+                fired |= mask[offset:]
+            for position in np.flatnonzero(fired):
+                index, measurement = rows[position]
+                violations.append({
+                    'index': index,
+                    'parameter_name': measurement.parameter_name,
+                    'machine_id': measurement.machine_id,
+                    'value': str(measurement.value),
+                    'timestamp': measurement.timestamp,
+                    'rules': [
+                        rule for rule, mask in sorted(flags.items()) if mask[offset + position]
+                    ],
+                })
+
+        violations.sort(key=lambda v: v['index'])
+        return violations
+
+    @classmethod
+    def ingest(cls, measurements: list) -> dict:
+        """
+        Validate, evaluate and store a batch of measurements.
+
+        Invalid items are rejected individually; the valid ones are checked
+        against the control rules and written with chunked bulk_create in
+        one transaction, then folded into the running statistics.
+
+        Returns {'accepted', 'rejected': [{'index', 'error'}], 'violations'}.
+        """
+        if len(measurements) > settings.SPC_INGEST_MAX_BATCH:
+            raise ValidationException(
+                f'At most {settings.SPC_INGEST_MAX_BATCH} measurements per batch',
+                field='measurements'
+            )
+
+        now = timezone.now()
+        accepted = []
+        rejected = []
+        for index, item in enumerate(measurements):
+            measurement, error = cls._parse_measurement(item, now)
+            if error:
+                rejected.append({'index': index, 'error': error})
+            else:
+                accepted.append((index, measurement))
+
+        violations = cls.evaluate_batch(accepted) if accepted else []
+
+        rows = [measurement for _, measurement in accepted]
+        with transaction.atomic():
+            created = cls.model.objects.bulk_create(
+                rows, batch_size=settings.SPC_INGEST_CHUNK_SIZE
+            )
+            transaction.on_commit(lambda: cls.update_accumulators(created))
+
+        return {
+            'accepted': len(rows),
+            'rejected': rejected,
+            'violations': violations,
+        }
+
+    @classmethod
+    def get_control_limits(cls, parameter_name: str, machine_id: str = ''):
+        """Cached (center_line, sigma) of the frozen baseline, or None."""
+        generation = cache.get_or_set(cls.BASELINE_GENERATION_KEY, 1, None)
+        key = (generation, parameter_name, machine_id or '')
+        limits = _baseline_limits.get(key, False)
+        if limits is False:
+            baseline = cls.get_baseline(parameter_name, machine_id)
+            limits = (baseline.center_line, baseline.sigma) if baseline else None
+            _baseline_limits.set(key, limits)
+        return limits
+
+    @classmethod
+    def invalidate_control_limits(cls) -> None:
+        """Retire the cached limits of every worker."""
+        try:
+            cache.incr(cls.BASELINE_GENERATION_KEY)
+        except ValueError:
+            cache.set(cls.BASELINE_GENERATION_KEY, 1, None)
+
+    @classmethod
+    def get_series(
+        cls,
+        parameter_name: str,
+        machine_id: str = None,
+        limit: int = None,
+        start=None,
+        end=None
+    ) -> np.ndarray:
+        """Measurements of a parameter in chronological order as a float array."""
+        queryset = cls.get_queryset().filter(parameter_name=parameter_name)
+        if machine_id:
+            queryset = queryset.filter(machine_id=machine_id)
+        if start:
+            queryset = queryset.filter(timestamp__gte=start)
+        if end:
+            queryset = queryset.filter(timestamp__lte=end)
+
+        if limit:
+            values = list(queryset.order_by('-timestamp', '-id').values_list('value', flat=True)[:limit])
+            values.reverse()
+        else:
+            values = list(queryset.order_by('timestamp', 'id').values_list('value', flat=True))
+        return np.array(values, dtype=float)
+
+    @classmethod
+    def get_latest_series(cls, keys, limit: int, chunk_size: int = 500) -> dict:
+        """
+        Latest `limit` measurements of many series, chronological.
+
+        keys: iterable of (parameter_name, machine_id); an empty machine_id
+        selects the parameter across all machines. Uses one windowed query
+        (ROW_NUMBER per series) per chunk of keys instead of one per series.
+
+        Returns {(parameter_name, machine_id): np.ndarray}.
+        """
+        keys = list(dict.fromkeys(keys))
+        rows = defaultdict(list)
+        scopes = (
+            ([k for k in keys if k[1]], ['parameter_name', 'machine_id']),
+            ([k for k in keys if not k[1]], ['parameter_name']),
+        )
+        for scoped_keys, partition in scopes:
+            wanted = set(scoped_keys)
+            for i in range(0, len(scoped_keys), chunk_size):
+                chunk = scoped_keys[i:i + chunk_size]
+                queryset = cls.get_queryset().filter(
+                    parameter_name__in={p for p, _ in chunk}
+                )
+                if len(partition) == 2:
+                    queryset = queryset.filter(machine_id__in={m for _, m in chunk})
+                queryset = queryset.annotate(
+                    row_number=Window(
+                        RowNumber(),
+                        partition_by=[F(field) for field in partition],
+                        order_by=[F('timestamp').desc(), F('id').desc()]
+                    )
+                ).filter(row_number__lte=limit)
+
+                for parameter, machine, value, row_number in queryset.values_list(
+                    'parameter_name', 'machine_id', 'value', 'row_number'
+                ):
+                    key = (parameter, machine if len(partition) == 2 else '')
+                    if key in wanted:
+                        rows[key].append((row_number, value))
+
+        series = {}
+        for key in keys:
+            ordered = sorted(rows.get(key, ()), key=lambda r: -r[0])
+            series[key] = np.array([value for _, value in ordered], dtype=float)
+        return series
+
+    @classmethod
+    def _merge_rollups(cls, resolution: str, buckets: dict) -> int:
+        """
+        Upsert rollups of one resolution.
+
+        buckets: {(parameter_name, machine_id, bucket_start): (count, mean, m2, min, max)};
+        summaries of buckets that already have a row are merged into it.
+        """
+        if not buckets:
+            return 0
+        starts = [key[2] for key in buckets]
+        existing = {
+            (row.parameter_name, row.machine_id, row.bucket_start): row
+            for row in SPCRollup.objects.select_for_update().filter(
+                resolution=resolution,
+                bucket_start__gte=min(starts),
+                bucket_start__lte=max(starts),
+                parameter_name__in={key[0] for key in buckets}
+            )
+        }
+        created, changed = [], []
+        for (parameter_name, machine_id, bucket_start), moments in buckets.items():
+            row = existing.get((parameter_name, machine_id, bucket_start))
+            if row is None:
+                row = SPCRollup(
+                    parameter_name=parameter_name,
+                    machine_id=machine_id,
+                    resolution=resolution,
+                    bucket_start=bucket_start
+                )
+                created.append(row)
+            else:
+                moments = spc.merge_moments(
+                    (row.count, row.mean, row.m2, row.min_value, row.max_value), moments
+                )
+                changed.append(row)
+            row.count, row.mean, row.m2, row.min_value, row.max_value = moments
+
+        if created:
+            SPCRollup.objects.bulk_create(created, batch_size=settings.SPC_INGEST_CHUNK_SIZE)
+        if changed:
+            SPCRollup.objects.bulk_update(
+                changed, ['count', 'mean', 'm2', 'min_value', 'max_value'],
+                batch_size=settings.SPC_INGEST_CHUNK_SIZE
+            )
+        return len(buckets)
+
+    @classmethod
+    def _raw_buckets(cls, queryset, resolution: str, by_machine: bool = True):
+        """Per-bucket (count, mean, m2, min, max) of raw points, aggregated in the database."""
+        fields = ['parameter_name', 'machine_id', 'bucket'] if by_machine else ['parameter_name', 'bucket']
+        rows = queryset.annotate(
+            bucket=Trunc('timestamp', resolution, tzinfo=dt_timezone.utc)
+        ).values(*fields).annotate(
+            count=Count('id'),
+            mean=Avg('value'),
+            variance=Variance('value'),
+            minimum=Min('value'),
+            maximum=Max('value'),
+        ).order_by()
+        for row in rows:
+            count = row['count']
+            yield (
+                (row['parameter_name'], row.get('machine_id', ''), row['bucket']),
+                (count, float(row['mean']), float(row['variance'] or 0) * count,
+                 float(row['minimum']), float(row['maximum']))
+            )
+
+    @classmethod
+    def _rollup_raw(cls, start, end) -> int:
+        """Fold raw points in [start, end) into minute rollups and delete them."""
+        queryset = cls.get_queryset().filter(timestamp__gte=start, timestamp__lt=end)
+        cls._merge_rollups('minute', dict(cls._raw_buckets(queryset, 'minute')))
+        deleted, _ = queryset.delete()
+        return deleted
+
+    @classmethod
+    def _rollup_minutes(cls, start, end) -> int:
+        """Fold minute rollups in [start, end) into hour rollups and delete them."""
+        queryset = SPCRollup.objects.filter(
+            resolution='minute', bucket_start__gte=start, bucket_start__lt=end
+        )
+        buckets = {}
+        for parameter_name, machine_id, bucket_start, *moments in queryset.values_list(
+            'parameter_name', 'machine_id', 'bucket_start', 'count', 'mean', 'm2', 'min_value', 'max_value'
+        ).iterator():
+            key = (parameter_name, machine_id, bucket_start.replace(minute=0, second=0, microsecond=0))
+            buckets[key] = spc.merge_moments(buckets.get(key), tuple(moments))
+        cls._merge_rollups('hour', buckets)
+        deleted, _ = queryset.delete()
+        return deleted
+
+    @classmethod
+    def apply_retention(
+        cls,
+        raw_days: int = None,
+        minute_days: int = None,
+        as_of=None,
+        step: timedelta = timedelta(days=1)
+    ) -> dict:
+        """
+        Downsample old SPC data (batch job).
+
+        Raw points older than raw_days are folded into minute rollups,
+        minute rollups older than minute_days into hour rollups. Work is
+        done in windows of `step`, one transaction each, so the job can be
+        interrupted and resumed. Cutoffs are aligned to bucket boundaries so
+        no minute or hour is split between two tiers.
+
+        Returns {'raw_rolled_up': n, 'minutes_rolled_up': n}.
+        """
+        raw_days = settings.SPC_RAW_RETENTION_DAYS if raw_days is None else raw_days
+        minute_days = settings.SPC_MINUTE_RETENTION_DAYS if minute_days is None else minute_days
+        if minute_days < raw_days:
+            raise ValidationException(
+                'Minute rollups must be kept at least as long as raw points', field='minute_days'
+            )
+
+        # Snapshots let accumulators reload without the deleted rows
+        cls.flush_accumulators()
+
+        now = as_of or timezone.now()
+        raw_cutoff = (now - timedelta(days=raw_days)).replace(second=0, microsecond=0)
+        minute_cutoff = (now - timedelta(days=minute_days)).replace(minute=0, second=0, microsecond=0)
+        result = {'raw_rolled_up': 0, 'minutes_rolled_up': 0}
+
+        # Raw points go first so fresh minute rollups can move on to hours in the same run
+        tiers = (
+            ('raw_rolled_up', cls._rollup_raw, raw_cutoff,
+             cls.get_queryset().filter(timestamp__lt=raw_cutoff), 'timestamp'),
+            ('minutes_rolled_up', cls._rollup_minutes, minute_cutoff,
+             SPCRollup.objects.filter(resolution='minute', bucket_start__lt=minute_cutoff), 'bucket_start'),
+        )
+        for counter, rollup, cutoff, pending, field in tiers:
+            start = pending.aggregate(oldest=Min(field))['oldest']
+            if start is None:
+                continue
+            start = start.replace(minute=0, second=0, microsecond=0)
+            while start < cutoff:
+                end = min(start + step, cutoff)
+                with transaction.atomic():
+                    result[counter] += rollup(start, end)
+                start = end
+        return result
+
+    @classmethod
+    def get_history(
+        cls,
+        parameter_name: str,
+        machine_id: str = '',
+        start=None,
+        end=None,
+        resolution: str = 'auto'
+    ) -> list:
+        """
+        Measurements of a parameter over a long window, stitched from raw
+        points and rollups.
+
+        resolution 'raw' returns raw points as they are and rollups at
+        their own resolution; 'minute' or 'hour' aggregates raw points in
+        the database and merges finer rollups up to it. 'auto' picks raw up
+        to a day, minutes up to a week and hours beyond. Buckets with the
+        same start are merged, so an empty machine_id gives one series
+        across all machines.
+
+        Returns [{'timestamp', 'resolution', 'count', 'mean', 'std_dev', 'min', 'max'}]
+        in chronological order.
+        """
+        end = end or timezone.now()
+        if resolution == 'auto':
+            span = end - start if start else None
+            if span is not None and span <= timedelta(days=1):
+                resolution = 'raw'
+            elif span is not None and span <= timedelta(days=7):
+                resolution = 'minute'
+            else:
+                resolution = 'hour'
+
+        raw = cls.get_queryset().filter(parameter_name=parameter_name, timestamp__lte=end)
+        rollups = SPCRollup.objects.filter(parameter_name=parameter_name, bucket_start__lte=end)
+        if machine_id:
+            raw = raw.filter(machine_id=machine_id)
+            rollups = rollups.filter(machine_id=machine_id)
+        if start:
+            raw = raw.filter(timestamp__gte=start)
+            # Buckets that started before `start` still overlap the window
+            rollups = rollups.filter(
+                bucket_start__gte=start.replace(minute=0, second=0, microsecond=0)
+            )
+
+        points = []
+        buckets = {}
+        if resolution == 'raw':
+            for timestamp, value in raw.order_by('timestamp', 'id').values_list('timestamp', 'value'):
+                value = float(value)
+                points.append((timestamp, 'raw', (1, value, 0.0, value, value)))
+        else:
+            for (_, _, bucket), moments in cls._raw_buckets(raw, resolution, by_machine=False):
+                buckets[(bucket, resolution)] = moments
+
+        for row in rollups.values_list(
+            'resolution', 'bucket_start', 'count', 'mean', 'm2', 'min_value', 'max_value'
+        ):
+            row_resolution, bucket_start, *moments = row
+            if resolution == 'hour' and row_resolution == 'minute':
+                row_resolution = 'hour'
+                bucket_start = bucket_start.replace(minute=0, second=0, microsecond=0)
+            key = (bucket_start, row_resolution)
+            buckets[key] = spc.merge_moments(buckets.get(key), tuple(moments))
+
+        points.extend((bucket, res, moments) for (bucket, res), moments in buckets.items())
+        points.sort(key=lambda point: point[0])
+        return [
+            {
+                'timestamp': timestamp,
+                'resolution': res,
+                'count': count,
+                'mean': mean,
+                'std_dev': (m2 / (count - 1)) ** 0.5 if count > 1 else 0.0,
+                'min': minimum,
+                'max': maximum,
+            }
+            for timestamp, res, (count, mean, m2, minimum, maximum) in points
+        ]
+
+    @classmethod
+    def get_baseline(cls, parameter_name: str, machine_id: str = '') -> SPCBaseline:
+        """Frozen baseline for a parameter and machine, falling back to the all-machines one."""
+        baselines = {
+            b.machine_id: b
+            for b in SPCBaseline.objects.filter(
+                parameter_name=parameter_name, machine_id__in={machine_id or '', ''}
+            )
+        }
+        return baselines.get(machine_id or '') or baselines.get('')
+
+    @classmethod
+    def baseline_limits(cls, baseline: SPCBaseline) -> dict:
+        return {field: getattr(baseline, field) for field in cls.BASELINE_FIELDS}
+
+    @classmethod
+    @transaction.atomic
+    def freeze_baseline(
+        cls,
+        parameter_name: str,
+        machine_id: str = '',
+        chart_type: str = 'imr',
+        subgroup_size: int = 1,
+        start=None,
+        end=None,
+        limit: int = None
+    ) -> SPCBaseline:
+        """
+        Compute control limits from a baseline period and freeze them.
+
+        The baseline covers measurements between start and end (or the last
+        `limit` ones). Later analyses use these limits until a new baseline
+        is frozen.
+        """
+        if chart_type not in spc.CHART_TYPES:
+            raise ValidationException(
+                f"Invalid chart type. Must be one of: {', '.join(spc.CHART_TYPES)}",
+                field='chart_type'
+            )
+
+        values = cls.get_series(parameter_name, machine_id, limit=limit, start=start, end=end)
+        try:
+            limits = spc.compute_limits(values, chart_type, subgroup_size)
+        except ValueError as exc:
+            raise BusinessRuleException('INSUFFICIENT_BASELINE_DATA', str(exc))
+
+        baseline, _ = SPCBaseline.objects.update_or_create(
+            parameter_name=parameter_name,
+            machine_id=machine_id or '',
+            defaults={
+                **limits,
+                'baseline_start': start,
+                'baseline_end': end,
+            }
+        )
+        cls.invalidate_control_limits()
+        transaction.on_commit(cls.invalidate_control_limits)
+        return baseline
+
+    @classmethod
+    def analyze(
+        cls,
+        parameter_name: str,
+        machine_id: str = '',
+        limit: int = 1000,
+        chart_type: str = None
+    ) -> dict:
+        """
+        Control chart of the latest measurements with Nelson rule violations.
+
+        Uses the frozen baseline when there is one; otherwise limits are
+        estimated from the series (reported with baseline=None).
+        """
+        values = cls.get_series(parameter_name, machine_id, limit=limit)
+        if values.size == 0:
             return None
 
-        from statistics import mean, stdev
-        values_float = [float(v) for v in values]
+        baseline = cls.get_baseline(parameter_name, machine_id)
+        if baseline:
+            limits = cls.baseline_limits(baseline)
+            if chart_type and chart_type != limits['chart_type']:
+                # Individuals based charts can share the baseline's sigma
+                if limits['subgroup_size'] == 1 and chart_type in ('imr', 'ewma', 'cusum'):
+                    limits['chart_type'] = chart_type
+                else:
+                    raise ValidationException(
+                        f"Baseline is frozen for a '{limits['chart_type']}' chart",
+                        field='chart_type'
+                    )
+        else:
+            try:
+                limits = spc.compute_limits(values, chart_type or 'imr', 1)
+            except ValueError as exc:
+                raise BusinessRuleException('INSUFFICIENT_DATA', str(exc))
+
+        chart = spc.chart_series(values, limits)
+        out_of_control = spc.out_of_control(chart)
+        result = {
+            'parameter_name': parameter_name,
+            'machine_id': machine_id or '',
+            'baseline': baseline.id if baseline else None,
+            'limits': limits,
+            'points': chart['points'].tolist(),
+            'dispersion': [None if np.isnan(v) else v for v in chart['dispersion'].tolist()],
+            'violations': spc.summarize_violations(chart['rules']),
+            'out_of_control_points': np.flatnonzero(out_of_control).tolist(),
+        }
+        if 'ewma' in chart:
+            result['ewma'] = {
+                'statistic': chart['ewma']['statistic'].tolist(),
+                'ucl': chart['ewma']['ucl'].tolist(),
+                'lcl': chart['ewma']['lcl'].tolist(),
+            }
+        if 'cusum' in chart:
+            result['cusum'] = {
+                'upper': chart['cusum']['upper'].tolist(),
+                'lower': chart['cusum']['lower'].tolist(),
+                'decision_interval': float(chart['cusum']['decision_interval']),
+            }
+        return result
+
+    @classmethod
+    def evaluate_baselines(cls, baselines=None, points: int = 1000) -> list:
+        """
+        Batch job: evaluate the latest points of every baselined series.
+
+        Series are loaded with windowed queries in chunks, left-padded with
+        NaN into one (series x points) matrix per chart layout and evaluated
+        with a single vectorized pass of the rule engine.
+
+        Returns [{'parameter_name', 'machine_id', 'points', 'violations'}]
+        for series with at least one out-of-control point.
+        """
+        baselines = list(baselines if baselines is not None else SPCBaseline.objects.all())
+
+        window = points * max((b.subgroup_size for b in baselines), default=1)
+        series = cls.get_latest_series(
+            ((b.parameter_name, b.machine_id) for b in baselines), window
+        )
+
+        groups = defaultdict(list)
+        for baseline in baselines:
+            limits = cls.baseline_limits(baseline)
+            values = series[(baseline.parameter_name, baseline.machine_id)]
+            values = values[-points * limits['subgroup_size']:] if values.size else values
+            # Drop the oldest points so subgroups stay aligned to the newest one
+            values = values[values.size % limits['subgroup_size']:]
+            groups[(limits['chart_type'], limits['subgroup_size'])].append(
+                (baseline, limits, values)
+            )
+
+        findings = []
+        for (chart_type, subgroup_size), members in groups.items():
+            width = max(values.size for _, _, values in members)
+            width -= width % subgroup_size
+            if width == 0:
+                continue
+            matrix = np.full((len(members), width), np.nan)
+            for row, (_, _, values) in enumerate(members):
+                if values.size:
+                    matrix[row, width - values.size:] = values
+
+            limits = {
+                'chart_type': chart_type,
+                'subgroup_size': subgroup_size,
+                'center_line': np.array([l['center_line'] for _, l, _ in members]),
+                'sigma': np.array([l['sigma'] for _, l, _ in members]),
+            }
+            chart = spc.chart_series(matrix, limits)
+            flags = spc.out_of_control(chart)
+
+            for row in np.flatnonzero(flags.any(axis=-1)):
+                baseline, _, values = members[row]
+                offset = flags.shape[-1] - values.size // subgroup_size
+                findings.append({
+                    'parameter_name': baseline.parameter_name,
+                    'machine_id': baseline.machine_id,
+                    'points': (np.flatnonzero(flags[row]) - offset).tolist(),
+                    'violations': [
+                        {**v, 'points': [p - offset for p in v['points']]}
+                        for v in spc.summarize_violations(
+                            {rule: mask[row] for rule, mask in chart['rules'].items()}
+                        )
+                    ],
+                })
+        return findings
+
+    @classmethod
+    def get_parameter_stats(cls, parameter_name: str, limit: int = 100, machine_id: str = ''):
+        """
+        Get statistical analysis for a parameter.
+
+        Returns mean, std dev, min, max of the recent values and the control
+        limits, taken from the frozen baseline when there is one.
+        """
+        values = cls.get_series(parameter_name, machine_id, limit=limit)
+        if values.size == 0:
+            return None
 
         stats = {
             'parameter_name': parameter_name,
-            'count': len(values),
-            'mean': mean(values_float),
-            'min': min(values_float),
-            'max': max(values_float),
+            'count': int(values.size),
+            'mean': float(values.mean()),
+            'min': float(values.min()),
+            'max': float(values.max()),
         }
 
-        if len(values) > 1:
-            stats['std_dev'] = stdev(values_float)
-            # Control limits (3-sigma)
-            stats['ucl'] = stats['mean'] + 3 * stats['std_dev']
-            stats['lcl'] = stats['mean'] - 3 * stats['std_dev']
+        baseline = cls.get_baseline(parameter_name, machine_id)
+        if values.size > 1:
+            stats['std_dev'] = float(values.std(ddof=1))
+            if not baseline:
+                # Control limits (3-sigma)
+                stats['ucl'] = stats['mean'] + 3 * stats['std_dev']
+                stats['lcl'] = stats['mean'] - 3 * stats['std_dev']
+        if baseline:
+            stats['center_line'] = baseline.center_line
+            stats['sigma'] = baseline.sigma
+            stats['ucl'] = baseline.center_line + 3 * baseline.sigma
+            stats['lcl'] = baseline.center_line - 3 * baseline.sigma
+            stats['baseline'] = baseline.id
 
         return stats
 
@@ -323,27 +1665,104 @@ class SPCService(BaseService):
         }
 
     @classmethod
-    def check_out_of_control(cls, parameter_name: str, value: Decimal) -> dict:
+    def check_out_of_control(
+        cls,
+        parameter_name: str,
+        value: Decimal,
+        machine_id: str = ''
+    ) -> dict:
         """
-        Check if a new measurement is out of control limits.
+        Check if a new measurement is out of control.
 
-        Returns status and any violations detected.
+        Evaluates all Nelson rules for the new point against the frozen
+        baseline (or the rolling window's mean and sigma without one) using
+        the in-memory running statistics, so no query is needed once the
+        series' accumulator is loaded.
         """
-        stats = cls.get_parameter_stats(parameter_name)
-
-        if not stats or 'ucl' not in stats:
-            return {'in_control': True, 'reason': 'Insufficient data'}
-
-        value_float = float(value)
-        violations = []
-
-        if value_float > stats['ucl']:
-            violations.append(f"Value {value_float} exceeds UCL {stats['ucl']:.4f}")
-        if value_float < stats['lcl']:
-            violations.append(f"Value {value_float} below LCL {stats['lcl']:.4f}")
+        accumulator = cls.get_accumulator(parameter_name, machine_id)
+        limits = cls.get_control_limits(parameter_name, machine_id)
+
+        with _accumulator_lock:
+            if limits is None:
+                if len(accumulator.window) < 2:
+                    return {'in_control': True, 'reason': 'Insufficient data'}
+                limits = (accumulator.window_mean, accumulator.window_std_dev)
+            center, sigma = limits
+            rules = accumulator.check(value, center, sigma)
+            statistics = {
+                'parameter_name': parameter_name,
+                'count': accumulator.count,
+                'mean': accumulator.mean,
+                'std_dev': accumulator.std_dev,
+                'min': accumulator.minimum,
+                'max': accumulator.maximum,
+                'window_count': len(accumulator.window),
+                'window_mean': accumulator.window_mean,
+                'window_std_dev': accumulator.window_std_dev,
+            }
 
         return {
-            'in_control': len(violations) == 0,
-            'violations': violations,
-            'statistics': stats
+            'in_control': len(rules) == 0,
+            'violations': [spc.NELSON_RULES[rule] for rule in rules],
+            'limits': {
+                'center_line': center,
+                'ucl': center + 3 * sigma,
+                'lcl': center - 3 * sigma,
+            },
+            'statistics': statistics,
         }
+
+
+class SPCIngestQueue:
+    """
+    Thread-safe in-process buffer for measurement producers.
+
+    Collectors running inside the Django process (gauge gateways, OPC
+    pollers) put measurements as they arrive; the buffer is ingested in
+    one batch when it reaches flush_size or when flush_interval seconds
+    have passed since the last flush.
+
+    Usage:
+        spc_ingest_queue.put([{'parameter_name': 'diameter', 'value': 10.02}])
+        spc_ingest_queue.flush()
+    """
+
+    def __init__(self, flush_size: int = None, flush_interval: float = 1.0):
+        self.flush_size = flush_size or settings.SPC_INGEST_CHUNK_SIZE
+        self.flush_interval = flush_interval
+        self._items = []
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def put(self, measurements) -> dict:
+        """Buffer measurements; returns the ingest result if this triggered a flush."""
+        with self._lock:
+            self._items.extend(measurements)
+            due = (
+                len(self._items) >= self.flush_size
+                or time.monotonic() - self._flushed_at >= self.flush_interval
+            )
+        return self.flush() if due else None
+
+    def flush(self) -> dict:
+        """Ingest everything buffered so far."""
+        with self._lock:
+            items, self._items = self._items, []
+            self._flushed_at = time.monotonic()
+        if not items:
+            return {'accepted': 0, 'rejected': [], 'violations': []}
+
+        result = {'accepted': 0, 'rejected': [], 'violations': []}
+        for start in range(0, len(items), settings.SPC_INGEST_MAX_BATCH):
+            chunk = SPCService.ingest(items[start:start + settings.SPC_INGEST_MAX_BATCH])
+            result['accepted'] += chunk['accepted']
+            result['rejected'].extend({**r, 'index': r['index'] + start} for r in chunk['rejected'])
+            result['violations'].extend({**v, 'index': v['index'] + start} for v in chunk['violations'])
+        return result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+spc_ingest_queue = SPCIngestQueue()
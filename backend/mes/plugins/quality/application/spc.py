@@ -0,0 +1,433 @@
+"""
+Statistical Process Control engine.
+
+Vectorized control chart and Nelson rule computations on NumPy arrays.
+Functions accept a 1-D series or a 2-D array with one series per row, so
+a batch of parameters can be evaluated in a single pass. Missing points
+(NaN, e.g. left padding of shorter series) never trigger a rule.
+"""
+import math
+
+import numpy as np
+
+# Control chart constants per subgroup size n (ASTM / Montgomery tables)
+D2 = {2: 1.128, 3: 1.693, 4: 2.059, 5: 2.326, 6: 2.534, 7: 2.704, 8: 2.847,
+      9: 2.970, 10: 3.078, 11: 3.173, 12: 3.258, 13: 3.336, 14: 3.407,
+      15: 3.472, 16: 3.532, 17: 3.588, 18: 3.640, 19: 3.689, 20: 3.735,
+      21: 3.778, 22: 3.819, 23: 3.858, 24: 3.895, 25: 3.931}
+D3 = {2: 0.0, 3: 0.0, 4: 0.0, 5: 0.0, 6: 0.0, 7: 0.076, 8: 0.136, 9: 0.184,
+      10: 0.223, 11: 0.256, 12: 0.283, 13: 0.307, 14: 0.328, 15: 0.347,
+      16: 0.363, 17: 0.378, 18: 0.391, 19: 0.403, 20: 0.415, 21: 0.425,
+      22: 0.434, 23: 0.443, 24: 0.451, 25: 0.459}
+D4 = {2: 3.267, 3: 2.574, 4: 2.282, 5: 2.114, 6: 2.004, 7: 1.924, 8: 1.864,
+      9: 1.816, 10: 1.777, 11: 1.744, 12: 1.717, 13: 1.693, 14: 1.672,
+      15: 1.653, 16: 1.637, 17: 1.622, 18: 1.608, 19: 1.597, 20: 1.585,
+      21: 1.575, 22: 1.566, 23: 1.557, 24: 1.548, 25: 1.541}
+
+CHART_TYPES = ('imr', 'xbar_r', 'xbar_s', 'ewma', 'cusum')
+
+NELSON_RULES = {
+    1: 'One point beyond 3 sigma',
+    2: 'Nine points in a row on the same side of the center line',
+    3: 'Six points in a row steadily increasing or decreasing',
+    4: 'Fourteen points in a row alternating up and down',
+    5: 'Two out of three points beyond 2 sigma on the same side',
+    6: 'Four out of five points beyond 1 sigma on the same side',
+    7: 'Fifteen points in a row within 1 sigma',
+    8: 'Eight points in a row beyond 1 sigma on either side',
+}
+
+# Points a rule needs to look back over (including the current one)
+RULE_WINDOWS = {1: 1, 2: 9, 3: 6, 4: 14, 5: 3, 6: 5, 7: 15, 8: 8}
+
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+
+
+def c4(n: int) -> float:
+    """Bias correction constant of the sample standard deviation."""
+    from math import gamma, sqrt
+    return sqrt(2.0 / (n - 1)) * gamma(n / 2.0) / gamma((n - 1) / 2.0)
+
+
+def _window_count(condition: np.ndarray, window: int) -> np.ndarray:
+    """
+    Number of True values in the trailing window ending at each position.
+
+    Positions without a full window get -1 so they never satisfy a rule.
+    """
+    condition = np.asarray(condition, dtype=np.int32)
+    cumulative = np.cumsum(condition, axis=-1)
+    counts = cumulative.copy()
+    counts[..., window:] = cumulative[..., window:] - cumulative[..., :-window]
+    counts[..., :window - 1] = -1
+    return counts
+
+
+def _shift(flags: np.ndarray, offset: int) -> np.ndarray:
+    """Align flags computed on a shorter (differenced) series to the points."""
+    if offset == 0:
+        return flags
+    pad = np.zeros(flags.shape[:-1] + (offset,), dtype=bool)
+    return np.concatenate([pad, flags], axis=-1)
+
+
+def nelson_rules(values, center, sigma, rules=None) -> dict:
+    """
+    Evaluate the eight Nelson rules over one series or a batch of series.
+
+    values: array of shape (points,) or (series, points)
+    center, sigma: scalars or arrays broadcastable to (series, 1)
+
+    Returns {rule_number: boolean array shaped like values} with True at
+    the last point of every window that violates the rule.
+    """
+    x = np.asarray(values, dtype=float)
+    center = np.asarray(center, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    if x.ndim == 2:
+        center = center.reshape(-1, 1) if center.ndim else center
+        sigma = sigma.reshape(-1, 1) if sigma.ndim else sigma
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (x - center) / sigma
+    valid = np.isfinite(z)
+    z = np.where(valid, z, 0.0)
+
+    above = valid & (z > 0)
+    below = valid & (z < 0)
+    rules = set(rules or NELSON_RULES)
+    result = {}
+
+    if 1 in rules:
+        result[1] = valid & (np.abs(z) > 3)
+    if 2 in rules:
+        result[2] = (_window_count(above, 9) == 9) | (_window_count(below, 9) == 9)
+    if 3 in rules or 4 in rules:
+        diff = np.diff(np.where(valid, x, np.nan), axis=-1)
+        rising = np.isfinite(diff) & (diff > 0)
+        falling = np.isfinite(diff) & (diff < 0)
+        if 3 in rules:
+            result[3] = _shift(
+                (_window_count(rising, 5) == 5) | (_window_count(falling, 5) == 5), 1
+            )
+        if 4 in rules:
+            direction = rising.astype(np.int8) - falling.astype(np.int8)
+            alternating = (direction[..., 1:] * direction[..., :-1]) < 0
+            result[4] = _shift(_window_count(alternating, 12) == 12, 2)
+    if 5 in rules:
+        result[5] = (
+            (_window_count(valid & (z > 2), 3) >= 2)
+            | (_window_count(valid & (z < -2), 3) >= 2)
+        )
+    if 6 in rules:
+        result[6] = (
+            (_window_count(valid & (z > 1), 5) >= 4)
+            | (_window_count(valid & (z < -1), 5) >= 4)
+        )
+    if 7 in rules:
+        result[7] = _window_count(valid & (np.abs(z) < 1), 15) == 15
+    if 8 in rules:
+        result[8] = _window_count(valid & (np.abs(z) > 1), 8) == 8
+
+    return result
+
+
+def summarize_violations(flags: dict) -> list:
+    """Turn rule flags of one series into [{'rule', 'description', 'points'}]."""
+    violations = []
+    for rule, mask in sorted(flags.items()):
+        points = np.flatnonzero(mask)
+        if points.size:
+            violations.append({
+                'rule': rule,
+                'description': NELSON_RULES[rule],
+                'points': points.tolist(),
+            })
+    return violations
+
+
+def subgroups(values, size: int) -> np.ndarray:
+    """Split a series into consecutive subgroups, dropping an incomplete tail."""
+    x = np.asarray(values, dtype=float)
+    count = x.shape[-1] // size
+    return x[..., :count * size].reshape(x.shape[:-1] + (count, size))
+
+
+def imr_limits(values) -> dict:
+    """Individuals and moving range chart limits from a baseline series."""
+    x = np.asarray(values, dtype=float)
+    moving_range = np.abs(np.diff(x))
+    mr_bar = float(moving_range.mean()) if moving_range.size else 0.0
+    center = float(x.mean())
+    sigma = mr_bar / D2[2]
+    return {
+        'chart_type': 'imr',
+        'subgroup_size': 1,
+        'center_line': center,
+        'sigma': sigma,
+        'ucl': center + 3 * sigma,
+        'lcl': center - 3 * sigma,
+        'dispersion_center': mr_bar,
+        'dispersion_ucl': D4[2] * mr_bar,
+        'dispersion_lcl': 0.0,
+    }
+
+
+def xbar_r_limits(values, size: int) -> dict:
+    """X-bar and range chart limits from a baseline series."""
+    groups = subgroups(values, size)
+    ranges = groups.max(axis=-1) - groups.min(axis=-1)
+    center = float(groups.mean())
+    r_bar = float(ranges.mean())
+    sigma = r_bar / D2[size]
+    spread = 3 * sigma / np.sqrt(size)
+    return {
+        'chart_type': 'xbar_r',
+        'subgroup_size': size,
+        'center_line': center,
+        'sigma': sigma,
+        'ucl': center + spread,
+        'lcl': center - spread,
+        'dispersion_center': r_bar,
+        'dispersion_ucl': D4[size] * r_bar,
+        'dispersion_lcl': D3[size] * r_bar,
+    }
+
+
+def xbar_s_limits(values, size: int) -> dict:
+    """X-bar and standard deviation chart limits from a baseline series."""
+    groups = subgroups(values, size)
+    deviations = groups.std(axis=-1, ddof=1)
+    center = float(groups.mean())
+    s_bar = float(deviations.mean())
+    c4_n = c4(size)
+    sigma = s_bar / c4_n
+    spread = 3 * sigma / np.sqrt(size)
+    b = 3 * np.sqrt(1 - c4_n ** 2) / c4_n
+    return {
+        'chart_type': 'xbar_s',
+        'subgroup_size': size,
+        'center_line': center,
+        'sigma': sigma,
+        'ucl': center + spread,
+        'lcl': center - spread,
+        'dispersion_center': s_bar,
+        'dispersion_ucl': (1 + b) * s_bar,
+        'dispersion_lcl': max(0.0, 1 - b) * s_bar,
+    }
+
+
+def compute_limits(values, chart_type: str = 'imr', subgroup_size: int = 1) -> dict:
+    """Baseline (phase I) limits for a chart type."""
+    x = np.asarray(values, dtype=float)
+    if chart_type in ('xbar_r', 'xbar_s'):
+        if subgroup_size not in D2:
+            raise ValueError(f'Subgroup size must be between 2 and 25, got {subgroup_size}')
+        if x.size < 2 * subgroup_size:
+            raise ValueError('At least two complete subgroups are required')
+        limits = (xbar_r_limits if chart_type == 'xbar_r' else xbar_s_limits)(x, subgroup_size)
+    else:
+        if x.size < 2:
+            raise ValueError('At least two points are required')
+        limits = imr_limits(x)
+        # EWMA and CUSUM work on individuals with the I-MR sigma estimate
+        limits['chart_type'] = chart_type
+    limits['sample_count'] = int(x.size)
+    return limits
+
+
+def ewma(values, center, sigma, lam: float = EWMA_LAMBDA, width: float = EWMA_L) -> dict:
+    """
+    EWMA statistic and its time-varying control limits.
+
+    The recursion runs over the time axis only, vectorized across series.
+    """
+    x = np.asarray(values, dtype=float)
+    center_b = np.asarray(center, dtype=float)
+    sigma_b = np.asarray(sigma, dtype=float)
+    if x.ndim == 2:
+        center_b = center_b.reshape(-1, 1) if center_b.ndim else center_b
+        sigma_b = sigma_b.reshape(-1, 1) if sigma_b.ndim else sigma_b
+
+    statistic = np.empty_like(x)
+    previous = np.broadcast_to(center_b, x.shape[:-1] + (1,))[..., 0].astype(float)
+    for t in range(x.shape[-1]):
+        column = x[..., t]
+        current = np.where(np.isnan(column), previous, lam * column + (1 - lam) * previous)
+        statistic[..., t] = current
+        previous = current
+
+    steps = np.arange(1, x.shape[-1] + 1)
+    spread = width * sigma_b * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * steps)))
+    ucl = center_b + spread
+    lcl = center_b - spread
+    return {
+        'statistic': statistic,
+        'ucl': ucl,
+        'lcl': lcl,
+        'signals': (statistic > ucl) | (statistic < lcl),
+    }
+
+
+def cusum(values, center, sigma, k: float = CUSUM_K, h: float = CUSUM_H) -> dict:
+    """
+    Tabular CUSUM with reference value k and decision interval h (in sigmas).
+    """
+    x = np.asarray(values, dtype=float)
+    center_b = np.asarray(center, dtype=float)
+    sigma_b = np.asarray(sigma, dtype=float)
+    if x.ndim == 2:
+        center_b = center_b.reshape(-1, 1) if center_b.ndim else center_b
+        sigma_b = sigma_b.reshape(-1, 1) if sigma_b.ndim else sigma_b
+    shape = x.shape[:-1]
+    center_v = np.broadcast_to(center_b, shape + (1,))[..., 0]
+    slack = np.broadcast_to(k * sigma_b, shape + (1,))[..., 0]
+
+    upper = np.empty_like(x)
+    lower = np.empty_like(x)
+    c_plus = np.zeros(shape)
+    c_minus = np.zeros(shape)
+    for t in range(x.shape[-1]):
+        column = x[..., t]
+        missing = np.isnan(column)
+        c_plus = np.where(missing, c_plus, np.maximum(0.0, column - (center_v + slack) + c_plus))
+        c_minus = np.where(missing, c_minus, np.maximum(0.0, (center_v - slack) - column + c_minus))
+        upper[..., t] = c_plus
+        lower[..., t] = c_minus
+
+    decision = h * sigma_b
+    return {
+        'upper': upper,
+        'lower': lower,
+        'decision_interval': decision,
+        'signals': (upper > decision) | (lower > decision),
+    }
+
+
+def chart_series(values, limits: dict) -> dict:
+    """
+    Plotted statistic and rule flags of a chart for one series or a batch.
+
+    Subgroup charts plot subgroup means with sigma / sqrt(n); EWMA and CUSUM
+    add their own signals under the key 'signals'.
+    """
+    x = np.asarray(values, dtype=float)
+    chart_type = limits['chart_type']
+    center = limits['center_line']
+    sigma = limits['sigma']
+
+    if chart_type in ('xbar_r', 'xbar_s'):
+        size = limits['subgroup_size']
+        groups = subgroups(x, size)
+        points = groups.mean(axis=-1)
+        if chart_type == 'xbar_r':
+            dispersion = groups.max(axis=-1) - groups.min(axis=-1)
+        else:
+            dispersion = groups.std(axis=-1, ddof=1)
+        point_sigma = np.asarray(sigma) / np.sqrt(size)
+    else:
+        points = x
+        dispersion = np.abs(np.diff(x, axis=-1, prepend=np.nan))
+        point_sigma = sigma
+
+    result = {
+        'points': points,
+        'dispersion': dispersion,
+        'rules': nelson_rules(points, center, point_sigma),
+    }
+    if chart_type == 'ewma':
+        result['ewma'] = ewma(points, center, sigma)
+    elif chart_type == 'cusum':
+        result['cusum'] = cusum(points, center, sigma)
+    return result
+
+
+def out_of_control(chart: dict):
+    """Boolean per point: any Nelson rule or EWMA/CUSUM signal fired."""
+    flags = np.zeros(np.shape(chart['points']), dtype=bool)
+    for mask in chart['rules'].values():
+        flags |= mask
+    for key in ('ewma', 'cusum'):
+        if key in chart:
+            flags |= chart[key]['signals']
+    return flags
+
+
+def merge_moments(a, b):
+    """
+    Combine two summaries (count, mean, m2, minimum, maximum) of disjoint
+    sets of values (Chan et al. parallel variance); either may be None.
+    When one side is empty the other is returned unchanged.
+    """
+    if b is None or not b[0]:
+        return a
+    if a is None or not a[0]:
+        return b
+    count = a[0] + b[0]
+    delta = b[1] - a[1]
+    mean = a[1] + delta * b[0] / count
+    m2 = a[2] + b[2] + delta * delta * a[0] * b[0] / count
+    return (count, mean, m2, min(a[3], b[3]), max(a[4], b[4]))
+
+
+class RunningStatistics:
+    """
+    Incremental statistics of one measurement series.
+
+    Welford mean/variance, min and max over all values plus a ring buffer
+    of the most recent ones. All-time statistics update in O(1) per value;
+    rolling-window statistics are computed from the buffer when read
+    (constant cost for a fixed window) so no rounding error accumulates.
+    """
+
+    def __init__(self, window_size: int = 100, count: int = 0, mean: float = 0.0,
+                 m2: float = 0.0, minimum: float = None, maximum: float = None,
+                 recent=(), last_data_id: int = 0):
+        from collections import deque
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.last_data_id = last_data_id
+        self.window = deque((float(value) for value in recent), maxlen=window_size)
+
+    def push(self, value: float, data_id: int = None):
+        """Add one measurement."""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.window.append(value)
+        if data_id is not None:
+            self.last_data_id = max(self.last_data_id, data_id)
+
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation over all values."""
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    @property
+    def window_mean(self) -> float:
+        return math.fsum(self.window) / len(self.window) if self.window else 0.0
+
+    @property
+    def window_std_dev(self) -> float:
+        """Sample standard deviation over the ring buffer (two-pass)."""
+        n = len(self.window)
+        if n < 2:
+            return 0.0
+        mean = self.window_mean
+        return (math.fsum((value - mean) ** 2 for value in self.window) / (n - 1)) ** 0.5
+
+    def check(self, value: float, center: float, sigma: float) -> list:
+        """Nelson rules fired by a new value, given the buffered history."""
+        history = list(self.window)[-(max(RULE_WINDOWS.values()) - 1):]
+        flags = nelson_rules(np.array(history + [float(value)]), center, sigma)
+        return [rule for rule, mask in sorted(flags.items()) if mask[-1]]
@@ -0,0 +1,104 @@
+"""
+Inspection tolerance specifications.
+
+Parses the free-text `InspectionConfig.parameters` of variable checks into
+structured limits once, when the config is saved, and scores measured
+results against compiled limits in a vectorized pass.
+
+Accepted formats (a trailing unit is optional):
+    "10.0 +/- 0.1 mm"   "10.0 ± 0.1"      symmetric tolerance
+    "10.0 +0.2/-0.1"    "10.0 +0.2 -0.1"  asymmetric tolerance
+    "9.9 .. 10.1"       "9.9 - 10.1"      range
+    "<= 5", "max 5"     ">= 2", "min 2"   one-sided limit
+    "10.0"                                exact value
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+
+_NUMBER = r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)'
+_UNIT = r'(?:\s*(?P<unit>[^\d\s+\-±<>=.][^\s]*))?'
+
+_PATTERNS = [
+    ('symmetric', re.compile(
+        rf'^(?P<nominal>{_NUMBER})\s*(?:\+/-|±)\s*(?P<tolerance>{_NUMBER}){_UNIT}$')),
+    ('asymmetric', re.compile(
+        rf'^(?P<nominal>{_NUMBER})\s*\+\s*(?P<plus>\d+(?:\.\d*)?|\.\d+)\s*/?\s*'
+        rf'-\s*(?P<minus>\d+(?:\.\d*)?|\.\d+){_UNIT}$')),
+    ('range', re.compile(
+        rf'^(?P<lower>{_NUMBER})\s*(?:\.\.|-|to)\s*(?P<upper>{_NUMBER}){_UNIT}$', re.IGNORECASE)),
+    ('maximum', re.compile(rf'^(?:<=?|≤|max\.?)\s*(?P<upper>{_NUMBER}){_UNIT}$', re.IGNORECASE)),
+    ('minimum', re.compile(rf'^(?:>=?|≥|min\.?)\s*(?P<lower>{_NUMBER}){_UNIT}$', re.IGNORECASE)),
+    ('exact', re.compile(rf'^(?P<nominal>{_NUMBER}){_UNIT}$')),
+]
+
+
+def parse_spec(text: str) -> dict:
+    """
+    Compile a tolerance specification.
+
+    Returns {'nominal', 'lower', 'upper', 'unit'} with Decimal limits
+    (None where unbounded). Raises ValueError when the text is not a
+    recognised specification or the limits are inverted.
+    """
+    text = (text or '').strip()
+    for kind, pattern in _PATTERNS:
+        match = pattern.match(text)
+        if not match:
+            continue
+        groups = {k: v for k, v in match.groupdict().items() if v is not None}
+        try:
+            numbers = {k: Decimal(v) for k, v in groups.items() if k != 'unit'}
+        except InvalidOperation:
+            raise ValueError(f"Invalid number in specification '{text}'")
+
+        nominal = numbers.get('nominal')
+        lower, upper = numbers.get('lower'), numbers.get('upper')
+        if kind == 'symmetric':
+            tolerance = abs(numbers['tolerance'])
+            lower, upper = nominal - tolerance, nominal + tolerance
+        elif kind == 'asymmetric':
+            lower, upper = nominal - numbers['minus'], nominal + numbers['plus']
+        elif kind == 'exact':
+            lower = upper = nominal
+        elif kind == 'range':
+            nominal = (lower + upper) / 2
+
+        if lower is not None and upper is not None and lower > upper:
+            raise ValueError(f"Lower limit above upper limit in '{text}'")
+        return {
+            'nominal': nominal,
+            'lower': lower,
+            'upper': upper,
+            'unit': groups.get('unit', ''),
+        }
+    raise ValueError(f"Unrecognised specification '{text}'")
+
+
+def parse_values(values) -> np.ndarray:
+    """Measured results as floats; NaN for anything that is not a finite number."""
+    parsed = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        try:
+            parsed[i] = float(value)
+        except (TypeError, ValueError):
+            continue
+    parsed[~np.isfinite(parsed)] = np.nan
+    return parsed
+
+
+def within_limits(values, lower, upper) -> np.ndarray:
+    """
+    Element-wise LSL <= value <= USL.
+
+    lower/upper are arrays aligned with values, NaN where unbounded; NaN
+    values (unparsable results) never pass.
+    """
+    values = np.asarray(values, dtype=float)
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    with np.errstate(invalid='ignore'):
+        above = np.isnan(lower) | (values >= lower)
+        below = np.isnan(upper) | (values <= upper)
+    return ~np.isnan(values) & above & below
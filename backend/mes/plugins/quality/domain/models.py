@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from mes.plugins.basic.domain.models import Product
 from mes.plugins.routing.domain.models import Operation
 
@@ -15,6 +16,14 @@ class InspectionConfig(models.Model):
     description = models.CharField(max_length=255)
     parameters = models.CharField(
         max_length=255, blank=True)  # e.g., "10.0 +/- 0.1"
+    # Limits compiled from parameters when the config is saved (None = unbounded)
+    nominal = models.DecimalField(
+        max_digits=14, decimal_places=6, null=True, blank=True)
+    lower_limit = models.DecimalField(
+        max_digits=14, decimal_places=6, null=True, blank=True)
+    upper_limit = models.DecimalField(
+        max_digits=14, decimal_places=6, null=True, blank=True)
+    unit = models.CharField(max_length=20, blank=True)
     mandatory = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -31,6 +40,16 @@ class QualityCheck(models.Model):
     passed = models.BooleanField()
     inspector_name = models.CharField(max_length=255)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # NCR raised for this failure (one NCR per order and config in a batch)
+    ncr = models.ForeignKey(
+        'NCR', on_delete=models.SET_NULL, null=True, blank=True, related_name='checks')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['config', 'timestamp']),
+            models.Index(fields=['order_number']),
+            models.Index(fields=['timestamp']),
+        ]
 
     def __str__(self):
         return f"{self.order_number} - {self.config.description}: {self.result_value}"
@@ -60,8 +79,115 @@ class NCR(models.Model):
 class SPCData(models.Model):
     parameter_name = models.CharField(max_length=100)
     value = models.DecimalField(max_digits=10, decimal_places=4)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Sample time; gauges send their own, otherwise the time of recording
+    timestamp = models.DateTimeField(default=timezone.now)
     machine_id = models.CharField(max_length=100, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['parameter_name', 'timestamp']),
+            models.Index(fields=['parameter_name', 'machine_id', 'timestamp']),
+            models.Index(fields=['timestamp']),
+        ]
+
     def __str__(self):
         return f"{self.parameter_name}: {self.value}"
+
+
+class SPCRollup(models.Model):
+    """Downsampled SPC measurements of one series over a minute or an hour.
+    Raw points past the retention period are folded into minute rollups,
+    which are later folded into hour rollups; m2 is the sum of squared
+    deviations from the mean, so buckets can be merged without the raw data.
+    """
+    RESOLUTIONS = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+    ]
+
+    parameter_name = models.CharField(max_length=100)
+    machine_id = models.CharField(max_length=100, blank=True)
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    mean = models.FloatField()
+    m2 = models.FloatField(default=0)
+    min_value = models.FloatField()
+    max_value = models.FloatField()
+
+    class Meta:
+        verbose_name = "SPC Rollup"
+        verbose_name_plural = "SPC Rollups"
+        unique_together = ('parameter_name', 'machine_id', 'resolution', 'bucket_start')
+        indexes = [
+            models.Index(fields=['parameter_name', 'resolution', 'bucket_start']),
+            models.Index(fields=['resolution', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.parameter_name} ({self.machine_id or '-'}) {self.resolution} {self.bucket_start}"
+
+
+class SPCBaseline(models.Model):
+    """Control limits frozen from a baseline (phase I) period.
+    Stored per parameter and machine; an empty machine_id covers all machines.
+    Limits are only recomputed when a new baseline is frozen.
+    """
+    CHART_TYPES = [
+        ('imr', 'Individuals / Moving Range'),
+        ('xbar_r', 'X-bar / Range'),
+        ('xbar_s', 'X-bar / Standard Deviation'),
+        ('ewma', 'EWMA'),
+        ('cusum', 'CUSUM'),
+    ]
+
+    parameter_name = models.CharField(max_length=100)
+    machine_id = models.CharField(max_length=100, blank=True)
+    chart_type = models.CharField(
+        max_length=10, choices=CHART_TYPES, default='imr')
+    subgroup_size = models.PositiveSmallIntegerField(default=1)
+    center_line = models.FloatField()
+    sigma = models.FloatField()
+    ucl = models.FloatField()
+    lcl = models.FloatField()
+    dispersion_center = models.FloatField()
+    dispersion_ucl = models.FloatField()
+    dispersion_lcl = models.FloatField()
+    sample_count = models.PositiveIntegerField()
+    baseline_start = models.DateTimeField(null=True, blank=True)
+    baseline_end = models.DateTimeField(null=True, blank=True)
+    frozen_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "SPC Baseline"
+        verbose_name_plural = "SPC Baselines"
+        unique_together = ('parameter_name', 'machine_id')
+
+    def __str__(self):
+        machine = self.machine_id or 'all machines'
+        return f"{self.parameter_name} ({machine}): {self.lcl:.4f} .. {self.ucl:.4f}"
+
+
+class SPCAccumulator(models.Model):
+    """Persisted running statistics of one (parameter, machine) series.
+    Snapshot of the in-process Welford accumulator; measurements with an
+    id above last_data_id are folded in again when it is reloaded.
+    """
+    parameter_name = models.CharField(max_length=100)
+    machine_id = models.CharField(max_length=100, blank=True)
+    count = models.BigIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    recent = models.JSONField(default=list, blank=True)
+    last_data_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "SPC Accumulator"
+        verbose_name_plural = "SPC Accumulators"
+        unique_together = ('parameter_name', 'machine_id')
+
+    def __str__(self):
+        return f"{self.parameter_name} ({self.machine_id or '-'}): n={self.count}"
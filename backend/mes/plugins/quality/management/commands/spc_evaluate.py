@@ -0,0 +1,30 @@
+"""
+Evaluate the latest points of every baselined SPC series.
+
+Runs the vectorized Nelson rule engine over all parameters with a frozen
+baseline; schedule it from cron for periodic control chart reviews.
+"""
+from django.core.management.base import BaseCommand
+
+from mes.plugins.quality.application.services import SPCService
+
+
+class Command(BaseCommand):
+    help = 'Evaluate Nelson rules for all SPC series with a frozen baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--points', type=int, default=1000,
+            help='Number of latest chart points per series (default 1000).'
+        )
+
+    def handle(self, *args, **options):
+        findings = SPCService.evaluate_baselines(points=options['points'])
+        for finding in findings:
+            machine = finding['machine_id'] or 'all machines'
+            rules = ', '.join(str(v['rule']) for v in finding['violations'])
+            self.stdout.write(
+                f"{finding['parameter_name']} ({machine}): "
+                f"{len(finding['points'])} points out of control, rules {rules or '-'}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(findings)} series out of control.'))
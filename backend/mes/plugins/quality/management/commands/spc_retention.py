@@ -0,0 +1,37 @@
+"""
+Downsample old SPC measurements into minute and hour rollups.
+
+Raw points past SPC_RAW_RETENTION_DAYS are folded into minute rollups and
+minute rollups past SPC_MINUTE_RETENTION_DAYS into hour rollups; schedule
+it from cron (e.g. nightly) to keep the raw table bounded.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.base.exceptions import ValidationException
+from mes.plugins.quality.application.services import SPCService
+
+
+class Command(BaseCommand):
+    help = 'Roll up SPC measurements past their retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days', type=int,
+            help='Keep raw points this many days (default SPC_RAW_RETENTION_DAYS).'
+        )
+        parser.add_argument(
+            '--minute-days', type=int,
+            help='Keep minute rollups this many days (default SPC_MINUTE_RETENTION_DAYS).'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = SPCService.apply_retention(
+                raw_days=options['raw_days'], minute_days=options['minute_days']
+            )
+        except ValidationException as exc:
+            raise CommandError(exc.message)
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['raw_rolled_up']} raw points and "
+            f"{result['minutes_rolled_up']} minute rollups downsampled."
+        ))
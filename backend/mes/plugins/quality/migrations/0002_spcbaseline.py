@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-19 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SPCBaseline",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("parameter_name", models.CharField(max_length=100)),
+                ("machine_id", models.CharField(blank=True, max_length=100)),
+                (
+                    "chart_type",
+                    models.CharField(
+                        choices=[
+                            ("imr", "Individuals / Moving Range"),
+                            ("xbar_r", "X-bar / Range"),
+                            ("xbar_s", "X-bar / Standard Deviation"),
+                            ("ewma", "EWMA"),
+                            ("cusum", "CUSUM"),
+                        ],
+                        default="imr",
+                        max_length=10,
+                    ),
+                ),
+                ("subgroup_size", models.PositiveSmallIntegerField(default=1)),
+                ("center_line", models.FloatField()),
+                ("sigma", models.FloatField()),
+                ("ucl", models.FloatField()),
+                ("lcl", models.FloatField()),
+                ("dispersion_center", models.FloatField()),
+                ("dispersion_ucl", models.FloatField()),
+                ("dispersion_lcl", models.FloatField()),
+                ("sample_count", models.PositiveIntegerField()),
+                ("baseline_start", models.DateTimeField(blank=True, null=True)),
+                ("baseline_end", models.DateTimeField(blank=True, null=True)),
+                ("frozen_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "SPC Baseline",
+                "verbose_name_plural": "SPC Baselines",
+                "unique_together": {("parameter_name", "machine_id")},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2 on 2026-10-19 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0002_spcbaseline"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SPCAccumulator",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("parameter_name", models.CharField(max_length=100)),
+                ("machine_id", models.CharField(blank=True, max_length=100)),
+                ("count", models.BigIntegerField(default=0)),
+                ("mean", models.FloatField(default=0)),
+                ("m2", models.FloatField(default=0)),
+                ("min_value", models.FloatField(blank=True, null=True)),
+                ("max_value", models.FloatField(blank=True, null=True)),
+                ("recent", models.JSONField(blank=True, default=list)),
+                ("last_data_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "SPC Accumulator",
+                "verbose_name_plural": "SPC Accumulators",
+                "unique_together": {("parameter_name", "machine_id")},
+            },
+        ),
+    ]
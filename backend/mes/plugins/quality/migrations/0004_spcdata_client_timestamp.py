@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 13:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0003_spcaccumulator"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="spcdata",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
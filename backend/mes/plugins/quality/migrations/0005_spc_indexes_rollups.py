@@ -0,0 +1,84 @@
+# Generated by Django 4.2 on 2026-10-19 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0004_spcdata_client_timestamp"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SPCRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("parameter_name", models.CharField(max_length=100)),
+                ("machine_id", models.CharField(blank=True, max_length=100)),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("minute", "Minute"), ("hour", "Hour")], max_length=10
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("count", models.PositiveIntegerField()),
+                ("mean", models.FloatField()),
+                ("m2", models.FloatField(default=0)),
+                ("min_value", models.FloatField()),
+                ("max_value", models.FloatField()),
+            ],
+            options={
+                "verbose_name": "SPC Rollup",
+                "verbose_name_plural": "SPC Rollups",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="spcdata",
+            index=models.Index(
+                fields=["parameter_name", "timestamp"],
+                name="quality_spc_paramet_b068b0_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spcdata",
+            index=models.Index(
+                fields=["parameter_name", "machine_id", "timestamp"],
+                name="quality_spc_paramet_5c33c9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spcdata",
+            index=models.Index(
+                fields=["timestamp"], name="quality_spc_timesta_680618_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spcrollup",
+            index=models.Index(
+                fields=["parameter_name", "resolution", "bucket_start"],
+                name="quality_spc_paramet_5de12d_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spcrollup",
+            index=models.Index(
+                fields=["resolution", "bucket_start"],
+                name="quality_spc_resolut_ac8106_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="spcrollup",
+            unique_together={
+                ("parameter_name", "machine_id", "resolution", "bucket_start")
+            },
+        ),
+    ]
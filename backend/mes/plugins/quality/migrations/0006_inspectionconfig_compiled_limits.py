@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+from mes.plugins.quality.application.specs import parse_spec
+
+
+def compile_specs(apps, schema_editor):
+    """Compile the tolerance text of existing variable checks; unparsable ones keep failing."""
+    InspectionConfig = apps.get_model('quality', 'InspectionConfig')
+    for config in InspectionConfig.objects.filter(check_type='variable'):
+        try:
+            spec = parse_spec(config.parameters)
+        except ValueError:
+            continue
+        config.nominal = spec['nominal']
+        config.lower_limit = spec['lower']
+        config.upper_limit = spec['upper']
+        config.unit = spec['unit'][:20]
+        config.save(update_fields=['nominal', 'lower_limit', 'upper_limit', 'unit'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0005_spc_indexes_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inspectionconfig",
+            name="lower_limit",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, max_digits=14, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="inspectionconfig",
+            name="nominal",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, max_digits=14, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="inspectionconfig",
+            name="unit",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name="inspectionconfig",
+            name="upper_limit",
+            field=models.DecimalField(
+                blank=True, decimal_places=6, max_digits=14, null=True
+            ),
+        ),
+        migrations.RunPython(compile_specs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 13:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0006_inspectionconfig_compiled_limits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NCRSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(unique=True)),
+                ("last_value", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="qualitycheck",
+            name="ncr",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="checks",
+                to="quality.ncr",
+            ),
+        ),
+    ]
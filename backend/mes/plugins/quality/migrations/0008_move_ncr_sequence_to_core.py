@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 13:49
+
+from django.db import migrations
+
+
+def copy_counters(apps, schema_editor):
+    """Carry the per-day NCR counters over to core sequences ('NCR-YYYYMMDD')."""
+    NCRSequence = apps.get_model('quality', 'NCRSequence')
+    Sequence = apps.get_model('core', 'Sequence')
+    for counter in NCRSequence.objects.all():
+        Sequence.objects.update_or_create(
+            key=f"NCR-{counter.day.strftime('%Y%m%d')}",
+            defaults={'last_value': counter.last_value}
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+        ("quality", "0007_batch_checks_ncr_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_counters, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name="NCRSequence",
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0008_move_ncr_sequence_to_core"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="qualitycheck",
+            index=models.Index(
+                fields=["config", "timestamp"], name="quality_qua_config__f863db_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="qualitycheck",
+            index=models.Index(
+                fields=["order_number"], name="quality_qua_order_n_cddcc0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="qualitycheck",
+            index=models.Index(
+                fields=["timestamp"], name="quality_qua_timesta_b33e7f_idx"
+            ),
+        ),
+    ]
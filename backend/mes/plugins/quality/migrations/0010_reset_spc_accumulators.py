@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-19 15:10
+
+from django.db import migrations
+
+
+def drop_accumulator_snapshots(apps, schema_editor):
+    """
+    Snapshots were built with the one-pass variance and the blank machine
+    series only for machine_id ''; they are rebuilt from the data on load.
+    """
+    apps.get_model('quality', 'SPCAccumulator').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quality", "0009_qualitycheck_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_accumulator_snapshots, migrations.RunPython.noop),
+    ]
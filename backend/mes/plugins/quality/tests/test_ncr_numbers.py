@@ -0,0 +1,45 @@
+import threading
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from mes.plugins.quality.application.services import NCRService
+
+WRITERS = 50
+BATCHES_PER_WRITER = 10
+BATCH_SIZE = 3
+
+
+class NCRNumberConcurrencyTests(TransactionTestCase):
+    """NCR numbers stay unique and gap-free under parallel writers."""
+
+    def test_parallel_allocation(self):
+        numbers = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(WRITERS)
+
+        def write():
+            try:
+                barrier.wait()
+                for _ in range(BATCHES_PER_WRITER):
+                    with transaction.atomic():
+                        allocated = NCRService.allocate_numbers(BATCH_SIZE)
+                    with lock:
+                        numbers.extend(allocated)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        prefix = f"NCR-{timezone.localdate().strftime('%Y%m%d')}"
+        total = WRITERS * BATCHES_PER_WRITER * BATCH_SIZE
+        self.assertEqual(sorted(numbers), [f'{prefix}-{value:04d}' for value in range(1, total + 1)])
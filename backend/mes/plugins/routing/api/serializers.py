@@ -56,6 +56,26 @@ class TechnologySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class TechnologyListSerializer(serializers.ModelSerializer):
+    """Technology summary for lists; counts and times come from queryset annotations"""
+    product_number = serializers.CharField(source='product.number', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    component_count = serializers.IntegerField(read_only=True)
+    total_tj = serializers.IntegerField(read_only=True)
+    total_tpz = serializers.IntegerField(read_only=True)
+    total_time_next_operation = serializers.IntegerField(read_only=True)
+    total_time = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Technology
+        fields = '__all__'
+
+
+class TechnologyExpandedListSerializer(TechnologyListSerializer):
+    """Technology summary with nested components (?expand=components)"""
+    operation_components = TechnologyOperationComponentSerializer(many=True, read_only=True)
+
+
 class TechnologyDetailSerializer(serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     operation_components = TechnologyOperationComponentSerializer(many=True, read_only=True)
@@ -63,3 +83,38 @@ class TechnologyDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Technology
         fields = '__all__'
+
+
+class BOMDemandSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=14, decimal_places=5, min_value=0)
+
+
+class BOMExplodeSerializer(serializers.Serializer):
+    """Demands to explode through all BOM levels"""
+    demands = BOMDemandSerializer(many=True, allow_empty=False)
+
+
+class WhereUsedQuerySerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+
+
+class TechnologyCloneSerializer(serializers.Serializer):
+    number = serializers.CharField(max_length=255)
+    name = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+
+
+class ComponentEditSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    node_number = serializers.CharField(max_length=255, required=False)
+    priority = serializers.IntegerField(required=False)
+    parent = serializers.IntegerField(required=False, allow_null=True)
+    tj = serializers.IntegerField(required=False, allow_null=True)
+    tpz = serializers.IntegerField(required=False, allow_null=True)
+    time_next_operation = serializers.IntegerField(required=False, allow_null=True)
+
+
+class ComponentBulkEditSerializer(serializers.Serializer):
+    """Component changes applied together in one transaction"""
+    components = ComponentEditSerializer(many=True, allow_empty=False)
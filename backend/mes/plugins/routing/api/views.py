@@ -1,18 +1,24 @@
 from django.core.exceptions import ValidationError
-from django.db.models import Count, Q
+from django.db.models import Count, Q, F, Sum, Prefetch
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from ..application.services import TechnologyWorkflowService
+from core.base.exceptions import BusinessRuleException, ValidationException
+from ..application.services import (
+    TechnologyWorkflowService, TechnologyService, TechnologyOperationComponentService, BOMService
+)
 from ..domain.models import (
     Technology, Operation, TechnologyOperationComponent,
     OperationProductInComponent, OperationProductOutComponent
 )
 from .serializers import (
-    TechnologySerializer, TechnologyDetailSerializer, OperationSerializer,
+    TechnologySerializer, TechnologyDetailSerializer, TechnologyListSerializer,
+    TechnologyExpandedListSerializer, OperationSerializer,
     TechnologyOperationComponentSerializer, OperationProductInComponentSerializer,
-    OperationProductOutComponentSerializer
+    OperationProductOutComponentSerializer, BOMExplodeSerializer, WhereUsedQuerySerializer,
+    TechnologyCloneSerializer, ComponentBulkEditSerializer
 )
 
 
@@ -24,9 +30,54 @@ class TechnologyViewSet(viewsets.ModelViewSet):
     search_fields = ['number', 'name']
     ordering_fields = ['number', 'name', 'created_at']
     
+    def _expand_components(self):
+        return 'components' in self.request.query_params.get('expand', '').split(',')
+
+    @staticmethod
+    def components_prefetch():
+        """Components with operation and I/O products: one query per level."""
+        return Prefetch(
+            'operation_components',
+            queryset=TechnologyOperationComponent.objects.select_related('operation').prefetch_related(
+                Prefetch('input_products', queryset=OperationProductInComponent.objects.select_related('product')),
+                Prefetch('output_products', queryset=OperationProductOutComponent.objects.select_related('product')),
+            )
+        )
+
+    @staticmethod
+    def annotate_summary(queryset):
+        """Component count and total effective times (component override or operation default)."""
+        def effective(field):
+            return Coalesce(
+                Sum(Coalesce(f'operation_components__{field}', f'operation_components__operation__{field}')),
+                0
+            )
+        return queryset.annotate(
+            component_count=Count('operation_components'),
+            total_tj=effective('tj'),
+            total_tpz=effective('tpz'),
+            total_time_next_operation=effective('time_next_operation'),
+        ).annotate(
+            total_time=F('total_tj') + F('total_tpz') + F('total_time_next_operation')
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('product')
+        if self.action == 'list':
+            queryset = self.annotate_summary(queryset)
+            if self._expand_components():
+                queryset = queryset.prefetch_related(self.components_prefetch())
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related(self.components_prefetch())
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return TechnologyDetailSerializer
+        if self.action == 'list':
+            if self._expand_components():
+                return TechnologyExpandedListSerializer
+            return TechnologyListSerializer
         return TechnologySerializer
     
     @action(detail=True, methods=['post'])
@@ -107,10 +158,65 @@ class TechnologyViewSet(viewsets.ModelViewSet):
         """Return hierarchical operation tree with timing summary."""
         technology = self.get_object()
         # Delegate to service layer for business logic
-        from ..application.services import TechnologyService
         tree_data = TechnologyService.build_operation_tree(technology)
         return Response(tree_data)
 
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Deep-copy this technology with its operation tree as a new draft.
+        Body: {"number": "TECH-002", "name": "...", "description": "..."}
+        """
+        serializer = TechnologyCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            copy = TechnologyService.clone(self.get_object(), **serializer.validated_data)
+        except ValidationException as exc:
+            return Response({'error': exc.message, 'code': exc.code}, status=status.HTTP_400_BAD_REQUEST)
+        copy = Technology.objects.select_related('product').prefetch_related(
+            self.components_prefetch()
+        ).get(pk=copy.pk)
+        return Response(TechnologyDetailSerializer(copy).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='components/bulk-edit')
+    def bulk_edit_components(self, request, pk=None):
+        """Reorder, re-parent or override times of many components at once.
+        Body: {"components": [{"id": 1, "node_number": "1.2", "priority": 1, "parent": 3, "tj": 60}, ...]}
+        """
+        serializer = ComponentBulkEditSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        technology = self.get_object()
+        try:
+            updated = TechnologyOperationComponentService.bulk_edit(
+                technology.id, serializer.validated_data['components']
+            )
+        except ValidationException as exc:
+            return Response({'error': exc.message, 'code': exc.code}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['post'], url_path='bom/explode')
+    def bom_explode(self, request):
+        """Explode product demands through all levels of the master technologies.
+        Body: {"demands": [{"product": <product_id>, "quantity": 10}, ...]}
+        """
+        serializer = BOMExplodeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = BOMService.explode(
+                (demand['product'], demand['quantity']) for demand in serializer.validated_data['demands']
+            )
+        except BusinessRuleException as exc:
+            return Response({'error': exc.message, 'code': exc.code}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['get'], url_path='bom/where-used')
+    def where_used(self, request):
+        """Products using a product directly or through intermediates.
+        Query: ?product=<product_id>
+        """
+        serializer = WhereUsedQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(BOMService.where_used(serializer.validated_data['product']))
+
 
 class OperationViewSet(viewsets.ModelViewSet):
     queryset = Operation.objects.all()
@@ -0,0 +1,97 @@
+"""
+Multi-level bill of materials.
+
+The product graph links every product made by a master technology to
+the products its technology consumes per unit (intermediates produced
+inside the same technology are already resolved by the technology's
+own explosion). Products without a master technology are materials.
+
+    edges: {product_id: {component_product_id: quantity per unit}}
+
+Explosion follows the edges through all levels. Per-unit totals of every
+product are memoized, so shared sub-assemblies are expanded once, and a
+batch of demands is exploded with one matrix product.
+"""
+import numpy as np
+
+
+class BOMCycleError(ValueError):
+    """The product graph loops back onto itself; `path` lists the products of the loop."""
+
+    def __init__(self, path):
+        self.path = path
+        super().__init__(' -> '.join(str(product_id) for product_id in path))
+
+
+def reverse_edges(edges) -> dict:
+    """Where-used adjacency {component_product_id: {parent_product_id: quantity}}."""
+    parents = {}
+    for parent_id, components in edges.items():
+        for component_id, quantity in components.items():
+            parents.setdefault(component_id, {})[parent_id] = quantity
+    return parents
+
+
+def unit_totals(product_id, edges, memo) -> dict:
+    """
+    Gross quantity of every product below `product_id` per unit of it,
+    intermediates included: {product_id: float}. Results are memoized in
+    `memo`; raises BOMCycleError when the product is part of a cycle.
+    """
+    if product_id in memo:
+        return memo[product_id]
+
+    # Post-order walk so each product is summed after all its components
+    order = []
+    done = set()
+    path = [product_id]
+    on_path = {product_id}
+    iterators = [iter(edges.get(product_id, ()))]
+    while iterators:
+        child = next(iterators[-1], None)
+        if child is None:
+            node = path.pop()
+            on_path.discard(node)
+            iterators.pop()
+            order.append(node)
+            done.add(node)
+            continue
+        if child in on_path:
+            raise BOMCycleError(path[path.index(child):] + [child])
+        if child in memo or child in done or child not in edges:
+            continue
+        path.append(child)
+        on_path.add(child)
+        iterators.append(iter(edges[child]))
+
+    for node in order:
+        if node in memo:
+            continue
+        totals = {}
+        for child, quantity in edges.get(node, {}).items():
+            quantity = float(quantity)
+            totals[child] = totals.get(child, 0.0) + quantity
+            for grandchild, nested in memo.get(child, {}).items():
+                totals[grandchild] = totals.get(grandchild, 0.0) + quantity * nested
+        memo[node] = totals
+    return memo[product_id]
+
+
+def explosion_matrix(product_ids, edges, memo):
+    """
+    Per-unit explosion of several products as a dense matrix.
+
+    Returns (columns, matrix) where matrix[i, j] is the gross quantity of
+    product columns[j] needed per unit of product_ids[i]. A product
+    without components explodes to itself.
+    """
+    rows = []
+    for product_id in product_ids:
+        rows.append(unit_totals(product_id, edges, memo) if product_id in edges else {product_id: 1.0})
+    columns = sorted({column for row in rows for column in row})
+    position = {column: j for j, column in enumerate(columns)}
+    matrix = np.zeros((len(rows), len(columns)))
+    for i, row in enumerate(rows):
+        for column, quantity in row.items():
+            matrix[i, position[column]] = quantity
+    return columns, matrix
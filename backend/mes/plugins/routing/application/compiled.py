@@ -0,0 +1,115 @@
+"""
+Compiled technologies.
+
+A technology's operation tree flattened into a list of nodes in
+topological order (every parent before its children, siblings by node
+number), with effective times resolved against the operation defaults
+and the I/O of all nodes aggregated per product. Compiled once per
+structural version and shared by the tree endpoint, scheduling and the
+BOM explosion.
+
+    {'technology_id', 'version',
+     'nodes': [{'id', 'parent', 'depth', 'children', 'node_number', 'priority',
+                'operation_id', 'operation_number', 'operation_name', 'workstation_ids',
+                'tj', 'tpz', 'time_next_operation', 'inputs', 'outputs'}],
+     'inputs': {product_id: Decimal}, 'outputs': {product_id: Decimal},
+     'summary': {'total_tj', 'total_tpz', 'total_time_next_operation', 'total_time', 'nodes'}}
+
+`parent` and `children` are indices into `nodes`; inputs/outputs of a
+node are lists of (product_id, Decimal quantity).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+
+def _effective(override, default):
+    return (override if override is not None else default) or 0
+
+
+def compile_technology(technology_id, version, components, inputs, outputs, workstations) -> dict:
+    """
+    Compile one technology.
+
+    components: dicts with id, parent_id, node_number, priority, tj, tpz,
+    time_next_operation, operation_id and the operation's number, name, tj,
+    tpz and time_next_operation (as operation__<field>).
+    inputs/outputs: {component_id: [(product_id, quantity)]}
+    workstations: {operation_id: [workstation_id]}
+    """
+    by_id = {component['id']: component for component in components}
+    children = defaultdict(list)
+    roots = []
+    for component in components:
+        if component['parent_id'] in by_id:
+            children[component['parent_id']].append(component)
+        else:
+            roots.append(component)
+
+    def sort_key(component):
+        return (component['node_number'], component['id'])
+
+    nodes = []
+    index_of = {}
+    # Components caught in a parent cycle are not reachable from a root;
+    # they follow as roots of their own so no component is dropped
+    pending = sorted(components, key=sort_key, reverse=True) + sorted(roots, key=sort_key, reverse=True)
+    stack = []
+    while stack or pending:
+        if not stack:
+            stack.append((pending.pop(), None, 0))
+        component, parent, depth = stack.pop()
+        if component['id'] in index_of:
+            continue
+        index = len(nodes)
+        index_of[component['id']] = index
+        if parent is not None:
+            nodes[parent]['children'].append(index)
+        nodes.append({
+            'id': component['id'],
+            'parent': parent,
+            'depth': depth,
+            'children': [],
+            'node_number': component['node_number'],
+            'priority': component['priority'],
+            'operation_id': component['operation_id'],
+            'operation_number': component['operation__number'],
+            'operation_name': component['operation__name'],
+            'workstation_ids': list(workstations.get(component['operation_id'], ())),
+            'tj': _effective(component['tj'], component['operation__tj']),
+            'tpz': _effective(component['tpz'], component['operation__tpz']),
+            'time_next_operation': _effective(
+                component['time_next_operation'], component['operation__time_next_operation']
+            ),
+            'inputs': list(inputs.get(component['id'], ())),
+            'outputs': list(outputs.get(component['id'], ())),
+        })
+        stack.extend(
+            (child, index, depth + 1)
+            for child in sorted(children[component['id']], key=sort_key, reverse=True)
+        )
+
+    total_inputs = defaultdict(Decimal)
+    total_outputs = defaultdict(Decimal)
+    for node in nodes:
+        for product_id, quantity in node['inputs']:
+            total_inputs[product_id] += quantity
+        for product_id, quantity in node['outputs']:
+            total_outputs[product_id] += quantity
+
+    total_tj = sum(node['tj'] for node in nodes)
+    total_tpz = sum(node['tpz'] for node in nodes)
+    total_next = sum(node['time_next_operation'] for node in nodes)
+    return {
+        'technology_id': technology_id,
+        'version': version,
+        'nodes': nodes,
+        'inputs': dict(total_inputs),
+        'outputs': dict(total_outputs),
+        'summary': {
+            'total_tj': total_tj,
+            'total_tpz': total_tpz,
+            'total_time_next_operation': total_next,
+            'total_time': total_tj + total_tpz + total_next,
+            'nodes': len(nodes),
+        },
+    }
@@ -4,22 +4,41 @@ Routing/Technology Management Services.
 Business logic for managing manufacturing technologies (routings),
 operations, and their relationships.
 """
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import Count, Q, F
+from django.utils import timezone
 
 from core.base.services import BaseService, StatefulService
-from core.base.exceptions import ValidationException, StateTransitionException
+from core.base.exceptions import ValidationException, StateTransitionException, BusinessRuleException
+from core.utils.cache import LRUCache
+from mes.plugins.basic.domain.models import Product, Workstation
 from ..domain.models import (
     Technology, Operation, TechnologyOperationComponent,
     OperationProductInComponent, OperationProductOutComponent
 )
+from . import bom, compiled
+
+# Compiled technologies per (technology_id, structure_version)
+_compiled = LRUCache(maxsize=settings.ROUTING_COMPILED_CACHE_SIZE)
+# Product graph of the master technologies; see BOMService
+_bom_index = LRUCache(maxsize=1)
+_bom_lock = threading.Lock()
 
 
 class TechnologyService(StatefulService):
     """Service for managing technologies (routings)."""
     model = Technology
     state_field = 'state'
+    COMPILED_CACHE_KEY = 'routing:compiled:{id}:{version}'
     valid_transitions = {
         'draft': ['accepted', 'declined'],
         'accepted': ['checked', 'declined', 'outdated'],
@@ -106,77 +125,247 @@ class TechnologyService(StatefulService):
         technology.save(update_fields=['master', 'updated_at'])
         return technology
 
+    @classmethod
+    @transaction.atomic
+    def clone(cls, technology: Technology, number: str, name: str = None, description: str = None) -> Technology:
+        """
+        Deep-copy a technology with its operation tree and I/O products.
+
+        The copy starts as a non-master draft. Components are inserted with
+        one bulk_create per tree level, remapping parent ids from the level
+        above; input and output products follow in one bulk_create each.
+        """
+        if cls.get_queryset().filter(number=number).exists():
+            raise ValidationException(f"Technology '{number}' already exists", field='number')
+
+        copy = cls.model.objects.create(
+            number=number,
+            name=name or technology.name,
+            description=technology.description if description is None else description,
+            product_id=technology.product_id,
+            state='draft',
+            master=False,
+            active=technology.active,
+        )
+
+        component_fields = ['operation_id', 'node_number', 'priority', 'tj', 'tpz', 'time_next_operation']
+        components = list(TechnologyOperationComponent.objects.filter(
+            technology=technology
+        ).order_by('node_number', 'id').values('id', 'parent_id', *component_fields))
+        children = defaultdict(list)
+        known = {component['id'] for component in components}
+        level = []
+        for component in components:
+            if component['parent_id'] in known:
+                children[component['parent_id']].append(component)
+            else:
+                level.append(component)
+
+        new_ids = {}
+        pending_parents = []
+        while level or len(new_ids) < len(components):
+            if not level:
+                # Parent cycle: copy the remaining components, link them afterwards
+                level = [component for component in components if component['id'] not in new_ids]
+                pending_parents = level
+            created = TechnologyOperationComponent.objects.bulk_create([
+                TechnologyOperationComponent(
+                    technology=copy,
+                    parent_id=None if level is pending_parents else new_ids.get(component['parent_id']),
+                    **{field: component[field] for field in component_fields}
+                )
+                for component in level
+            ])
+            for component, instance in zip(level, created):
+                new_ids[component['id']] = instance.id
+            level = [
+                child for component in level for child in children[component['id']]
+                if child['id'] not in new_ids
+            ]
+
+        if pending_parents:
+            TechnologyOperationComponent.objects.bulk_update([
+                TechnologyOperationComponent(id=new_ids[component['id']], parent_id=new_ids[component['parent_id']])
+                for component in pending_parents
+            ], ['parent'])
+
+        for model in (OperationProductInComponent, OperationProductOutComponent):
+            model.objects.bulk_create([
+                model(
+                    operation_component_id=new_ids[component_id],
+                    product_id=product_id,
+                    quantity=quantity
+                )
+                for component_id, product_id, quantity in model.objects.filter(
+                    operation_component__technology=technology
+                ).order_by('id').values_list('operation_component_id', 'product_id', 'quantity')
+            ])
+
+        # Bulk writes bypass the signals
+        cls.bump_structure_version(cls.get_queryset().filter(id=copy.id))
+        copy.refresh_from_db(fields=['structure_version'])
+        return copy
+
+    @classmethod
+    def bump_structure_version(cls, queryset) -> int:
+        """
+        Invalidate the compiled form of the technologies in the queryset.
+
+        Called by the signals on component, I/O and operation changes;
+        call it after bulk writes, which bypass signals.
+        """
+        return queryset.update(structure_version=F('structure_version') + 1)
+
+    @classmethod
+    def _compile_many(cls, versions: dict) -> dict:
+        """Compile technologies {technology_id: version} with one query per model."""
+        components = defaultdict(list)
+        operation_ids = set()
+        component_ids = []
+        for component in TechnologyOperationComponent.objects.filter(
+            technology_id__in=versions
+        ).values(
+            'id', 'technology_id', 'parent_id', 'node_number', 'priority',
+            'tj', 'tpz', 'time_next_operation', 'operation_id',
+            'operation__number', 'operation__name', 'operation__tj',
+            'operation__tpz', 'operation__time_next_operation'
+        ):
+            components[component['technology_id']].append(component)
+            operation_ids.add(component['operation_id'])
+            component_ids.append(component['id'])
+
+        inputs = defaultdict(list)
+        for component_id, product_id, quantity in OperationProductInComponent.objects.filter(
+            operation_component_id__in=component_ids
+        ).order_by('id').values_list('operation_component_id', 'product_id', 'quantity'):
+            inputs[component_id].append((product_id, quantity))
+
+        outputs = defaultdict(list)
+        for component_id, product_id, quantity in OperationProductOutComponent.objects.filter(
+            operation_component_id__in=component_ids
+        ).order_by('id').values_list('operation_component_id', 'product_id', 'quantity'):
+            outputs[component_id].append((product_id, quantity))
+
+        workstations = defaultdict(list)
+        for operation_id, workstation_id in Operation.workstations.through.objects.filter(
+            operation_id__in=operation_ids
+        ).order_by('workstation__number').values_list('operation_id', 'workstation_id'):
+            workstations[operation_id].append(workstation_id)
+
+        return {
+            technology_id: compiled.compile_technology(
+                technology_id, version, components[technology_id], inputs, outputs, workstations
+            )
+            for technology_id, version in versions.items()
+        }
+
+    @classmethod
+    def get_compiled_many(cls, versions: dict) -> dict:
+        """
+        Compiled technologies for {technology_id: structure_version}.
+
+        Served from the process-local LRU, then Django's cache (shared
+        between processes); the rest is compiled in one batch. Entries
+        are keyed by version, so changed technologies are simply missed.
+        """
+        found = {
+            technology_id: entry
+            for (technology_id, _), entry in _compiled.get_many(versions.items()).items()
+        }
+        missing = {
+            technology_id: version for technology_id, version in versions.items()
+            if technology_id not in found
+        }
+        if not missing:
+            return found
+
+        keys = {
+            technology_id: cls.COMPILED_CACHE_KEY.format(id=technology_id, version=version)
+            for technology_id, version in missing.items()
+        }
+        shared = cache.get_many(keys.values())
+        fresh = {technology_id: shared[key] for technology_id, key in keys.items() if key in shared}
+        to_compile = {
+            technology_id: version for technology_id, version in missing.items()
+            if technology_id not in fresh
+        }
+        if to_compile:
+            built = cls._compile_many(to_compile)
+            cache.set_many(
+                {keys[technology_id]: entry for technology_id, entry in built.items()},
+                settings.ROUTING_COMPILED_CACHE_TIMEOUT
+            )
+            fresh.update(built)
+        _compiled.set_many({
+            (technology_id, missing[technology_id]): entry for technology_id, entry in fresh.items()
+        })
+        found.update(fresh)
+        return found
+
+    @classmethod
+    def get_compiled(cls, technology: Technology) -> dict:
+        """Compiled form of one technology (see compiled.py)."""
+        return cls.get_compiled_many({technology.id: technology.structure_version})[technology.id]
+
     @classmethod
     def build_operation_tree(cls, technology: Technology) -> dict:
         """
         Build hierarchical operation tree for a technology.
 
-        Returns structured tree with operations, inputs/outputs, and timing summary.
+        Returns structured tree with operations, inputs/outputs, and timing summary,
+        rendered from the compiled technology plus the current product and
+        workstation labels.
         """
-        components = technology.operation_components.select_related(
-            'operation', 'parent'
-        ).prefetch_related(
-            'input_products__product',
-            'output_products__product',
-            'operation__workstations'
-        ).order_by('node_number')
-
-        def effective_val(component, field):
-            """Get effective value with fallback to operation default."""
-            override = getattr(component, field)
-            if override is not None:
-                return override
-            return getattr(component.operation, field)
-
-        tree_nodes = []
-        total_tj = 0
-        total_tpz = 0
-        total_next = 0
-
-        for comp in components:
-            tj = effective_val(comp, 'tj') or 0
-            tpz = effective_val(comp, 'tpz') or 0
-            tnext = effective_val(comp, 'time_next_operation') or 0
-
-            total_tj += tj
-            total_tpz += tpz
-            total_next += tnext
-
-            tree_nodes.append({
-                'node_number': comp.node_number,
-                'parent_node_number': comp.parent.node_number if comp.parent else None,
-                'priority': comp.priority,
+        compiled_technology = cls.get_compiled(technology)
+        nodes = compiled_technology['nodes']
+        product_ids = {
+            product_id
+            for node in nodes
+            for product_id, _ in node['inputs'] + node['outputs']
+        }
+        products = {
+            row['id']: row
+            for row in Product.objects.filter(id__in=product_ids).values('id', 'number', 'name')
+        }
+        workstation_numbers = dict(Workstation.objects.filter(
+            id__in={workstation_id for node in nodes for workstation_id in node['workstation_ids']}
+        ).values_list('id', 'number'))
+
+        def product_rows(rows):
+            return [
+                {
+                    'id': product_id,
+                    'number': products[product_id]['number'],
+                    'name': products[product_id]['name'],
+                    'quantity': str(quantity)
+                }
+                for product_id, quantity in rows
+                if product_id in products
+            ]
+
+        tree_nodes = [
+            {
+                'node_number': node['node_number'],
+                'parent_node_number': nodes[node['parent']]['node_number'] if node['parent'] is not None else None,
+                'priority': node['priority'],
                 'operation': {
-                    'id': comp.operation.id,
-                    'number': comp.operation.number,
-                    'name': comp.operation.name,
+                    'id': node['operation_id'],
+                    'number': node['operation_number'],
+                    'name': node['operation_name'],
                     'workstations': [
-                        {'id': w.id, 'number': w.number}
-                        for w in comp.operation.workstations.all()
+                        {'id': workstation_id, 'number': workstation_numbers[workstation_id]}
+                        for workstation_id in node['workstation_ids']
+                        if workstation_id in workstation_numbers
                     ],
-                    'tj': tj,
-                    'tpz': tpz,
-                    'time_next_operation': tnext,
+                    'tj': node['tj'],
+                    'tpz': node['tpz'],
+                    'time_next_operation': node['time_next_operation'],
                 },
-                'input_products': [
-                    {
-                        'id': ip.product.id,
-                        'number': ip.product.number,
-                        'name': ip.product.name,
-                        'quantity': str(ip.quantity)
-                    }
-                    for ip in comp.input_products.all()
-                ],
-                'output_products': [
-                    {
-                        'id': op.product.id,
-                        'number': op.product.number,
-                        'name': op.product.name,
-                        'quantity': str(op.quantity)
-                    }
-                    for op in comp.output_products.all()
-                ]
-            })
+                'input_products': product_rows(node['inputs']),
+                'output_products': product_rows(node['outputs']),
+            }
+            for node in nodes
+        ]
 
         return {
             'technology': {
@@ -186,16 +375,81 @@ class TechnologyService(StatefulService):
                 'product': technology.product.number if technology.product_id else None,
                 'state': technology.state,
             },
-            'summary': {
-                'total_tj': total_tj,
-                'total_tpz': total_tpz,
-                'total_time_next_operation': total_next,
-                'total_time': total_tj + total_tpz + total_next,
-                'nodes': len(tree_nodes)
-            },
+            'summary': compiled_technology['summary'],
             'tree': tree_nodes
         }
 
+    @classmethod
+    def get_unit_requirements(cls, technology_ids) -> dict:
+        """
+        Explode the BOM of several technologies per unit of their product.
+
+        Walks each operation tree from the roots: inputs produced by a
+        child operation are satisfied by running that child (scaled by its
+        output quantity), all other inputs are material requirements.
+
+        Returns {technology_id: {product_id: Decimal quantity per unit}},
+        reading the compiled technologies (one query when they are cached).
+        """
+        technology_ids = set(technology_ids)
+        if not technology_ids:
+            return {}
+
+        rows = list(Technology.objects.filter(id__in=technology_ids).values_list(
+            'id', 'product_id', 'structure_version'
+        ))
+        product_by_technology = {technology_id: product_id for technology_id, product_id, _ in rows}
+        compiled_technologies = cls.get_compiled_many(
+            {technology_id: version for technology_id, _, version in rows}
+        )
+
+        def explode(nodes, index, runs, requirements):
+            node = nodes[index]
+
+            produced_by = {}
+            for child in node['children']:
+                for product_id, quantity in nodes[child]['outputs']:
+                    produced_by.setdefault(product_id, (child, quantity))
+
+            needed = defaultdict(Decimal)
+            for product_id, quantity in node['inputs']:
+                needed[product_id] += quantity * runs
+
+            # A child making several consumed products runs often enough for
+            # the most demanding one; its other outputs are surplus
+            child_runs = {}
+            for product_id, quantity in needed.items():
+                if product_id in produced_by:
+                    child, out_quantity = produced_by[product_id]
+                    child_runs[child] = max(
+                        child_runs.get(child, Decimal('0')),
+                        quantity / out_quantity if out_quantity else quantity
+                    )
+                else:
+                    requirements[product_id] += quantity
+
+            # Children whose output is not consumed still run once per parent run
+            for child in node['children']:
+                explode(nodes, child, child_runs.get(child, runs), requirements)
+
+        result = {}
+        for technology_id in technology_ids:
+            product_id = product_by_technology.get(technology_id)
+            requirements = defaultdict(Decimal)
+            compiled_technology = compiled_technologies.get(technology_id)
+            nodes = compiled_technology['nodes'] if compiled_technology else []
+            for index, node in enumerate(nodes):
+                if node['parent'] is not None:
+                    continue
+                out_quantity = next(
+                    (q for p, q in node['outputs'] if p == product_id and q), None
+                )
+                runs = Decimal('1') / out_quantity if out_quantity else Decimal('1')
+                explode(nodes, index, runs, requirements)
+            result[technology_id] = dict(requirements)
+
+        return result
+
     @classmethod
     def stats(cls):
         """
@@ -215,6 +469,193 @@ class TechnologyService(StatefulService):
         )
 
 
+class BOMService(BaseService):
+    """
+    Multi-level BOM explosion and where-used across master technologies.
+
+    The product graph (see bom.py) is held as an adjacency index in the
+    process and in Django's cache. Each read checks the master
+    technologies and their structure versions in one query and only
+    re-explodes the technologies that changed since the index was built.
+    """
+    model = Technology
+    CACHE_KEY = 'routing:bom:index'
+
+    @classmethod
+    def _masters(cls) -> dict:
+        """{product_id: (technology_id, structure_version)} of the active master technologies."""
+        masters = {}
+        for product_id, technology_id, version in cls.get_queryset().filter(
+            master=True, active=True
+        ).order_by('-id').values_list('product_id', 'id', 'structure_version'):
+            masters[product_id] = (technology_id, version)
+        return masters
+
+    @classmethod
+    def get_index(cls) -> dict:
+        """
+        Adjacency index {'sources', 'edges', 'parents', 'memo'}, brought up
+        to date incrementally.
+        """
+        masters = cls._masters()
+        index = _bom_index.get(cls.CACHE_KEY)
+        if index is not None and index['sources'] == masters:
+            return index
+
+        with _bom_lock:
+            index = _bom_index.get(cls.CACHE_KEY) or cache.get(cls.CACHE_KEY) or {'sources': {}, 'edges': {}}
+            if index['sources'] != masters:
+                changed = {
+                    product_id: source for product_id, source in masters.items()
+                    if index['sources'].get(product_id) != source
+                }
+                requirements = TechnologyService.get_unit_requirements(
+                    technology_id for technology_id, _ in changed.values()
+                )
+                edges = {
+                    product_id: components for product_id, components in index['edges'].items()
+                    if product_id in masters and product_id not in changed
+                }
+                for product_id, (technology_id, _) in changed.items():
+                    edges[product_id] = requirements.get(technology_id, {})
+                index = {'sources': masters, 'edges': edges}
+                cache.set(cls.CACHE_KEY, index, settings.ROUTING_COMPILED_CACHE_TIMEOUT)
+            index = {
+                **index,
+                'parents': bom.reverse_edges(index['edges']),
+                # Per-unit totals, filled lazily by explosions
+                'memo': {},
+            }
+            _bom_index.set(cls.CACHE_KEY, index)
+        return index
+
+    @classmethod
+    def _explosion_matrix(cls, index, product_ids):
+        try:
+            return bom.explosion_matrix(product_ids, index['edges'], index['memo'])
+        except bom.BOMCycleError as exc:
+            numbers = dict(Product.objects.filter(id__in=exc.path).values_list('id', 'number'))
+            raise BusinessRuleException(
+                'BOM_CYCLE',
+                'Bill of materials contains a cycle: ' + ' -> '.join(
+                    numbers.get(product_id, str(product_id)) for product_id in exc.path
+                )
+            )
+
+    @classmethod
+    def explode_many(cls, demands) -> dict:
+        """
+        Explode many (product_id, quantity) demands at once.
+
+        Each distinct product is exploded per unit once (memoized across
+        calls); the demands are then scaled in one vectorized step.
+        Returns {'products': [product_id], 'materials': [bool],
+        'quantities': ndarray (demands x products)}, where materials marks
+        the columns without a master technology (purchased items) and the
+        other columns are intermediates.
+        """
+        demands = list(demands)
+        index = cls.get_index()
+        product_ids = sorted({product_id for product_id, _ in demands})
+        columns, per_unit = cls._explosion_matrix(index, product_ids)
+        row = {product_id: i for i, product_id in enumerate(product_ids)}
+        rows = np.array([row[product_id] for product_id, _ in demands], dtype=int)
+        quantities = np.array([float(quantity) for _, quantity in demands])
+        exploded = per_unit[rows] * quantities[:, None] if demands else per_unit[:0]
+        return {
+            'products': columns,
+            'materials': [column not in index['edges'] for column in columns],
+            'quantities': exploded,
+        }
+
+    @classmethod
+    def explode(cls, demands) -> dict:
+        """
+        Material and intermediate requirements of (product_id, quantity) demands.
+
+        Returns {'materials': [...], 'intermediates': [...], 'demands': [...]}
+        with rows {'product_id', 'number', 'name', 'quantity'}; each demand
+        lists its own non-zero materials {product_id: quantity}.
+        """
+        demands = list(demands)
+        result = cls.explode_many(demands)
+        columns = result['products']
+        quantities = result['quantities']
+        totals = quantities.sum(axis=0) if len(demands) else np.zeros(len(columns))
+        labels = {
+            row['id']: row for row in Product.objects.filter(id__in=columns).values('id', 'number', 'name')
+        }
+
+        def rows(mask):
+            return [
+                {
+                    'product_id': product_id,
+                    'number': labels.get(product_id, {}).get('number'),
+                    'name': labels.get(product_id, {}).get('name'),
+                    'quantity': round(float(totals[j]), 5),
+                }
+                for j, product_id in enumerate(columns)
+                if mask[j]
+            ]
+
+        material_columns = [j for j, is_material in enumerate(result['materials']) if is_material]
+        return {
+            'materials': rows(result['materials']),
+            'intermediates': rows([not is_material for is_material in result['materials']]),
+            'demands': [
+                {
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'materials': {
+                        columns[j]: round(float(quantities[i, j]), 5)
+                        for j in material_columns if quantities[i, j]
+                    },
+                }
+                for i, (product_id, quantity) in enumerate(demands)
+            ],
+        }
+
+    @classmethod
+    def where_used(cls, product_id: int) -> list:
+        """
+        Every product that uses `product_id`, directly or through
+        intermediates: [{'product_id', 'number', 'name', 'level',
+        'quantity'}], quantity being the gross amount of `product_id` per
+        unit of that product and level the shortest distance (1 = direct).
+        """
+        index = cls.get_index()
+        levels = {}
+        frontier = [product_id]
+        level = 0
+        while frontier:
+            level += 1
+            next_frontier = []
+            for child in frontier:
+                for parent in index['parents'].get(child, ()):
+                    if parent not in levels and parent != product_id:
+                        levels[parent] = level
+                        next_frontier.append(parent)
+            frontier = next_frontier
+
+        labels = {
+            row['id']: row for row in Product.objects.filter(id__in=levels).values('id', 'number', 'name')
+        }
+        used = []
+        for parent, level in sorted(levels.items(), key=lambda item: (item[1], item[0])):
+            try:
+                quantity = bom.unit_totals(parent, index['edges'], index['memo']).get(product_id, 0.0)
+            except bom.BOMCycleError:
+                quantity = None
+            used.append({
+                'product_id': parent,
+                'number': labels.get(parent, {}).get('number'),
+                'name': labels.get(parent, {}).get('name'),
+                'level': level,
+                'quantity': round(quantity, 5) if quantity is not None else None,
+            })
+        return used
+
+
 class OperationService(BaseService):
     """Service for managing operations."""
     model = Operation
@@ -254,6 +695,7 @@ class OperationService(BaseService):
 class TechnologyOperationComponentService(BaseService):
     """Service for managing technology operation components."""
     model = TechnologyOperationComponent
+    EDITABLE_FIELDS = ('node_number', 'priority', 'parent', 'tj', 'tpz', 'time_next_operation')
 
     @classmethod
     def get_by_technology(cls, technology_id: int):
@@ -296,17 +738,82 @@ class TechnologyOperationComponentService(BaseService):
 
         new_order: list of {'id': int, 'node_number': str, 'priority': int}
         """
-        updated = 0
-        for item in new_order:
-            cls.get_queryset().filter(
-                id=item['id'],
-                technology_id=technology_id
-            ).update(
-                node_number=item.get('node_number'),
-                priority=item.get('priority', 0)
-            )
-            updated += 1
-        return updated
+        return cls.bulk_edit(technology_id, [
+            {'id': item['id'], 'node_number': item.get('node_number'), 'priority': item.get('priority', 0)}
+            for item in new_order
+        ])
+
+    @classmethod
+    @transaction.atomic
+    def bulk_edit(cls, technology_id: int, changes: list) -> int:
+        """
+        Edit many components of a technology in one statement.
+
+        changes: list of {'id': int} plus any of EDITABLE_FIELDS (parent
+        is a component id or None). The resulting tree is validated
+        before anything is written: components and parents must belong
+        to the technology, parents must not form a cycle and node numbers
+        must stay unique. Returns the number of components updated.
+        """
+        components = {
+            component.id: component
+            for component in cls.get_queryset().select_for_update().filter(technology_id=technology_id)
+        }
+        changed = {}
+        fields = set()
+        for change in changes:
+            component = components.get(change['id'])
+            if component is None:
+                raise ValidationException(
+                    f"Component {change['id']} does not belong to technology {technology_id}", field='id'
+                )
+            for field in cls.EDITABLE_FIELDS:
+                if field not in change:
+                    continue
+                value = change[field]
+                if field == 'parent':
+                    if value is not None and value not in components:
+                        raise ValidationException(
+                            f"Parent {value} of component {component.id} is not part of the technology",
+                            field='parent'
+                        )
+                    field = 'parent_id'
+                if field == 'node_number' and not value:
+                    raise ValidationException('Node number is required', field='node_number')
+                setattr(component, field, value)
+                fields.add('parent' if field == 'parent_id' else field)
+            changed[component.id] = component
+
+        for component in changed.values():
+            seen = {component.id}
+            parent_id = component.parent_id
+            while parent_id is not None:
+                if parent_id in seen:
+                    raise ValidationException(
+                        f"Component {component.id} would become its own ancestor", field='parent'
+                    )
+                seen.add(parent_id)
+                parent_id = components[parent_id].parent_id if parent_id in components else None
+
+        if 'node_number' in fields:
+            numbers = defaultdict(list)
+            for component in components.values():
+                numbers[component.node_number].append(component.id)
+            for component in changed.values():
+                if len(numbers[component.node_number]) > 1:
+                    raise ValidationException(
+                        f"Node number '{component.node_number}' is used more than once", field='node_number'
+                    )
+
+        if not changed:
+            return 0
+        now = timezone.now()
+        for component in changed.values():
+            component.updated_at = now
+        cls.model.objects.bulk_update(list(changed.values()), sorted(fields) + ['updated_at'])
+        # Bulk writes bypass the signals
+        TechnologyService.bump_structure_version(Technology.objects.filter(id=technology_id))
+        return len(changed)
 
 
 # Backwards compatibility alias
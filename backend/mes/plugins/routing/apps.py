@@ -6,3 +6,6 @@ class RoutingConfig(AppConfig):
     name = 'mes.plugins.routing'
     label = 'technologies'
     verbose_name = 'Routing'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -21,6 +21,8 @@ class Technology(models.Model):
     state = models.CharField(max_length=20, choices=STATE_CHOICES, default='draft')
     master = models.BooleanField(default=False)
     active = models.BooleanField(default=True)
+    # Bumped whenever components, their I/O or operations change (see signals)
+    structure_version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
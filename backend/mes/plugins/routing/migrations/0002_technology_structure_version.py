@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("technologies", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="technology",
+            name="structure_version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
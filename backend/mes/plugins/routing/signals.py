@@ -0,0 +1,59 @@
+"""
+Routing signals.
+
+Compiled technologies are keyed by Technology.structure_version; any
+change to a component, its input/output products or an operation used by
+a technology bumps the version so the next read recompiles. Bulk writes
+bypass these signals and call TechnologyService.bump_structure_version.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .application.services import TechnologyService
+from .domain.models import (
+    Technology, Operation, TechnologyOperationComponent,
+    OperationProductInComponent, OperationProductOutComponent
+)
+
+
+@receiver([post_save, post_delete], sender=TechnologyOperationComponent)
+def component_changed(sender, instance, **kwargs):
+    TechnologyService.bump_structure_version(
+        Technology.objects.filter(id=instance.technology_id)
+    )
+
+
+@receiver([post_save, post_delete], sender=OperationProductInComponent)
+@receiver([post_save, post_delete], sender=OperationProductOutComponent)
+def product_component_changed(sender, instance, **kwargs):
+    # Rows deleted with their component are covered by component_changed
+    TechnologyService.bump_structure_version(
+        Technology.objects.filter(operation_components=instance.operation_component_id)
+    )
+
+
+@receiver(post_save, sender=Operation)
+def operation_changed(sender, instance, created, **kwargs):
+    if not created:
+        TechnologyService.bump_structure_version(
+            Technology.objects.filter(operation_components__operation=instance.id)
+        )
+
+
+@receiver(m2m_changed, sender=Operation.workstations.through)
+def operation_workstations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Workstation removed from all its operations; remember which ones
+        instance._cleared_operation_ids = list(instance.operations.values_list('id', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        operation_ids = [instance.pk]
+    elif action == 'post_clear':
+        operation_ids = getattr(instance, '_cleared_operation_ids', [])
+    else:
+        operation_ids = pk_set
+    TechnologyService.bump_structure_version(
+        Technology.objects.filter(operation_components__operation__in=operation_ids)
+    )
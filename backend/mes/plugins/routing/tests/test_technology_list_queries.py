@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from mes.plugins.basic.domain.models import Product
+from mes.plugins.routing.domain.models import (
+    Technology, Operation, TechnologyOperationComponent,
+    OperationProductInComponent, OperationProductOutComponent
+)
+
+URL = '/api/mes/routing/routings/'
+
+# Technology list queries, independent of the number of technologies:
+# plain list: annotated technologies with their product
+# expanded: + components with operations, input products, output products
+LIST_QUERIES = 1
+EXPANDED_QUERIES = 4
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(User.objects.create(username='planner'))
+    return client
+
+
+def create_technologies(count):
+    operation = Operation.objects.create(number='OP-10', name='Turning', tj=60, tpz=30)
+    for n in range(count):
+        product = Product.objects.create(number=f'P-{n}', name=f'Product {n}')
+        material = Product.objects.create(number=f'M-{n}', name=f'Material {n}')
+        technology = Technology.objects.create(number=f'T-{n}', name=f'Technology {n}', product=product)
+        root = TechnologyOperationComponent.objects.create(
+            technology=technology, operation=operation, node_number='1.'
+        )
+        child = TechnologyOperationComponent.objects.create(
+            technology=technology, operation=operation, node_number='1.1.', parent=root, tj=45
+        )
+        OperationProductOutComponent.objects.create(operation_component=root, product=product, quantity=1)
+        OperationProductInComponent.objects.create(operation_component=child, product=material, quantity=2)
+
+
+def list_technologies(client, count, params):
+    response = client.get(URL, params)
+    assert response.status_code == 200
+    data = response.json()
+    results = data['results'] if isinstance(data, dict) else data
+    assert len(results) == count
+    return results
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', [3, 30])
+def test_list_query_count_is_constant(client, django_assert_num_queries, count):
+    create_technologies(count)
+
+    with django_assert_num_queries(LIST_QUERIES):
+        results = list_technologies(client, count, {})
+
+    assert results[0]['component_count'] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('count', [3, 30])
+def test_expanded_list_query_count_is_constant(client, django_assert_num_queries, count):
+    create_technologies(count)
+
+    with django_assert_num_queries(EXPANDED_QUERIES):
+        results = list_technologies(client, count, {'expand': 'components'})
+
+    assert len(results[0]['operation_components']) == 2
@@ -4,9 +4,12 @@ from rest_framework.response import Response
 from django.utils import timezone
 from django.db import transaction
 from datetime import timedelta
+from ..application.services import SchedulingService
 from ..domain.models import Scheduling
 from .serializers import SchedulingSerializer, BulkSchedulingUpdateSerializer
+from mes.plugins.maintenance.application.services import AvailabilityService
 from mes.plugins.orders.domain.models import Order
+from mes.plugins.routing.application.services import TechnologyService
 from mes.plugins.routing.domain.models import TechnologyOperationComponent
 
 
@@ -43,7 +46,9 @@ class SchedulingViewSet(viewsets.ModelViewSet):
     def generate(self, request):
         """Generate a naive forward schedule for an order's technology components.
         Body: {"order": <order_id>, "start": "ISO datetime"}
-        Algorithm: lexical order of node_number, accumulate tj+tpz+time_next_operation.
+        Algorithm: compiled tree order (parents first, siblings by node_number),
+        accumulate tj+tpz+time_next_operation,
+        skipping maintenance of the operation workstations.
         """
         order_id = request.data.get('order')
         start_raw = request.data.get('start')
@@ -61,24 +66,24 @@ class SchedulingViewSet(viewsets.ModelViewSet):
                 start = start.replace(tzinfo=timezone.utc)
         except Exception:
             start = timezone.now()
-        components = order.technology.operation_components.select_related('operation').order_by('node_number')
+        nodes = TechnologyService.get_compiled(order.technology)['nodes']
         created = []
         cursor = start
-        for idx, comp in enumerate(components):
-            tj = comp.tj if comp.tj is not None else comp.operation.tj
-            tpz = comp.tpz if comp.tpz is not None else comp.operation.tpz
-            tnext = comp.time_next_operation if comp.time_next_operation is not None else comp.operation.time_next_operation
-            duration = tj + tpz
+        mask = AvailabilityService.get_mask()
+        for idx, node in enumerate(nodes):
+            tnext = node['time_next_operation']
+            duration = node['tj'] + node['tpz']
+            cursor = SchedulingService.available_start(node['workstation_ids'], cursor, duration, mask)
             end = cursor + timedelta(seconds=duration)
             item = Scheduling.objects.create(
                 order=order,
-                component=comp,
+                component_id=node['id'],
                 sequence_index=idx,
                 planned_start=cursor,
                 planned_end=end,
                 duration_seconds=duration,
                 buffer_seconds=tnext,
-                description=f"Auto generated for {comp.operation.number}"
+                description=f"Auto generated for {node['operation_number']}"
             )
             created.append(item)
             cursor = end + timedelta(seconds=tnext)
@@ -106,6 +111,7 @@ class SchedulingViewSet(viewsets.ModelViewSet):
         
         all_created = []
         cursor = start
+        mask = AvailabilityService.get_mask()
         
         with transaction.atomic():
             for order_id in order_ids:
@@ -114,25 +120,26 @@ class SchedulingViewSet(viewsets.ModelViewSet):
                     if not order.technology_id:
                         continue
                     
-                    components = order.technology.operation_components.select_related('operation').order_by('node_number')
+                    nodes = TechnologyService.get_compiled(order.technology)['nodes']
                     order_cursor = start if parallel else cursor
                     
-                    for idx, comp in enumerate(components):
-                        tj = comp.tj if comp.tj is not None else comp.operation.tj
-                        tpz = comp.tpz if comp.tpz is not None else comp.operation.tpz
-                        tnext = comp.time_next_operation if comp.time_next_operation is not None else comp.operation.time_next_operation
-                        duration = tj + tpz
+                    for idx, node in enumerate(nodes):
+                        tnext = node['time_next_operation']
+                        duration = node['tj'] + node['tpz']
+                        order_cursor = SchedulingService.available_start(
+                            node['workstation_ids'], order_cursor, duration, mask
+                        )
                         end = order_cursor + timedelta(seconds=duration)
                         
                         item = Scheduling.objects.create(
                             order=order,
-                            component=comp,
+                            component_id=node['id'],
                             sequence_index=idx,
                             planned_start=order_cursor,
                             planned_end=end,
                             duration_seconds=duration,
                             buffer_seconds=tnext,
-                            description=f"Auto generated for {comp.operation.number}"
+                            description=f"Auto generated for {node['operation_number']}"
                         )
                         all_created.append(item)
                         order_cursor = end + timedelta(seconds=tnext)
@@ -196,6 +203,32 @@ class SchedulingViewSet(viewsets.ModelViewSet):
         ser = SchedulingSerializer(qs, many=True)
         return Response({'items': ser.data, 'count': qs.count()})
 
+    @action(detail=False, methods=['get'])
+    def failure_risk(self, request):
+        """Schedule items on workstations forecast to fail while they run.
+        Query params: start, end (ISO datetimes, default now .. +30 days), threshold (0..1)
+        """
+        bounds = {}
+        for key in ('start', 'end'):
+            raw = request.query_params.get(key)
+            if not raw:
+                continue
+            try:
+                value = timezone.datetime.fromisoformat(raw)
+            except ValueError:
+                return Response({'error': f'invalid {key}'}, status=status.HTTP_400_BAD_REQUEST)
+            if value.tzinfo is None:
+                value = timezone.make_aware(value)
+            bounds[key] = value
+        threshold = request.query_params.get('threshold')
+        try:
+            threshold = float(threshold) if threshold else None
+        except ValueError:
+            return Response({'error': 'invalid threshold'}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = SchedulingService.get_failure_risks(bounds.get('start'), bounds.get('end'), threshold)
+        return Response({'items': items, 'count': len(items)})
+
     @action(detail=False, methods=['delete'], url_path='by_order/(?P<order_id>[^/.]+)')
     def delete_by_order(self, request, order_id=None):
         """Delete all schedule items for a specific order."""
@@ -281,7 +314,9 @@ class SchedulingViewSet(viewsets.ModelViewSet):
             return Response({'error': 'orders list required'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Get all schedule items for these orders
-        items = Scheduling.objects.filter(order_id__in=order_ids).select_related('order', 'component')
+        items = Scheduling.objects.filter(order_id__in=order_ids).select_related(
+            'order', 'component__operation'
+        ).prefetch_related('component__operation__workstations')
         
         # Simple optimization: reorder by earliest deadline, priority, etc.
         # This is a placeholder - real optimization would be more complex
@@ -295,10 +330,15 @@ class SchedulingViewSet(viewsets.ModelViewSet):
         # Regenerate schedule with optimized order
         cursor = timezone.now()
         updated_items = []
+        mask = AvailabilityService.get_mask()
         
         with transaction.atomic():
             for item in items:
                 duration = item.duration_seconds
+                cursor = SchedulingService.available_start(
+                    [workstation.id for workstation in item.component.operation.workstations.all()],
+                    cursor, duration, mask
+                )
                 end = cursor + timedelta(seconds=duration)
                 
                 item.planned_start = cursor
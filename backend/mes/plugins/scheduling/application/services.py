@@ -5,6 +5,7 @@ Business logic for production scheduling, conflict detection,
 and schedule optimization.
 """
 from datetime import timedelta
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Count, Q, F, Min, Max
 from django.utils import timezone
@@ -185,6 +186,67 @@ class SchedulingService(BaseService):
 
         return conflicts
 
+    @classmethod
+    def available_start(cls, workstation_ids, start, duration_seconds: int, mask=None):
+        """
+        Earliest start >= start at which one of the workstations (those of
+        the item's operation) is not under maintenance for the whole duration.
+        """
+        from mes.plugins.maintenance.application.services import AvailabilityService
+
+        if not workstation_ids:
+            return start
+        return AvailabilityService.next_free(
+            workstation_ids, start, timedelta(seconds=duration_seconds), mask
+        )
+
+    @classmethod
+    def get_failure_risks(cls, start_date=None, end_date=None, threshold: float = None) -> list:
+        """
+        Schedule items on workstations likely to fail while the item runs.
+
+        Each (item, workstation) pair of the window is scored with the
+        reliability forecast of the maintenance plugin in one vectorized
+        call; pairs at or above the threshold (default
+        RELIABILITY_RISK_THRESHOLD) are returned, highest risk first.
+        """
+        from mes.plugins.maintenance.application.services import ReliabilityService
+
+        if not start_date:
+            start_date = timezone.now()
+        if not end_date:
+            end_date = start_date + timedelta(days=30)
+        if threshold is None:
+            threshold = settings.RELIABILITY_RISK_THRESHOLD
+
+        items = list(cls.get_by_date_range(start_date, end_date).select_related(
+            'order', 'component__operation'
+        ).prefetch_related('component__operation__workstations'))
+        pairs = [
+            (item, workstation)
+            for item in items
+            for workstation in item.component.operation.workstations.all()
+        ]
+        risk = ReliabilityService.window_risk(
+            (workstation.id, item.planned_start, item.planned_end) for item, workstation in pairs
+        )
+
+        flagged = [
+            {
+                'item': item.id,
+                'order': item.order.number,
+                'workstation': workstation.id,
+                'workstation_number': workstation.number,
+                'start': item.planned_start.isoformat(),
+                'end': item.planned_end.isoformat(),
+                'failure_probability': round(float(probability), 4),
+            }
+            for (item, workstation), probability in zip(pairs, risk)
+            if probability >= threshold
+        ]
+        flagged.sort(key=lambda entry: -entry['failure_probability'])
+        return flagged
+
     @classmethod
     @transaction.atomic
     def shift_order_schedule(cls, order_id: int, delta_seconds: int) -> int:
@@ -247,9 +309,13 @@ class SchedulingService(BaseService):
         """
         Generate schedule items from order's technology tree.
 
-        Uses operation durations (tj, tpz) to calculate timing.
+        Uses operation durations (tj, tpz) of the compiled technology, in
+        topological order, to calculate timing; operations are pushed past
+        maintenance of their workstations.
         """
+        from mes.plugins.maintenance.application.services import AvailabilityService
         from mes.plugins.orders.domain.models import Order
+        from mes.plugins.routing.application.services import TechnologyService
 
         order = Order.objects.select_related('technology').get(id=order_id)
         if not order.technology_id:
@@ -261,31 +327,31 @@ class SchedulingService(BaseService):
         if clear_existing:
             cls.get_by_order(order_id).filter(locked=False).delete()
 
-        components = order.technology.operation_components.select_related(
-            'operation'
-        ).order_by('node_number')
+        nodes = TechnologyService.get_compiled(order.technology)['nodes']
 
         created_items = []
         current_time = start_time
+        mask = AvailabilityService.get_mask()
 
-        for idx, comp in enumerate(components):
-            # Calculate duration from operation times
-            tj = comp.tj or comp.operation.tj or 0
-            tpz = comp.tpz or comp.operation.tpz or 0
-            time_next = comp.time_next_operation or comp.operation.time_next_operation or 0
+        for idx, node in enumerate(nodes):
+            # Effective operation times (component override or operation default)
+            tj = node['tj']
+            tpz = node['tpz']
+            time_next = node['time_next_operation']
 
             # Duration in seconds (assuming tj/tpz are in minutes)
             duration_seconds = int((tj + tpz) * 60)
             buffer_seconds = int(time_next * 60)
 
+            current_time = cls.available_start(node['workstation_ids'], current_time, duration_seconds, mask)
             item = cls.create_schedule_item(
                 order_id=order_id,
-                component_id=comp.id,
+                component_id=node['id'],
                 planned_start=current_time,
                 duration_seconds=duration_seconds,
                 buffer_seconds=buffer_seconds,
                 sequence_index=idx,
-                description=f"Operation: {comp.operation.number} - {comp.operation.name}"
+                description=f"Operation: {node['operation_number']} - {node['operation_name']}"
             )
             created_items.append(item)
 
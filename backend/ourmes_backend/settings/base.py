@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'swagger',
     'tenant',
     'view',
+    'core',
     'mes.application',
     'mes.plugins.basic',
     'mes.plugins.orders',
@@ -125,6 +126,84 @@ STATIC_URL = '/static/'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Inventory traceability: maintain the batch genealogy closure table on every
+# consumption record. Rebuild it with TraceabilityService.rebuild_closure()
+# after enabling.
+TRACEABILITY_CLOSURE_ENABLED = os.getenv('TRACEABILITY_CLOSURE_ENABLED', 'False') == 'True'
+
+# Cache shared by all processes. Point CACHE_BACKEND at a shared backend
+# (database, redis, memcached) so results computed by scheduled management
+# commands are visible to the web workers.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'ourmes'),
+    }
+}
+
+# Inventory availability summaries: how long a summary is served from the
+# per-process cache (seconds). Writes only invalidate the writing process.
+INVENTORY_AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('INVENTORY_AVAILABILITY_CACHE_TIMEOUT', '30'))
+
+# Inventory expiry scanner: day boundaries of the days-to-expiry buckets and
+# how long a scan result is served from the cache.
+EXPIRY_BUCKET_DAYS = [int(d) for d in os.getenv('EXPIRY_BUCKET_DAYS', '7,30,90').split(',')]
+EXPIRY_SCAN_CACHE_TIMEOUT = int(os.getenv('EXPIRY_SCAN_CACHE_TIMEOUT', '3600'))
+
+# Kanban: evaluate card thresholds automatically after every stock movement.
+KANBAN_AUTO_REPLENISHMENT = os.getenv('KANBAN_AUTO_REPLENISHMENT', 'True') == 'True'
+
+# SPC running statistics: accumulators held in memory per (parameter, machine),
+# size of their rolling window and how often dirty ones are persisted (seconds).
+SPC_ACCUMULATOR_CACHE_SIZE = int(os.getenv('SPC_ACCUMULATOR_CACHE_SIZE', '10000'))
+SPC_WINDOW_SIZE = int(os.getenv('SPC_WINDOW_SIZE', '100'))
+SPC_PERSIST_INTERVAL = int(os.getenv('SPC_PERSIST_INTERVAL', '60'))
+# SPC batch ingest: rows per bulk_create chunk and the largest accepted batch.
+SPC_INGEST_CHUNK_SIZE = int(os.getenv('SPC_INGEST_CHUNK_SIZE', '2000'))
+SPC_INGEST_MAX_BATCH = int(os.getenv('SPC_INGEST_MAX_BATCH', '50000'))
+# SPC retention: raw points older than SPC_RAW_RETENTION_DAYS are rolled up per
+# minute, minute rollups older than SPC_MINUTE_RETENTION_DAYS per hour.
+SPC_RAW_RETENTION_DAYS = int(os.getenv('SPC_RAW_RETENTION_DAYS', '90'))
+SPC_MINUTE_RETENTION_DAYS = int(os.getenv('SPC_MINUTE_RETENTION_DAYS', '365'))
+
+# Quality inspection: how long compiled tolerance limits stay in the shared
+# cache (seconds; they are also dropped whenever a config changes).
+QUALITY_SPEC_LIMITS_CACHE_TIMEOUT = int(os.getenv('QUALITY_SPEC_LIMITS_CACHE_TIMEOUT', '86400'))
+
+# Quality analytics: how long the check counts of a closed day stay cached (seconds).
+QUALITY_ANALYTICS_CACHE_TIMEOUT = int(os.getenv('QUALITY_ANALYTICS_CACHE_TIMEOUT', '604800'))
+
+# Maintenance downtime analytics: how long a closed day's downtime stays cached (seconds).
+MAINTENANCE_ANALYTICS_CACHE_TIMEOUT = int(os.getenv('MAINTENANCE_ANALYTICS_CACHE_TIMEOUT', '604800'))
+
+# Reliability: how long fitted models are cached (seconds) and the failure
+# probability above which scheduled work on a workstation is flagged.
+RELIABILITY_CACHE_TIMEOUT = int(os.getenv('RELIABILITY_CACHE_TIMEOUT', '86400'))
+RELIABILITY_RISK_THRESHOLD = float(os.getenv('RELIABILITY_RISK_THRESHOLD', '0.2'))
+
+# Preventive maintenance planning: default horizon (days), days of production
+# counting averaged to project usage, and how early a window may be placed
+# before it is due (fraction of the plan interval).
+PM_PLANNING_HORIZON_DAYS = int(os.getenv('PM_PLANNING_HORIZON_DAYS', '365'))
+PM_USAGE_LOOKBACK_DAYS = int(os.getenv('PM_USAGE_LOOKBACK_DAYS', '28'))
+PM_EARLY_TOLERANCE = float(os.getenv('PM_EARLY_TOLERANCE', '0.1'))
+
+# Maintenance availability mask used by scheduling: expected duration of open
+# maintenance without history (minutes) and how long the mask is cached
+# (seconds; it is also dropped whenever a log or window changes).
+MAINTENANCE_EXPECTED_MINUTES = int(os.getenv('MAINTENANCE_EXPECTED_MINUTES', '240'))
+MAINTENANCE_AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('MAINTENANCE_AVAILABILITY_CACHE_TIMEOUT', '300'))
+
+# Compiled technology trees: entries kept per process and how long they are
+# shared in the Django cache (seconds). Keyed by structure version, so
+# changes never serve stale trees.
+ROUTING_COMPILED_CACHE_SIZE = int(os.getenv('ROUTING_COMPILED_CACHE_SIZE', '2048'))
+ROUTING_COMPILED_CACHE_TIMEOUT = int(os.getenv('ROUTING_COMPILED_CACHE_TIMEOUT', '86400'))
+
+# Document number sequences: values a process reserves per database round trip
+# (1 keeps numbers gap-free; larger blocks trade gaps for fewer row locks).
+SEQUENCE_BLOCK_SIZE = int(os.getenv('SEQUENCE_BLOCK_SIZE', '1'))
+
 # Django REST Framework & Auth
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (